@@ -0,0 +1,26 @@
+"""add render_jobs.queue_id
+
+Revision ID: 8b41d6e2c5a9
+Revises: 3f9c2a7d1b04
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8b41d6e2c5a9"
+down_revision: Union[str, None] = "3f9c2a7d1b04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("render_jobs", sa.Column("queue_id", sa.String(length=128), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("render_jobs", "queue_id")
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 """YouTube動画シナリオ生成のためのContextクラス"""
 
+import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
-from ..schemas.youtube import VideoInfo, TranscriptChunk, Scenario, CutSegment
+from pydantic import BaseModel, Field, PrivateAttr, validator
+from ..schemas.youtube import VideoInfo, Scenario, CutSegment, SourceClip
+from src.lib.youtube.columnar_transcript import ColumnarTranscript
+from src.lib.youtube.media_store import get_default_media_store
+from src.lib.youtube.transcript_index import TranscriptIntervalIndex
 
 
 class YouTubeScenarioContext(BaseModel):
@@ -27,9 +31,9 @@ class YouTubeScenarioContext(BaseModel):
     availability: str = ""
     age_limit: int = 0
 
-    # Transcript data
-    transcript_chunks: List[TranscriptChunk] = Field(default_factory=list)
-    processed_transcript: List[TranscriptChunk] = Field(default_factory=list)
+    # Transcript data（列指向で保持し、辞書形式が必要な場合は to_dicts() で変換）
+    transcript_chunks: ColumnarTranscript = Field(default_factory=ColumnarTranscript)
+    processed_transcript: ColumnarTranscript = Field(default_factory=ColumnarTranscript)
 
     # Scenario generation
     generated_scenarios: List[Scenario] = Field(default_factory=list)
@@ -38,7 +42,10 @@ class YouTubeScenarioContext(BaseModel):
     # Video processing
     downloaded_video_path: str = ""
     downloaded_audio_path: str = ""
+    source_media_key: str = ""  # 元動画ストアのキー（ストアに保存した場合）
+    source_clips: List[SourceClip] = Field(default_factory=list)  # カットの範囲だけをダウンロードしたクリップ（元動画をダウンロードしていない場合）
     output_video_path: str = ""
+    output_video_paths: Dict[str, str] = Field(default_factory=dict)  # 一括生成時の企画案タイトル→出力パス
 
     # Processing status
     is_video_downloaded: bool = False
@@ -51,9 +58,20 @@ class YouTubeScenarioContext(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     last_updated: datetime = Field(default_factory=datetime.now)
 
+    # 字幕チャンクの時間範囲インデックス（字幕を更新するメソッドで破棄し、次の取得時に再作成）
+    _transcript_index: Optional[TranscriptIntervalIndex] = PrivateAttr(default=None)
+
+    # 元動画ストアへの参照の登録に使うID
+    _media_owner_id: str = PrivateAttr(default_factory=lambda: uuid.uuid4().hex)
+
     class Config:
         arbitrary_types_allowed = True
 
+    @validator("transcript_chunks", "processed_transcript", pre=True)
+    def to_columnar_transcript(cls, v):
+        """字幕チャンクのリストを列指向の形式に変換"""
+        return ColumnarTranscript.from_chunks(v)
+
     def set_video_info(self, video_info: Dict[str, Any]):
         """動画基本情報を設定（video_info辞書から）"""
         self.video_id = video_info.get("video_id", "")
@@ -76,17 +94,29 @@ class YouTubeScenarioContext(BaseModel):
     def add_transcript_chunk(self, chunk: Dict[str, Any]):
         """字幕チャンクを追加"""
         self.transcript_chunks.append(chunk)
+        self._transcript_index = None
         self.update_timestamp()
 
     def set_transcript_chunks(self, chunks: List[Dict[str, Any]]):
         """字幕チャンクを一括設定"""
-        self.transcript_chunks = chunks
+        self.transcript_chunks = ColumnarTranscript.from_chunks(chunks)
+        self._transcript_index = None
         self.is_transcript_extracted = True
         self.update_timestamp()
 
+    def get_transcript_chunks_in_range(self, start_time: float, end_time: float) -> List[Dict[str, Any]]:
+        """指定した時間範囲と重なる字幕チャンクを辞書形式で取得"""
+        return self.transcript_chunks.slice_time(start_time, end_time).to_dicts()
+
+    def get_transcript_index(self) -> TranscriptIntervalIndex:
+        """字幕チャンクの時間範囲インデックスを取得（set_transcript_chunks / add_transcript_chunk の後は再作成）"""
+        if self._transcript_index is None:
+            self._transcript_index = TranscriptIntervalIndex(self.transcript_chunks)
+        return self._transcript_index
+
     def set_processed_transcript(self, processed_chunks: List[Dict[str, Any]]):
         """処理済み字幕を設定"""
-        self.processed_transcript = processed_chunks
+        self.processed_transcript = ColumnarTranscript.from_chunks(processed_chunks)
         self.update_timestamp()
 
     def add_scenario(self, scenario: Dict[str, Any]):
@@ -167,19 +197,70 @@ class YouTubeScenarioContext(BaseModel):
                 all_segments.append(segment_with_scenario)
         return all_segments
 
-    def set_video_paths(self, video_path: str, audio_path: str = ""):
-        """ダウンロード済み動画パスを設定"""
+    def set_video_paths(self, video_path: str, audio_path: str = "", media_key: str = ""):
+        """ダウンロード済み動画パスを設定（media_key指定時は元動画ストアのエントリを参照中として登録）"""
+        if media_key != self.source_media_key:
+            self.release_source_media()
+            if media_key:
+                get_default_media_store().acquire(media_key, self._media_owner_id)
+            self.source_media_key = media_key
         self.downloaded_video_path = video_path
         self.downloaded_audio_path = audio_path
         self.is_video_downloaded = True
         self.update_timestamp()
 
+    def add_source_clips(self, clips: List[SourceClip]):
+        """ダウンロードしたクリップを追加（元動画ストアのエントリを参照中として登録）"""
+        known_keys = {clip.media_key or clip.path for clip in self.source_clips}
+        for clip in clips:
+            if (clip.media_key or clip.path) in known_keys:
+                continue
+            if clip.media_key:
+                get_default_media_store().acquire(clip.media_key, self._media_owner_id)
+            self.source_clips.append(clip)
+            known_keys.add(clip.media_key or clip.path)
+        self.update_timestamp()
+
+    def refresh_source_media(self):
+        """元動画ストアのエントリへの参照の有効期間を延長（セッションの利用中に毎回呼ぶ。呼ばれなくなった参照は期間後に解除される）"""
+        media_store = get_default_media_store()
+        for media_key in [self.source_media_key] + [clip.media_key for clip in self.source_clips]:
+            if media_key:
+                media_store.acquire(media_key, self._media_owner_id)
+
+    def release_source_media(self):
+        """元動画ストアのエントリ（元動画・クリップ）への参照を解除（解除後は容量整理で削除されうる）"""
+        media_store = get_default_media_store()
+        if self.source_media_key:
+            media_store.release(self.source_media_key, self._media_owner_id)
+            self.source_media_key = ""
+        for clip in self.source_clips:
+            if clip.media_key:
+                media_store.release(clip.media_key, self._media_owner_id)
+        self.source_clips = []
+
+    def get_source_video_path(self) -> str:
+        """元動画のパスを取得（元動画ストアに保存されている場合はストアから探す）"""
+        if self.source_media_key:
+            entry = get_default_media_store().get(self.source_media_key)
+            if entry is not None and entry.video_path:
+                return entry.video_path
+        return self.downloaded_video_path
+
     def set_output_path(self, output_path: str):
         """出力動画パスを設定"""
         self.output_video_path = output_path
         self.is_video_processed = True
         self.update_timestamp()
 
+    def set_output_paths(self, output_paths: Dict[str, str]):
+        """一括生成した出力動画パスを設定（先頭の動画を代表の出力パスとする）"""
+        self.output_video_paths = dict(output_paths)
+        if output_paths:
+            self.output_video_path = next(iter(output_paths.values()))
+            self.is_video_processed = True
+        self.update_timestamp()
+
     def get_selected_scenario_details(self) -> List[Dict[str, Any]]:
         """選択されたシナリオの詳細を取得"""
         return [scenario for scenario in self.generated_scenarios if scenario.get("title") in self.selected_scenarios]
@@ -188,8 +269,8 @@ class YouTubeScenarioContext(BaseModel):
         """字幕テキストを結合して取得（生のtranscript_chunksを優先）"""
         # タイムスタンプの精度を保つため、生のtranscript_chunksを優先
         if self.transcript_chunks:
-            return " ".join([chunk.get("text", "") for chunk in self.transcript_chunks])
-        return " ".join([chunk.get("text", "") for chunk in self.processed_transcript])
+            return self.transcript_chunks.joined_text()
+        return self.processed_transcript.joined_text()
 
     def get_processing_status(self) -> Dict[str, bool]:
         """処理ステータスを取得"""
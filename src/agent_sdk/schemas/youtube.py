@@ -170,6 +170,28 @@ class FileInfo(BaseModel):
     size: int = 0
 
 
+class DownloadStats(BaseModel):
+    """Throughput of a source video download."""
+
+    profile: str = ""
+    downloaded_bytes: int = 0  # size of the downloaded files, including resumed parts
+    transferred_bytes: int = 0  # bytes transferred in this run
+    resumed_bytes: int = 0  # bytes reused from an interrupted .part file
+    elapsed: float = 0.0
+    average_speed: float = 0.0  # transferred_bytes per second
+    fragment_count: int = 0
+    concurrent_fragments: int = 1
+
+
+class SourceClip(BaseModel):
+    """Part of the source video downloaded on its own, mapped to the source timeline."""
+
+    path: str
+    start_time: float  # position of the clip's first frame in the source video (seconds)
+    end_time: float
+    media_key: Optional[str] = None  # key in the shared media store
+
+
 class YouTubeDownloadResult(BaseResponse):
     """Result of YouTube video download operation."""
 
@@ -177,6 +199,19 @@ class YouTubeDownloadResult(BaseResponse):
     audio_path: Optional[str] = None
     metadata: Optional[VideoInfo] = None
     file_info: Optional[FileInfo] = None
+    media_key: Optional[str] = None  # key in the shared media store (None when downloaded to output_dir)
+    cached: bool = False
+    download_stats: Optional[DownloadStats] = None  # None when nothing was downloaded
+
+
+class YouTubeClipsDownloadResult(BaseResponse):
+    """Result of downloading only the time ranges around the cuts."""
+
+    clips: List[SourceClip] = Field(default_factory=list)
+    metadata: Optional[VideoInfo] = None
+    downloaded_clips: int = 0
+    reused_clips: int = 0  # clips (or a full download) already in the media store
+    download_stats: Optional[DownloadStats] = None
 
 
 class TranscriptExtractionResult(BaseResponse):
@@ -5,6 +5,7 @@ from typing import Dict, List, Any, Optional
 from agents import function_tool, RunContextWrapper
 from ..context.youtube_scenario_context import YouTubeScenarioContext
 from ...agent_sdk.schemas.youtube import CutSegment, Scenario
+from src.lib.youtube.transcript_compact import COMPACT_TRANSCRIPT_FORMAT, DEFAULT_PAGE_SIZE, estimate_tokens, paginate_compact_transcript
 
 
 @function_tool
@@ -45,28 +46,51 @@ def get_video_info(context: RunContextWrapper[YouTubeScenarioContext]) -> Dict[s
 
 
 @function_tool
-def get_transcript(context: RunContextWrapper[YouTubeScenarioContext]) -> Dict[str, Any]:
-    """字幕データを取得する
+def get_transcript(
+    context: RunContextWrapper[YouTubeScenarioContext],
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+) -> Dict[str, Any]:
+    """字幕データを1チャンク1行（`開始秒|テキスト`）の形式でページごとに取得する
 
     Args:
         context: YouTubeScenarioContextのラッパー
+        page: ページ番号（1から）
+        page_size: 1ページの行数
+        start_time: 指定した場合、この秒数以降と重なるチャンクのみ
+        end_time: 指定した場合、この秒数より前と重なるチャンクのみ
 
     Returns:
-        字幕データの辞書
+        字幕データの辞書（lines: 字幕の行、has_next: 次のページがあるかどうか）
     """
     try:
         youtube_context: YouTubeScenarioContext = context.context
 
-        # 生のtranscript_chunksを優先的に提供（タイムスタンプの精度が高い）
+        # 生のtranscript_chunks（タイムスタンプの精度が高い）を、辞書や連結テキストにせず1チャンク1行で渡す
+        transcript_page = paginate_compact_transcript(youtube_context.transcript_chunks, page, page_size, start_time, end_time)
+        transcript_text = "\n".join(transcript_page.items)
+        token_estimate = estimate_tokens(transcript_text)
+        total_pages = max(1, -(-transcript_page.total_count // page_size))
+        print(f"DEBUG: get_transcript - ページ {page}/{total_pages}, {len(transcript_page.items)}行, 推定トークン数: {token_estimate}")
+
         transcript_data = {
-            "transcript_chunks": youtube_context.transcript_chunks,
-            "transcript_text": " ".join([chunk.get("text", "") for chunk in youtube_context.transcript_chunks]),
+            "format": COMPACT_TRANSCRIPT_FORMAT,
+            "lines": transcript_text,
+            "page": transcript_page.page,
+            "total_pages": total_pages,
+            "has_next": transcript_page.has_next,
+            "chunks_count": transcript_page.total_count,
             "is_extracted": youtube_context.is_transcript_extracted,
-            "chunks_count": len(youtube_context.transcript_chunks),
-            "note": "transcript_chunksを使用してください（より正確なタイムスタンプ）",
+            "token_estimate": token_estimate,
         }
 
-        return {"success": True, "message": f"字幕データを取得しました（{len(youtube_context.transcript_chunks)}チャンク）", "data": transcript_data}
+        return {
+            "success": True,
+            "message": f"字幕データを取得しました（{transcript_page.total_count}チャンク中 {len(transcript_page.items)}行、ページ {page}/{total_pages}）",
+            "data": transcript_data,
+        }
     except Exception as e:
         return {"success": False, "message": f"字幕データの取得に失敗しました: {str(e)}"}
 
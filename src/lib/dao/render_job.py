@@ -0,0 +1,120 @@
+from datetime import datetime
+from typing import Optional
+
+from src.lib.dao.helper.session import auto_session_manage
+from src.lib.models.render_job import RenderJob
+from sqlalchemy.orm import Session
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+@auto_session_manage(mode="write")
+def create_render_job(job_id: str, kind: str, params: str, owner: str = "", queue_id: Optional[str] = None, session: Session = None) -> RenderJob | None:
+    if session is None:
+        return None
+    job = RenderJob(id=job_id, kind=kind, params=params, owner=owner, queue_id=queue_id, status="queued", progress=0.0, message="待機中", cancel_requested=False)
+    session.add(job)
+    session.commit()
+    return job
+
+
+@auto_session_manage(mode="read")
+def get_render_job(job_id: str, session: Session = None) -> RenderJob | None:
+    if session is None:
+        return None
+    return session.get(RenderJob, job_id)
+
+
+@auto_session_manage(mode="read")
+def get_render_jobs(owner: Optional[str] = None, limit: int = 20, session: Session = None) -> list[RenderJob] | None:
+    if session is None:
+        return None
+    query = session.query(RenderJob)
+    if owner is not None:
+        query = query.filter(RenderJob.owner == owner)
+    return query.order_by(RenderJob.created_at.desc()).limit(limit).all()
+
+
+@auto_session_manage(mode="write")
+def start_render_job(job_id: str, worker_pid: int, session: Session = None) -> bool:
+    """待機中かつキャンセル要求のないジョブのみ実行中にする（条件付きUPDATEで二重実行を防ぐ）"""
+    if session is None:
+        return False
+    updated = (
+        session.query(RenderJob)
+        .filter(RenderJob.id == job_id, RenderJob.status == "queued", RenderJob.cancel_requested.is_(False))
+        .update({"status": "running", "worker_pid": worker_pid, "started_at": datetime.now(), "message": "処理開始"}, synchronize_session=False)
+    )
+    session.commit()
+    return updated == 1
+
+
+@auto_session_manage(mode="write")
+def update_render_job_progress(job_id: str, progress: float, message: str, session: Session = None) -> bool:
+    """進捗を保存し、キャンセル要求の有無を返す"""
+    if session is None:
+        return False
+    job = session.get(RenderJob, job_id)
+    if job is None:
+        return True
+    job.progress = progress
+    job.message = message
+    session.commit()
+    return job.cancel_requested
+
+
+@auto_session_manage(mode="write")
+def finish_render_job(job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None, session: Session = None) -> RenderJob | None:
+    if session is None:
+        return None
+    job = session.get(RenderJob, job_id)
+    if job is None:
+        return None
+    job.status = status
+    job.result = result
+    job.error = error
+    job.finished_at = datetime.now()
+    if status == "succeeded":
+        job.progress = 1.0
+    session.commit()
+    return job
+
+
+@auto_session_manage(mode="write")
+def request_render_job_cancel(job_id: str, session: Session = None) -> bool:
+    """待機中のジョブは即座にキャンセルし、実行中のジョブにはキャンセル要求を立てる"""
+    if session is None:
+        return False
+    job = session.get(RenderJob, job_id)
+    if job is None or job.status not in ACTIVE_STATUSES:
+        return False
+    job.cancel_requested = True
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.message = "キャンセルされました"
+        job.finished_at = datetime.now()
+    session.commit()
+    return True
+
+
+@auto_session_manage(mode="read")
+def get_active_render_jobs(session: Session = None) -> list[RenderJob] | None:
+    """待機中・実行中のジョブを取得"""
+    if session is None:
+        return None
+    return session.query(RenderJob).filter(RenderJob.status.in_(ACTIVE_STATUSES)).all()
+
+
+@auto_session_manage(mode="write")
+def fail_interrupted_render_jobs(job_ids: list[str], session: Session = None) -> int:
+    """投入したキューのプロセス終了で取り残されたジョブ（待機中・実行中のもののみ）を失敗扱いにする"""
+    if session is None or not job_ids:
+        return 0
+    updated = (
+        session.query(RenderJob)
+        .filter(RenderJob.id.in_(job_ids), RenderJob.status.in_(ACTIVE_STATUSES))
+        .update({"status": "failed", "error": "レンダリングサーバーの再起動により中断されました", "finished_at": datetime.now()}, synchronize_session=False)
+    )
+    session.commit()
+    return updated
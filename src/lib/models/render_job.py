@@ -0,0 +1,54 @@
+from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.functions import current_timestamp
+from typing import Optional
+from datetime import datetime
+
+from src.lib.models.base import Base
+
+
+class RenderJob(Base):
+    __tablename__ = "render_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)  # single / batch
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="queued")  # queued / running / succeeded / failed / cancelled
+    params: Mapped[str] = mapped_column(Text, nullable=False)  # JSON
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    message: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    result: Mapped[Optional[str]] = mapped_column(Text)  # JSON
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    worker_pid: Mapped[Optional[int]] = mapped_column(Integer)
+    queue_id: Mapped[Optional[str]] = mapped_column(String(128))  # 投入したキュー（ホスト名:プロセスID:インスタンスID）
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=current_timestamp())
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, onupdate=current_timestamp(), server_default=current_timestamp())
+
+    def __repr__(self) -> str:
+        return f"<RenderJob(id={self.id}, kind={self.kind}, status={self.status}, progress={self.progress})>"
+
+    def __str__(self) -> str:
+        return f"RenderJob(id={self.id}, kind={self.kind}, status={self.status}, progress={self.progress})"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "owner": self.owner,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "worker_pid": self.worker_pid,
+            "queue_id": self.queue_id,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "last_updated_at": self.last_updated_at,
+        }
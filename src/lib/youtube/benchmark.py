@@ -0,0 +1,540 @@
+# -*- coding: utf-8 -*-
+"""動画処理のベンチマーク用スクリプト
+
+ffmpegのtestsrc/sineで合成した動画を使い、実際のYouTube動画なしで計測する。
+
+使い方:
+    python -m src.lib.youtube.benchmark render --duration 300
+    python -m src.lib.youtube.benchmark profiles --duration 120
+    python -m src.lib.youtube.benchmark subtitles --chunks 10000
+    python -m src.lib.youtube.benchmark subtitle-renderers --duration 300
+    python -m src.lib.youtube.benchmark normalize --chunks 10000
+    python -m src.lib.youtube.benchmark transcripts --latency 0.2
+    python -m src.lib.youtube.benchmark transcript-tokens --durations 600 3600 10800
+    python -m src.lib.youtube.benchmark downloads --duration 300 --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+
+import ffmpeg
+
+from src.agent_sdk.schemas.youtube import YouTubeDownloadResult
+from src.lib.youtube.columnar_transcript import ColumnarTranscript
+from src.lib.youtube.download_profiles import DOWNLOAD_PROFILES
+from src.lib.youtube.render_profiles import RENDER_PROFILES
+from src.lib.youtube.subtitle_overlay import SUBTITLE_RENDERERS, read_subtitle_cues
+from src.lib.youtube import transcript_compact
+from src.lib.youtube.transcript_compact import DEFAULT_PAGE_SIZE, estimate_tokens, paginate_compact_transcript
+from src.lib.youtube.transcript_fetchers import CountingTranscriptTransport, LocalTranscriptTransport, TranscriptFetcher, TranscriptUnavailableError
+from src.lib.youtube.transcript_index import TranscriptIntervalIndex
+from src.lib.youtube.transcript_normalizer import DEFAULT_FILLER_WORDS, DEFAULT_REPLACEMENTS, TranscriptNormalizer
+from src.lib.youtube.video_processing import create_short_video, create_subtitle_file, cleanup_temp_directory
+from src.lib.youtube.youtube_download import download_media
+
+
+def create_synthetic_video(output_path: str, duration: float = 300, width: int = 1280, height: int = 720, fps: int = 30) -> str:
+    """testsrc（映像）とsine（音声）から合成テスト動画を作成"""
+    video = ffmpeg.input(f"testsrc=size={width}x{height}:rate={fps}", f="lavfi", t=duration)
+    audio = ffmpeg.input("sine=frequency=440:sample_rate=44100", f="lavfi", t=duration)
+    ffmpeg.output(video, audio, output_path, vcodec="libx264", acodec="aac", preset="ultrafast", pix_fmt="yuv420p").overwrite_output().run(quiet=True)
+    return output_path
+
+
+def create_synthetic_cut_segments(source_duration: float, num_segments: int = 6, total_duration: float = 60) -> List[Dict[str, Any]]:
+    """ソース全体に均等に散らばったカットセグメントを作成"""
+    segment_duration = total_duration / num_segments
+    step = source_duration / num_segments
+    return [{"start_time": round(i * step + 1, 3), "end_time": round(i * step + 1 + segment_duration, 3)} for i in range(num_segments)]
+
+
+def create_synthetic_transcript(source_duration: float, chunk_duration: float = 2.5) -> List[Dict[str, Any]]:
+    """一定間隔の字幕チャンクを作成"""
+    chunks = []
+    start = 0.0
+    index = 0
+    while start < source_duration:
+        chunks.append({"text": f"テスト字幕 {index} です。", "start": round(start, 3), "duration": chunk_duration})
+        start += chunk_duration
+        index += 1
+    return chunks
+
+
+def benchmark_render_modes(duration: float = 300, num_segments: int = 6, with_subtitles: bool = True) -> List[Dict[str, Any]]:
+    """multi_pass と single_pass のレンダリング時間・中間ファイル量を比較"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        source_path = create_synthetic_video(os.path.join(work_dir, "source.mp4"), duration=duration)
+        cut_segments = create_synthetic_cut_segments(duration, num_segments=num_segments)
+
+        subtitle_path = None
+        if with_subtitles:
+            subtitle_result = create_subtitle_file(create_synthetic_transcript(duration), cut_segments, output_path=os.path.join(work_dir, "subtitles.ass"), format="ass")
+            subtitle_path = subtitle_result["subtitle_path"]
+
+        results = []
+        for render_mode in ("multi_pass", "single_pass"):
+            output_path = os.path.join(work_dir, f"{render_mode}.mp4")
+            started = time.perf_counter()
+            result = create_short_video(source_path, cut_segments, output_path=output_path, subtitle_path=subtitle_path, render_mode=render_mode, use_render_cache=False)
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "render_mode": render_mode,
+                    "success": result.success,
+                    "error": result.error,
+                    "seconds": round(elapsed, 2),
+                    "output_bytes": os.path.getsize(output_path) if result.success else 0,
+                    "intermediate_bytes": result.processing_details.get("intermediate_bytes", 0),
+                }
+            )
+        return results
+    finally:
+        cleanup_temp_directory(work_dir)
+
+
+def benchmark_render_profiles(duration: float = 120, num_segments: int = 6) -> List[Dict[str, Any]]:
+    """品質ごとのエンコード速度（fps）と出力サイズを計測"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        source_path = create_synthetic_video(os.path.join(work_dir, "source.mp4"), duration=duration)
+        cut_segments = create_synthetic_cut_segments(duration, num_segments=num_segments)
+
+        results = []
+        for quality, profile in RENDER_PROFILES.items():
+            output_path = os.path.join(work_dir, f"{quality}.mp4")
+            started = time.perf_counter()
+            result = create_short_video(source_path, cut_segments, output_path=output_path, quality=quality, use_render_cache=False)
+            elapsed = time.perf_counter() - started
+
+            frames = result.video_info.get("duration", 0) * result.video_info.get("fps", 0) if result.success else 0
+            results.append(
+                {
+                    "quality": quality,
+                    "resolution": f"{profile.width}x{profile.height}",
+                    "preset": profile.preset,
+                    "crf": profile.crf,
+                    "success": result.success,
+                    "seconds": round(elapsed, 2),
+                    "encode_fps": round(frames / elapsed, 1) if elapsed > 0 else 0,
+                    "output_bytes": os.path.getsize(output_path) if result.success else 0,
+                }
+            )
+        return results
+    finally:
+        cleanup_temp_directory(work_dir)
+
+
+def benchmark_subtitle_renderers(duration: float = 300, num_segments: int = 6, quality: str = "high") -> List[Dict[str, Any]]:
+    """同じ字幕（ASS）を libass と overlay で焼き込み、結合・字幕パスの処理時間を比較（字幕なしを基準として併記）"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        source_path = create_synthetic_video(os.path.join(work_dir, "source.mp4"), duration=duration)
+        cut_segments = create_synthetic_cut_segments(duration, num_segments=num_segments)
+        subtitle_result = create_subtitle_file(create_synthetic_transcript(duration), cut_segments, output_path=os.path.join(work_dir, "subtitles.ass"), format="ass")
+        subtitle_path = subtitle_result["subtitle_path"]
+        cue_count = len(read_subtitle_cues(subtitle_path))
+
+        results = []
+        for renderer in ("none",) + SUBTITLE_RENDERERS:
+            output_path = os.path.join(work_dir, f"{renderer}.mp4")
+            started = time.perf_counter()
+            result = create_short_video(
+                source_path,
+                cut_segments,
+                output_path=output_path,
+                subtitle_path=None if renderer == "none" else subtitle_path,
+                quality=quality,
+                use_render_cache=False,
+                subtitle_renderer="libass" if renderer == "none" else renderer,
+            )
+            elapsed = time.perf_counter() - started
+            finalize_stats = result.processing_details.get("encode_stats", {}).get("stages", {}).get("finalize", {}) if result.success else {}
+            results.append(
+                {
+                    "renderer": renderer,
+                    "success": result.success,
+                    "error": result.error,
+                    "cues": 0 if renderer == "none" else cue_count,
+                    "seconds": round(elapsed, 2),
+                    "finalize_seconds": finalize_stats.get("elapsed", 0),
+                    "finalize_speed": finalize_stats.get("avg_speed", 0),
+                }
+            )
+        return results
+    finally:
+        cleanup_temp_directory(work_dir)
+
+
+def _overlapping_chunks_nested_loop(transcript_chunks: List[Dict[str, Any]], cut_segments: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """従来の create_subtitle_file と同じ、セグメント×チャンクの総当たりで重なるチャンクを探す"""
+    results = []
+    for segment in cut_segments:
+        start_time, end_time = segment["start_time"], segment["end_time"]
+        results.append([chunk for chunk in transcript_chunks if chunk["start"] < end_time and chunk["start"] + chunk["duration"] > start_time])
+    return results
+
+
+def benchmark_subtitle_slicing(num_chunks: int = 10000, num_scenarios: int = 10, segments_per_scenario: int = 6, repeats: int = 3) -> List[Dict[str, Any]]:
+    """字幕チャンクの切り出しを、総当たりと時間範囲インデックスで比較"""
+    chunk_duration = 2.5
+    source_duration = num_chunks * chunk_duration
+    transcript_chunks = create_synthetic_transcript(source_duration, chunk_duration=chunk_duration)
+    cut_segments = []
+    for scenario in range(num_scenarios):
+        # 企画案ごとにずらした位置からカットを作る
+        offset = scenario * source_duration / (num_scenarios * segments_per_scenario * 2)
+        cut_segments.extend(
+            {"start_time": segment["start_time"] + offset, "end_time": segment["end_time"] + offset}
+            for segment in create_synthetic_cut_segments(source_duration - offset, num_segments=segments_per_scenario)
+        )
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        expected = _overlapping_chunks_nested_loop(transcript_chunks, cut_segments)
+    nested_seconds = (time.perf_counter() - started) / repeats
+
+    started = time.perf_counter()
+    transcript_index = TranscriptIntervalIndex(transcript_chunks)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        actual = [transcript_index.overlapping(segment["start_time"], segment["end_time"]) for segment in cut_segments]
+    query_seconds = (time.perf_counter() - started) / repeats
+
+    return [
+        {"method": "nested_loop", "chunks": len(transcript_chunks), "segments": len(cut_segments), "ms": round(nested_seconds * 1000, 3), "matches_nested_loop": True},
+        {"method": "interval_index_build", "chunks": len(transcript_chunks), "segments": 0, "ms": round(build_seconds * 1000, 3), "matches_nested_loop": True},
+        {
+            "method": "interval_index_query",
+            "chunks": len(transcript_chunks),
+            "segments": len(cut_segments),
+            "ms": round(query_seconds * 1000, 3),
+            "matches_nested_loop": actual == expected,
+        },
+    ]
+
+
+def _fix_transcript_text_sequential(transcript_chunks: List[Dict[str, Any]], replacements: Dict[str, str]) -> List[Dict[str, Any]]:
+    """従来の fix_transcript_text と同じ、チャンクごとに置換パターンを1つずつ適用する方式"""
+    filler_patterns = [rf"\b{re.escape(word)}\b" for word in DEFAULT_FILLER_WORDS]
+    result = []
+    for chunk in transcript_chunks:
+        text = chunk.get("text", "")
+        for pattern, replacement in replacements.items():
+            text = text.replace(pattern, replacement)
+        for pattern in filler_patterns:
+            text = re.sub(pattern, "", text)
+        text = re.sub(r"\s+", " ", text).strip()
+        if text:
+            result.append({"text": text, "start": chunk.get("start", 0), "duration": chunk.get("duration", 0)})
+    return result
+
+
+def benchmark_transcript_normalization(num_chunks: int = 10000, dictionary_sizes: List[int] = [10, 100, 1000], repeats: int = 3) -> List[Dict[str, Any]]:
+    """字幕テキストの正規化を、パターンごとの逐次置換とコンパイル済みの正規化器で辞書サイズごとに比較"""
+    transcript_chunks = create_synthetic_transcript(num_chunks * 2.5)
+    for i, chunk in enumerate(transcript_chunks):
+        chunk["text"] = f"えー {chunk['text']} チーム未来の安野高ひです 議員{i % 500}号"
+    total_chars = sum(len(chunk["text"]) for chunk in transcript_chunks)
+
+    results = []
+    for size in dictionary_sizes:
+        replacements = dict(DEFAULT_REPLACEMENTS)
+        replacements.update({f"議員{i}号": f"議員{i}番" for i in range(max(0, size - len(replacements)))})
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            expected = _fix_transcript_text_sequential(transcript_chunks, replacements)
+        sequential_seconds = (time.perf_counter() - started) / repeats
+
+        started = time.perf_counter()
+        normalizer = TranscriptNormalizer(replacements)
+        compile_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            actual = normalizer.normalize_chunks(transcript_chunks)
+        compiled_seconds = (time.perf_counter() - started) / repeats
+
+        results.append(
+            {
+                "dictionary_size": len(replacements),
+                "chunks": len(transcript_chunks),
+                "sequential_ms": round(sequential_seconds * 1000, 1),
+                "compile_ms": round(compile_seconds * 1000, 1),
+                "compiled_ms": round(compiled_seconds * 1000, 1),
+                "compiled_ns_per_char": round(compiled_seconds * 1e9 / total_chars, 1) if total_chars else 0,
+                "matches_sequential": actual == expected,
+            }
+        )
+    return results
+
+
+def _fetch_transcript_per_language(transport: CountingTranscriptTransport, video_id: str, languages: List[str]) -> None:
+    """従来の extract_youtube_transcript と同じ、一覧取得後に言語ごとに get_transcript を試す方式
+
+    get_transcript は呼び出しごとに内部で一覧を取得し直すため、1回の試行で一覧取得（と見つかれば字幕取得）が発生する。
+    """
+    transport.list_tracks(video_id)
+    for lang in languages:
+        tracks = transport.list_tracks(video_id)
+        track = next((track for track in tracks if track.language_code == lang), None)
+        if track is not None:
+            transport.fetch_track(video_id, track)
+            return
+    tracks = transport.list_tracks(video_id)
+    if not tracks:
+        raise TranscriptUnavailableError(video_id)
+    transport.fetch_track(video_id, tracks[0])
+
+
+def benchmark_transcript_fetch(latency: float = 0.2, languages: List[str] = ["ja", "ja-JP", "en", "en-US"]) -> List[Dict[str, Any]]:
+    """字幕取得のリクエスト数と所要時間を、言語ごとの試行と一覧からの選択で比較（リクエストを数える擬似的な取得元を使用）"""
+    cases = {
+        "ja_manual": [{"language_code": "ja", "is_generated": False}],
+        "ja_generated_en_manual": [{"language_code": "ja", "is_generated": True}, {"language_code": "en", "is_generated": False}],
+        "en_generated_only": [{"language_code": "en", "is_generated": True}],
+        "ko_only": [{"language_code": "ko", "is_generated": True}],
+    }
+    work_dir = tempfile.mkdtemp()
+    try:
+        for video_id, tracks in cases.items():
+            with open(os.path.join(work_dir, f"{video_id}.json"), "w", encoding="utf-8") as f:
+                transcripts = [dict(track, chunks=create_synthetic_transcript(60)) for track in tracks]
+                json.dump({"transcripts": transcripts}, f, ensure_ascii=False)
+
+        results = []
+        for video_id in cases:
+            for method in ("per_language", "list_once"):
+                transport = CountingTranscriptTransport(LocalTranscriptTransport(work_dir), latency=latency)
+                started = time.perf_counter()
+                if method == "per_language":
+                    _fetch_transcript_per_language(transport, video_id, languages)
+                    selected = ""
+                else:
+                    result = TranscriptFetcher(transport).fetch(video_id, languages)
+                    selected = f"{result.language_code}{' (generated)' if result.is_generated else ''}"
+                elapsed = time.perf_counter() - started
+                results.append(
+                    {
+                        "case": video_id,
+                        "method": method,
+                        "list_requests": transport.list_requests,
+                        "fetch_requests": transport.fetch_requests,
+                        "seconds": round(elapsed, 2),
+                        "selected": selected,
+                    }
+                )
+        return results
+    finally:
+        cleanup_temp_directory(work_dir)
+
+
+def _legacy_transcript_result(transcript: ColumnarTranscript) -> Dict[str, Any]:
+    """従来の get_transcript と同じ、チャンクの辞書のリストと連結テキストの両方を含む結果"""
+    transcript_data = {
+        "transcript_chunks": transcript.to_dicts(),
+        "transcript_text": transcript.joined_text(),
+        "is_extracted": True,
+        "chunks_count": len(transcript),
+        "note": "transcript_chunksを使用してください（より正確なタイムスタンプ）",
+    }
+    return {"success": True, "message": f"字幕データを取得しました（{len(transcript)}チャンク）", "data": transcript_data}
+
+
+def benchmark_transcript_tokens(durations: List[float] = [600, 3600, 10800], page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """get_transcript の結果のトークン数を、従来の形式とコンパクトな形式（全ページの合計・1ページ目）で比較
+
+    ツールの結果は文字列化してモデルに渡されるため、従来の形式は結果の辞書を str() したものを数える。
+    """
+    results = []
+    for duration in durations:
+        transcript = ColumnarTranscript(create_synthetic_transcript(duration))
+        legacy_tokens = estimate_tokens(str(_legacy_transcript_result(transcript)))
+
+        page_tokens = []
+        page = 1
+        while True:
+            transcript_page = paginate_compact_transcript(transcript, page, page_size)
+            page_tokens.append(estimate_tokens("\n".join(transcript_page.items)))
+            if not transcript_page.has_next:
+                break
+            page += 1
+
+        results.append(
+            {
+                "duration": duration,
+                "chunks": len(transcript),
+                "legacy_tokens": legacy_tokens,
+                "compact_tokens": sum(page_tokens),
+                "first_page_tokens": page_tokens[0],
+                "pages": len(page_tokens),
+                "ratio": round(sum(page_tokens) / legacy_tokens, 3) if legacy_tokens else 0.0,
+                "tokenizer": transcript_compact.TOKEN_ENCODING if transcript_compact.tiktoken is not None else "estimate",
+            }
+        )
+    return results
+
+
+def create_synthetic_hls(output_dir: str, duration: float = 300, segment_duration: float = 2) -> str:
+    """合成テスト動画をHLS（VOD）に分割し、プレイリストのファイル名を返す"""
+    source_path = create_synthetic_video(os.path.join(output_dir, "source.mp4"), duration=duration)
+    playlist_name = "stream.m3u8"
+    ffmpeg.input(source_path).output(os.path.join(output_dir, playlist_name), c="copy", f="hls", hls_time=segment_duration, hls_playlist_type="vod").overwrite_output().run(
+        quiet=True
+    )
+    os.remove(source_path)
+    return playlist_name
+
+
+@contextmanager
+def serve_directory(directory: str, latency: float = 0.0) -> Iterator[str]:
+    """ディレクトリをローカルのHTTPサーバーで配信（latencyで1リクエストの遅延を模擬）し、ベースURLを返す"""
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def do_GET(self):
+            time.sleep(latency)
+            super().do_GET()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _download_row(label: str, result: YouTubeDownloadResult) -> Dict[str, Any]:
+    """ダウンロード結果を表の1行にする"""
+    stats = result.download_stats
+    return {
+        "profile": label,
+        "success": result.success,
+        "concurrent_fragments": stats.concurrent_fragments if stats else "",
+        "fragments": stats.fragment_count if stats else "",
+        "size_mb": round(stats.downloaded_bytes / 1024**2, 2) if stats else "",
+        "resumed_mb": round(stats.resumed_bytes / 1024**2, 2) if stats else "",
+        "seconds": stats.elapsed if stats else "",
+        "mb_per_s": round(stats.average_speed / 1024**2, 2) if stats else "",
+        "error": result.error or "",
+    }
+
+
+def benchmark_download_profiles(duration: float = 300, latency: float = 0.05, profiles: List[str] = ["default", "fast"]) -> List[Dict[str, Any]]:
+    """ローカルHTTPサーバーで配信した合成HLSを、ダウンロード設定ごとにダウンロードして比較（最後に中断・再開も計測）"""
+    served_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    try:
+        playlist_name = create_synthetic_hls(served_dir, duration=duration)
+        results = []
+        with serve_directory(served_dir, latency=latency) as base_url:
+            media_url = f"{base_url}/{playlist_name}"
+            for name in profiles:
+                result = download_media(media_url, os.path.join(output_dir, name), name=name, download_profile=name)
+                results.append(_download_row(name, result))
+
+            # 途中でキャンセルし、同じディレクトリで再開する
+            resume_profile = profiles[-1]
+            resume_dir = os.path.join(output_dir, "resume")
+            cancel_event = threading.Event()
+            timer = threading.Timer(max(0.1, (results[-1]["seconds"] or 1.0) / 2), cancel_event.set)
+            timer.start()
+            interrupted = download_media(media_url, resume_dir, name="resume", download_profile=resume_profile, cancel_event=cancel_event)
+            timer.cancel()
+            results.append(_download_row(f"{resume_profile} (interrupted)", interrupted))
+            results.append(_download_row(f"{resume_profile} (resumed)", download_media(media_url, resume_dir, name="resume", download_profile=resume_profile)))
+        return results
+    finally:
+        cleanup_temp_directory(served_dir)
+        cleanup_temp_directory(output_dir)
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    """結果を簡易テーブルとして表示"""
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    print(" | ".join(headers))
+    for row in rows:
+        print(" | ".join(str(row[h]) for h in headers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="動画処理ベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser("render", help="multi_pass と single_pass の比較")
+    render_parser.add_argument("--duration", type=float, default=300, help="合成ソース動画の長さ（秒）")
+    render_parser.add_argument("--segments", type=int, default=6, help="カットセグメント数")
+    render_parser.add_argument("--no-subtitles", action="store_true", help="字幕焼き込みを行わない")
+
+    profiles_parser = subparsers.add_parser("profiles", help="品質ごとのエンコード速度と出力サイズ")
+    profiles_parser.add_argument("--duration", type=float, default=120, help="合成ソース動画の長さ（秒）")
+    profiles_parser.add_argument("--segments", type=int, default=6, help="カットセグメント数")
+
+    subtitles_parser = subparsers.add_parser("subtitles", help="字幕チャンク切り出しの総当たりとインデックスの比較")
+    subtitles_parser.add_argument("--chunks", type=int, default=10000, help="合成字幕のチャンク数")
+    subtitles_parser.add_argument("--scenarios", type=int, default=10, help="企画案数")
+    subtitles_parser.add_argument("--segments", type=int, default=6, help="企画案あたりのカットセグメント数")
+
+    renderers_parser = subparsers.add_parser("subtitle-renderers", help="字幕焼き込みの libass と overlay の比較")
+    renderers_parser.add_argument("--duration", type=float, default=300, help="合成ソース動画の長さ（秒）")
+    renderers_parser.add_argument("--segments", type=int, default=6, help="カットセグメント数")
+    renderers_parser.add_argument("--quality", default="high", help="動画品質")
+
+    normalize_parser = subparsers.add_parser("normalize", help="字幕テキスト正規化の逐次置換とコンパイル済み正規化器の比較")
+    normalize_parser.add_argument("--chunks", type=int, default=10000, help="合成字幕のチャンク数")
+    normalize_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="置換辞書の語数")
+
+    transcripts_parser = subparsers.add_parser("transcripts", help="字幕取得のリクエスト数の比較（擬似的な取得元）")
+    transcripts_parser.add_argument("--latency", type=float, default=0.2, help="1リクエストあたりの模擬遅延（秒）")
+
+    tokens_parser = subparsers.add_parser("transcript-tokens", help="get_transcript の結果のトークン数の比較（従来形式とコンパクト形式）")
+    tokens_parser.add_argument("--durations", type=float, nargs="+", default=[600, 3600, 10800], help="合成字幕の長さ（秒）")
+    tokens_parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="1ページの行数")
+
+    downloads_parser = subparsers.add_parser("downloads", help="ダウンロード設定ごとの速度と中断・再開（ローカルHTTPサーバーの合成HLS）")
+    downloads_parser.add_argument("--duration", type=float, default=300, help="合成ソース動画の長さ（秒）")
+    downloads_parser.add_argument("--latency", type=float, default=0.05, help="1リクエストあたりの模擬遅延（秒）")
+    downloads_parser.add_argument("--profiles", nargs="+", default=["default", "fast"], choices=list(DOWNLOAD_PROFILES), help="比較するダウンロード設定")
+
+    args = parser.parse_args()
+
+    if args.command == "render":
+        print_table(benchmark_render_modes(duration=args.duration, num_segments=args.segments, with_subtitles=not args.no_subtitles))
+    elif args.command == "profiles":
+        print_table(benchmark_render_profiles(duration=args.duration, num_segments=args.segments))
+    elif args.command == "subtitles":
+        print_table(benchmark_subtitle_slicing(num_chunks=args.chunks, num_scenarios=args.scenarios, segments_per_scenario=args.segments))
+    elif args.command == "subtitle-renderers":
+        print_table(benchmark_subtitle_renderers(duration=args.duration, num_segments=args.segments, quality=args.quality))
+    elif args.command == "normalize":
+        print_table(benchmark_transcript_normalization(num_chunks=args.chunks, dictionary_sizes=args.sizes))
+    elif args.command == "transcripts":
+        print_table(benchmark_transcript_fetch(latency=args.latency))
+    elif args.command == "transcript-tokens":
+        print_table(benchmark_transcript_tokens(durations=args.durations, page_size=args.page_size))
+    elif args.command == "downloads":
+        print_table(benchmark_download_profiles(duration=args.duration, latency=args.latency, profiles=args.profiles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""字幕チャンクの列指向の格納形式
+
+チャンクごとの辞書の代わりに、開始時刻・長さを array('d')、テキストを連結した文字列とオフセットで保持する。
+長時間の動画でもチャンク数に比例するPythonオブジェクトを作らず、時間範囲での切り出しと辞書形式への変換を提供する。
+"""
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+CHUNK_KEYS = ("text", "start", "duration")
+
+
+class TranscriptChunkView(Mapping):
+    """ColumnarTranscript の1チャンクを辞書のように参照するビュー（値はアクセス時に取り出す）"""
+
+    __slots__ = ("_transcript", "_index")
+
+    def __init__(self, transcript: "ColumnarTranscript", index: int):
+        self._transcript = transcript
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "text":
+            return self._transcript.text_at(self._index)
+        if key == "start":
+            return self._transcript.starts[self._index]
+        if key == "duration":
+            return self._transcript.durations[self._index]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(CHUNK_KEYS)
+
+    def __len__(self) -> int:
+        return len(CHUNK_KEYS)
+
+    @property
+    def text(self) -> str:
+        return self._transcript.text_at(self._index)
+
+    @property
+    def start(self) -> float:
+        return self._transcript.starts[self._index]
+
+    @property
+    def duration(self) -> float:
+        return self._transcript.durations[self._index]
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def __repr__(self) -> str:
+        return f"TranscriptChunkView({dict(self)!r})"
+
+
+class ColumnarTranscript(Sequence):
+    """字幕チャンク（text/start/duration）の列指向コンテナ
+
+    要素の取得・反復では TranscriptChunkView を返すため、chunk.get("text") などの辞書としての参照はそのまま使える。
+    JSON出力やエージェントへの受け渡しには to_dicts() で従来の辞書のリストに変換する。
+    """
+
+    def __init__(self, chunks: Optional[Iterable[Dict[str, Any]]] = None):
+        self.starts = array("d")
+        self.durations = array("d")
+        self._offsets = array("q", [0])
+        # テキストは連結した区間の文字列と各区間の開始オフセットで保持する（連結済みの文字列に追記し直さない）
+        self._segments: List[str] = []
+        self._segment_offsets = array("q")
+        self._pending_texts: List[str] = []  # append() されたテキスト（参照時にまとめて1つの区間に連結する）
+        self._is_sorted = True
+        self._max_duration = 0.0
+        for chunk in chunks or []:
+            self.append(chunk)
+        self._flush_texts()
+
+    @classmethod
+    def from_chunks(cls, chunks: Union["ColumnarTranscript", Iterable[Dict[str, Any]], None]) -> "ColumnarTranscript":
+        """辞書（またはTranscriptChunk）のリストから作成（ColumnarTranscriptはそのまま返す）"""
+        if isinstance(chunks, ColumnarTranscript):
+            return chunks
+        return cls(chunks)
+
+    def append(self, chunk: Any) -> None:
+        """チャンクを末尾に追加"""
+        if isinstance(chunk, Mapping):
+            text, start, duration = chunk.get("text", ""), chunk.get("start", 0), chunk.get("duration", 0)
+        else:
+            text, start, duration = chunk.text, chunk.start, chunk.duration
+        start, duration, text = float(start), float(duration), str(text)
+        if self.starts and start < self.starts[-1]:
+            self._is_sorted = False
+        self.starts.append(start)
+        self.durations.append(duration)
+        self._max_duration = max(self._max_duration, duration)
+        self._offsets.append(self._offsets[-1] + len(text))
+        self._pending_texts.append(text)
+
+    def _flush_texts(self) -> None:
+        if self._pending_texts:
+            text = "".join(self._pending_texts)
+            if text:
+                self._segment_offsets.append(self._offsets[len(self) - len(self._pending_texts)])
+                self._segments.append(text)
+            self._pending_texts = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text_at(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        if start == end:
+            return ""
+        self._flush_texts()
+        # チャンクのテキストは1回の append でまとめて追加されるため、必ず1つの区間に収まる
+        segment = bisect_right(self._segment_offsets, start) - 1
+        segment_start = self._segment_offsets[segment]
+        return self._segments[segment][start - segment_start : end - segment_start]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return TranscriptChunkView(self, index)
+
+    def __iter__(self) -> Iterator[TranscriptChunkView]:
+        return (TranscriptChunkView(self, index) for index in range(len(self)))
+
+    def take(self, indices: Iterable[int]) -> "ColumnarTranscript":
+        """指定したインデックスのチャンクからなる新しいコンテナ"""
+        result = ColumnarTranscript()
+        for index in indices:
+            text = self.text_at(index)
+            if result.starts and self.starts[index] < result.starts[-1]:
+                result._is_sorted = False
+            result.starts.append(self.starts[index])
+            result.durations.append(self.durations[index])
+            result._max_duration = max(result._max_duration, self.durations[index])
+            result._offsets.append(result._offsets[-1] + len(text))
+            result._pending_texts.append(text)
+        result._flush_texts()
+        return result
+
+    def overlapping_indices(self, start_time: float, end_time: float) -> List[int]:
+        """範囲 [start_time, end_time) と部分的にでも重なるチャンクのインデックス"""
+        if self._is_sorted:
+            # 開始時刻順なら、重なりうるのは「start_time - 最大の長さ」以降に始まり end_time より前に始まるチャンクのみ
+            lo = bisect_left(self.starts, start_time - self._max_duration)
+            hi = bisect_left(self.starts, end_time)
+            candidates = range(lo, hi)
+        else:
+            candidates = range(len(self))
+        return [i for i in candidates if self.starts[i] < end_time and self.starts[i] + self.durations[i] > start_time]
+
+    def slice_time(self, start_time: float, end_time: float) -> "ColumnarTranscript":
+        """範囲 [start_time, end_time) と重なるチャンクを切り出す"""
+        return self.take(self.overlapping_indices(start_time, end_time))
+
+    def joined_text(self, separator: str = " ") -> str:
+        """全チャンクのテキストを区切り文字で連結"""
+        return separator.join(self.text_at(index) for index in range(len(self)))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """従来の辞書形式（text/start/duration）のリストに変換"""
+        return [{"text": self.text_at(i), "start": self.starts[i], "duration": self.durations[i]} for i in range(len(self))]
+
+    def nbytes(self) -> int:
+        """保持しているデータのおおよそのメモリ使用量（バイト）"""
+        self._flush_texts()
+        text_bytes = sum(sys.getsizeof(text) for text in self._segments)
+        return text_bytes + sum(values.itemsize * len(values) for values in (self.starts, self.durations, self._offsets, self._segment_offsets))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ColumnarTranscript):
+            return self.to_dicts() == other.to_dicts()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ColumnarTranscript(chunks={len(self)})"
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""元動画ダウンロードの設定（並列フラグメント取得・再開・帯域制限）"""
+
+import re
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+
+_RATE_LIMIT = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*$", re.IGNORECASE)
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_rate_limit(rate_limit: str) -> int:
+    """帯域制限の指定（"500K", "2M", "1.5MB/s" など）をバイト/秒に変換
+
+    Raises:
+        ValueError: 形式が正しくない場合
+    """
+    match = _RATE_LIMIT.match(rate_limit)
+    if not match:
+        raise ValueError(f"帯域制限の形式が正しくありません: {rate_limit}")
+    return int(float(match.group(1)) * _RATE_UNITS[match.group(2).upper()])
+
+
+class DownloadProfile(BaseModel):
+    """yt-dlpのダウンロード設定（出力内容には影響しないため、元動画ストアのキーには含めない）"""
+
+    name: str
+    concurrent_fragments: int = 1  # HLS/DASHのフラグメントを同時に取得する数
+    http_chunk_size: Optional[int] = None  # 単一ファイルをRangeリクエストで分割取得する場合のサイズ（バイト）
+    rate_limit: Optional[str] = None  # 帯域制限（"2M" など、Noneは無制限）
+    resume: bool = True  # 中断した .part ファイルから再開するかどうか
+    retries: int = 10
+    fragment_retries: int = 10
+    verbose: bool = False
+
+    def ydl_options(self) -> Dict[str, Any]:
+        """yt-dlpのオプション"""
+        options: Dict[str, Any] = {
+            "concurrent_fragment_downloads": self.concurrent_fragments,
+            "continuedl": self.resume,
+            "nopart": False,  # 再開できるよう .part に書き込み、完了時にリネームする
+            "retries": self.retries,
+            "fragment_retries": self.fragment_retries,
+            "verbose": self.verbose,
+        }
+        if self.http_chunk_size:
+            options["http_chunk_size"] = self.http_chunk_size
+        if self.rate_limit:
+            options["ratelimit"] = parse_rate_limit(self.rate_limit)
+        return options
+
+
+DOWNLOAD_PROFILES: Dict[str, DownloadProfile] = {
+    # 従来の設定（1ストリームずつ取得、詳細ログあり）
+    "default": DownloadProfile(name="default", concurrent_fragments=1, verbose=True),
+    # 長時間のアーカイブ向け（フラグメントを並列取得、単一ファイルも10MBごとに取得して中断時の再取得を減らす）
+    "fast": DownloadProfile(name="fast", concurrent_fragments=8, http_chunk_size=10 * 1024**2),
+    # 共有回線向け（並列数を抑えて帯域を制限）
+    "throttled": DownloadProfile(name="throttled", concurrent_fragments=2, http_chunk_size=10 * 1024**2, rate_limit="2M"),
+}
+
+
+def get_download_profile(name: str, rate_limit: Optional[str] = None) -> DownloadProfile:
+    """名前からダウンロード設定を取得（rate_limitを指定した場合はプロファイルの帯域制限を上書き）
+
+    Raises:
+        ValueError: 未定義の名前または帯域制限の形式が正しくない場合
+    """
+    if name not in DOWNLOAD_PROFILES:
+        raise ValueError(f"サポートされていないダウンロード設定: {name}")
+    profile = DOWNLOAD_PROFILES[name]
+    if rate_limit:
+        parse_rate_limit(rate_limit)
+        profile = profile.copy(update={"rate_limit": rate_limit})
+    return profile
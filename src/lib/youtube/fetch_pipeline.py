@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""動画情報・字幕・動画ファイルの並行取得
+
+動画情報とダウンロード（1つのyt-dlpセッション）と字幕の取得を別スレッドで同時に実行し、各段階の結果を完了した順に返す。
+動画情報はダウンロードの完了を待たずに返すため、ダウンロード中に字幕を使った処理を始められる。
+動画情報を取得できなかった場合（URLの誤り・非公開など）は、実行中の他の段階をキャンセルする。
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from src.lib.youtube.transcript_extraction import extract_youtube_transcript, get_processed_transcript
+from src.lib.youtube.youtube_download import extract_video_id_from_url, fetch_youtube_video
+
+FETCH_STAGES = ("metadata", "transcript", "media")
+
+CANCELLED_ERROR = "キャンセルされました"
+
+
+class FetchStageResult(BaseModel):
+    """1つの段階の結果"""
+
+    stage: str  # "metadata" / "transcript" / "media"
+    success: bool
+    elapsed: float = 0.0  # 取得開始から完了までの秒数
+    result: Any = None  # metadata: VideoInfo / transcript: 字幕の辞書 / media: YouTubeDownloadResult
+    error: Optional[str] = None
+    cancelled: bool = False
+
+
+class FetchPipelineResult(BaseModel):
+    """全段階の結果"""
+
+    video_id: str = ""
+    stages: Dict[str, FetchStageResult] = Field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return bool(self.stages) and all(stage.success for stage in self.stages.values())
+
+    def timings(self) -> Dict[str, float]:
+        """段階ごとの完了までの秒数"""
+        return {name: round(stage.elapsed, 3) for name, stage in self.stages.items()}
+
+
+def iter_youtube_sources(
+    video_url: str,
+    download_video: bool = True,
+    include_audio: bool = False,
+    video_quality: str = "720p",
+    cookies: Optional[str] = None,
+    download_profile: Optional[str] = None,
+    languages: Optional[List[str]] = None,
+    process_transcript: bool = True,
+    cancel_event: Optional[threading.Event] = None,
+) -> Iterator[FetchStageResult]:
+    """動画情報・字幕・動画ファイルを並行して取得し、完了した段階から順に返す
+
+    ダウンロードしない場合は "media" 段階は返さない（"metadata" と "transcript" のみ）。
+    途中でイテレーターを閉じた場合は、実行中の段階をキャンセルして終了を待つ。
+
+    Args:
+        video_url: YouTube動画のURL
+        download_video: 動画をダウンロードするかどうか
+        include_audio: 音声ファイル（mp3）も作成するかどうか
+        video_quality: 動画品質（720p, 1080p等）
+        cookies: YouTubeのCookies
+        download_profile: ダウンロード設定の名前（未指定時は設定の DOWNLOAD_PROFILE）
+        languages: 字幕言語の優先順位リスト（未指定時は extract_youtube_transcript の既定値）
+        process_transcript: 字幕を文単位に整形・修正したものも取得するかどうか
+        cancel_event: セットすると実行中の段階をキャンセルする
+
+    Returns:
+        FetchStageResult のイテレーター
+    """
+    cancel_event = cancel_event or threading.Event()
+    events: "queue.Queue[FetchStageResult]" = queue.Queue()
+    emitted = set()
+    emitted_lock = threading.Lock()
+    started = time.monotonic()
+    video_id = extract_video_id_from_url(video_url)
+    should_download = download_video or include_audio
+    stages = [stage for stage in FETCH_STAGES if stage != "media" or should_download]
+
+    def emit(stage: str, success: bool, result: Any = None, error: Optional[str] = None, cancelled: bool = False):
+        with emitted_lock:
+            if stage in emitted:
+                return
+            emitted.add(stage)
+        if not success and stage == "metadata":
+            # 動画を利用できないため、他の段階も中断する
+            cancel_event.set()
+        events.put(FetchStageResult(stage=stage, success=success, elapsed=time.monotonic() - started, result=result, error=error, cancelled=cancelled))
+
+    def run_media():
+        result = fetch_youtube_video(
+            video_url,
+            download_video=download_video,
+            include_audio=include_audio,
+            video_quality=video_quality,
+            cookies=cookies,
+            download_profile=download_profile,
+            on_metadata=lambda video_info: emit("metadata", True, video_info),
+            cancel_event=cancel_event,
+        )
+        cancelled = not result.success and cancel_event.is_set()
+        emit("metadata", False, error=result.error, cancelled=cancelled)  # 動画情報の取得前に失敗した場合のみ有効
+        if should_download:
+            emit("media", result.success, result, result.error, cancelled=cancelled)
+
+    def run_transcript():
+        if cancel_event.is_set():
+            emit("transcript", False, error=CANCELLED_ERROR, cancelled=True)
+            return
+        transcript_result = extract_youtube_transcript(video_id, languages) if languages else extract_youtube_transcript(video_id)
+        if not transcript_result["success"]:
+            emit("transcript", False, transcript_result, transcript_result.get("error"))
+            return
+        if process_transcript:
+            if cancel_event.is_set():
+                emit("transcript", False, error=CANCELLED_ERROR, cancelled=True)
+                return
+            transcript_result["processed_transcript"] = get_processed_transcript(transcript_result)
+        emit("transcript", True, transcript_result)
+
+    def run_stage(stage_names: List[str], target: Callable[[], None]):
+        try:
+            target()
+        except Exception as e:
+            for stage in stage_names:
+                emit(stage, False, error=f"{stage}の取得エラー: {str(e)}")
+
+    if not video_id:
+        for stage in stages:
+            emit(stage, False, error="無効なYouTube URLです")
+        while not events.empty():
+            yield events.get()
+        return
+
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="youtube_fetch")
+    remaining = len(stages)
+    try:
+        executor.submit(run_stage, ["metadata", "media"], run_media)
+        executor.submit(run_stage, ["transcript"], run_transcript)
+        while remaining:
+            event = events.get()
+            remaining -= 1
+            print(f"DEBUG: 取得段階の完了 - {event.stage} ({event.elapsed:.2f}秒, 成功: {event.success})")
+            yield event
+    finally:
+        if remaining:
+            cancel_event.set()
+        executor.shutdown(wait=True)
+
+
+def fetch_youtube_sources(
+    video_url: str,
+    on_stage: Optional[Callable[[FetchStageResult], None]] = None,
+    **kwargs,
+) -> FetchPipelineResult:
+    """iter_youtube_sources の全段階の完了を待って結果をまとめる（on_stageは各段階の完了時に呼び出す）"""
+    started = time.monotonic()
+    result = FetchPipelineResult(video_id=extract_video_id_from_url(video_url))
+    for stage_result in iter_youtube_sources(video_url, **kwargs):
+        result.stages[stage_result.stage] = stage_result
+        if on_stage is not None:
+            on_stage(stage_result)
+    result.elapsed = time.monotonic() - started
+    return result
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""ffmpegの -progress 出力による進捗取得"""
+
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import ffmpeg
+from pydantic import BaseModel
+
+# エラー表示用に保持するstderrの末尾の行数
+STDERR_TAIL_LINES = 200
+
+
+class EncodeProgress(BaseModel):
+    """ffmpegが -progress で出力する1ブロック分の進捗"""
+
+    out_time: float = 0.0  # 出力済みの長さ（秒）
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0  # 実時間に対する倍速
+    done: bool = False
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return 0.0  # "N/A" など
+
+
+def parse_progress_block(values: Dict[str, str]) -> EncodeProgress:
+    """-progress のキー/値の組から進捗を作成"""
+    out_time_us = values.get("out_time_us") or values.get("out_time_ms")  # out_time_msも実際はマイクロ秒
+    return EncodeProgress(
+        out_time=max(0.0, _parse_float(out_time_us) / 1_000_000) if out_time_us else 0.0,
+        frame=int(_parse_float(values.get("frame", "0"))),
+        fps=_parse_float(values.get("fps", "0")),
+        speed=_parse_float(values.get("speed", "0")),
+        done=values.get("progress") == "end",
+    )
+
+
+def run_ffmpeg(stream_spec, on_progress: Optional[Callable[[EncodeProgress], None]] = None) -> EncodeProgress:
+    """ffmpeg-pythonのストリーム定義を実行し、進捗ブロックごとに on_progress を呼び出す
+
+    stdoutに -progress を出力させて逐次読み取り、stderrは別スレッドで読み捨てる（パイプ詰まり防止）。
+    on_progress が例外（キャンセルなど）を送出した場合は、ffmpegを終了させてから例外をそのまま送出する。
+
+    Returns:
+        最後の進捗（エンコード速度の集計用）
+
+    Raises:
+        ffmpeg.Error: ffmpegが異常終了した場合（stderrの末尾を含む）
+    """
+    args = ffmpeg.compile(stream_spec)
+    args = args[:1] + ["-progress", "pipe:1", "-nostats"] + args[1:]
+
+    process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr_tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+    stderr_thread = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+    stderr_thread.start()
+
+    last_progress = EncodeProgress()
+    values: Dict[str, str] = {}
+    try:
+        for raw_line in process.stdout:
+            key, _, value = raw_line.decode("utf-8", errors="ignore").strip().partition("=")
+            if not key:
+                continue
+            values[key] = value
+            if key == "progress":
+                last_progress = parse_progress_block(values)
+                values = {}
+                if on_progress:
+                    on_progress(last_progress)
+    except BaseException:
+        # 呼び出し元は出力先や入力の中間ファイルを削除しうるため、ffmpegを残さずに終了を待つ
+        process.kill()
+        process.wait()
+        stderr_thread.join()
+        raise
+
+    process.wait()
+    stderr_thread.join()
+    if process.returncode != 0:
+        raise ffmpeg.Error("ffmpeg", b"", b"".join(stderr_tail))
+    return last_progress
+
+
+class EncodeCancelled(Exception):
+    """進捗の通知先が例外（ジョブのキャンセルなど）で中断したため、実行中のエンコードを中止した"""
+
+
+class ProgressTracker:
+    """複数のffmpegパスの進捗を重み付きで合算し、全体の進捗率と残り時間を求める
+
+    各ステージの重みは処理する動画の長さ（秒）など、処理時間に比例する値を使う。
+    update() はワーカースレッドから呼ばれてもよいが、progress_callback/event_callback は flush() を呼んだスレッドからのみ実行する
+    （Streamlitの要素はワーカースレッドから更新できないため）。
+    コールバックが例外を送出した場合（キャンセル要求など）は中止状態になり、stage_callback() を渡した実行中のffmpegも
+    次の進捗の通知で EncodeCancelled を送出して終了する。
+    """
+
+    def __init__(
+        self,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        event_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        start: float = 0.0,
+        end: float = 1.0,
+    ):
+        self.progress_callback = progress_callback
+        self.event_callback = event_callback
+        self.start = start
+        self.end = end
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._events: List[Dict[str, Any]] = []
+        self._message = ""
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """中止状態にする（以降、stage_callback() のコールバックは EncodeCancelled を送出する）"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def add_stage(self, name: str, weight: float, duration: float = 0.0, label: str = "") -> None:
+        """ステージを登録（duration は出力される動画の長さで、out_time から達成率を求めるのに使う）"""
+        with self._lock:
+            self._stages[name] = {
+                "weight": max(float(weight), 0.0),
+                "duration": float(duration),
+                "label": label or name,
+                "fraction": 0.0,
+                "started_at": None,
+                "elapsed": 0.0,
+                "fps": 0.0,
+                "speed": 0.0,
+                "frames": 0,
+                "out_time": 0.0,
+            }
+
+    def stage_callback(self, name: str) -> Callable[[EncodeProgress], None]:
+        """run_ffmpeg の on_progress に渡すコールバックを作成（中止状態ではffmpegを終了させる）"""
+
+        def on_progress(progress: EncodeProgress) -> None:
+            if self._cancelled.is_set():
+                raise EncodeCancelled(name)
+            self.update(name, progress)
+
+        return on_progress
+
+    def update(self, name: str, progress: EncodeProgress) -> None:
+        """ステージの進捗を更新"""
+        with self._lock:
+            stage = self._stages[name]
+            now = time.monotonic()
+            if stage["started_at"] is None:
+                stage["started_at"] = now
+            stage["elapsed"] = now - stage["started_at"]
+            if progress.done:
+                stage["fraction"] = 1.0
+            elif stage["duration"] > 0:
+                stage["fraction"] = min(progress.out_time / stage["duration"], 1.0)
+            # 最終ブロックは fps/speed が N/A になることがあるため、値がある場合のみ更新する
+            if progress.fps > 0:
+                stage["fps"] = progress.fps
+            if progress.speed > 0:
+                stage["speed"] = progress.speed
+            stage["frames"] = max(stage["frames"], progress.frame)
+            stage["out_time"] = max(stage["out_time"], progress.out_time)
+            self._message = stage["label"]
+            self._events.append(
+                {
+                    "type": "progress",
+                    "stage": name,
+                    "out_time": round(progress.out_time, 3),
+                    "fps": progress.fps,
+                    "speed": progress.speed,
+                    "stage_progress": round(stage["fraction"], 4),
+                    "overall": round(self._overall_locked(), 4),
+                    "eta": self._eta_locked(),
+                }
+            )
+            if progress.done:
+                self._events.append(self._stage_end_event_locked(name))
+
+    def complete_stage(self, name: str, cached: bool = False) -> None:
+        """ffmpegを実行せずに終わったステージ（キャッシュヒットなど）を完了にする"""
+        with self._lock:
+            stage = self._stages[name]
+            stage["fraction"] = 1.0
+            if stage["started_at"] is not None:
+                stage["elapsed"] = time.monotonic() - stage["started_at"]
+            event = self._stage_end_event_locked(name)
+            event["cached"] = cached
+            self._events.append(event)
+
+    def skip_stages(self, prefix: str) -> None:
+        """名前が prefix で始まるステージを、実行しなかったものとして完了にする"""
+        with self._lock:
+            for name, stage in self._stages.items():
+                if name.startswith(prefix):
+                    stage["fraction"] = 1.0
+
+    def set_message(self, message: str) -> None:
+        with self._lock:
+            self._message = message
+
+    def _overall_locked(self) -> float:
+        total_weight = sum(stage["weight"] for stage in self._stages.values())
+        if total_weight <= 0:
+            return 0.0
+        return sum(stage["weight"] * stage["fraction"] for stage in self._stages.values()) / total_weight
+
+    def _eta_locked(self) -> Optional[float]:
+        overall = self._overall_locked()
+        if overall <= 0:
+            return None
+        elapsed = time.monotonic() - self._started_at
+        return round(elapsed * (1 - overall) / overall, 1)
+
+    def _stage_end_event_locked(self, name: str) -> Dict[str, Any]:
+        stage = self._stages[name]
+        return {
+            "type": "stage_end",
+            "stage": name,
+            "elapsed": round(stage["elapsed"], 3),
+            "fps": stage["fps"],
+            "speed": stage["speed"],
+            "frames": stage["frames"],
+        }
+
+    def overall(self) -> float:
+        """全体の進捗率（start〜end の範囲）"""
+        with self._lock:
+            return self.start + (self.end - self.start) * self._overall_locked()
+
+    def flush(self) -> None:
+        """溜まったイベントと最新の進捗をコールバックへ通知（呼び出し元スレッドで実行）"""
+        with self._lock:
+            events, self._events = self._events, []
+            overall = self.start + (self.end - self.start) * self._overall_locked()
+            eta = self._eta_locked()
+            message = self._message
+
+        try:
+            if self.event_callback:
+                for event in events:
+                    self.event_callback(event)
+            if self.progress_callback and (events or message):
+                suffix = f" (残り約{int(eta)}秒)" if eta is not None and overall < self.end else ""
+                self.progress_callback(f"{message}{suffix}", overall)
+        except BaseException:
+            # 他のスレッドで実行中のエンコードも止める
+            self.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """ステージごとの処理時間・エンコード速度と全体の経過時間"""
+        with self._lock:
+            return {
+                "elapsed": round(time.monotonic() - self._started_at, 3),
+                "stages": {
+                    name: {
+                        "elapsed": round(stage["elapsed"], 3),
+                        "fps": stage["fps"],
+                        "speed": stage["speed"],
+                        "frames": stage["frames"],
+                        # 出力した動画の長さ / 処理時間（ステージ全体の平均倍速）
+                        "avg_speed": round(stage["out_time"] / stage["elapsed"], 2) if stage["elapsed"] > 0 else 0.0,
+                    }
+                    for name, stage in self._stages.items()
+                },
+            }
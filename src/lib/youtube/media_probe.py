@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""動画ファイルのメタデータ取得（ffprobe結果のキャッシュ付き）"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Tuple
+
+import ffmpeg
+from pydantic import BaseModel, Field
+
+# プロセス内キャッシュの最大件数
+MEDIA_CACHE_SIZE = 128
+
+# サイドカーJSONの拡張子（元ファイルと同じディレクトリに保存）
+SIDECAR_SUFFIX = ".probe.json"
+
+
+class MediaMetadata(BaseModel):
+    """ffprobeから取得した動画ファイルのメタデータ"""
+
+    path: str
+    size: int = 0
+    mtime_ns: int = 0
+    duration: float = 0.0
+    bit_rate: int = 0
+    format_name: str = ""
+    streams: List[Dict[str, Any]] = Field(default_factory=list)
+    has_video: bool = False
+    has_audio: bool = False
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    video_codec: str = ""
+    pix_fmt: str = ""
+    audio_codec: str = ""
+    sample_rate: int = 0
+    channels: int = 0
+    keyframes: Optional[List[float]] = None  # with_keyframes=True で取得した場合のみ
+
+    def to_video_info(self) -> Dict[str, Any]:
+        """get_video_info 互換の辞書に変換"""
+        info: Dict[str, Any] = {"duration": self.duration, "size": self.size, "bitrate": self.bit_rate}
+        if self.has_video:
+            info.update({"width": self.width, "height": self.height, "fps": self.fps, "video_codec": self.video_codec})
+        if self.has_audio:
+            info.update({"audio_codec": self.audio_codec, "sample_rate": self.sample_rate, "channels": self.channels})
+        return info
+
+
+_cache: "OrderedDict[Tuple[str, int, int], MediaMetadata]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_frame_rate(rate: str) -> float:
+    """フレームレート（"30000/1001" 形式）を数値に変換"""
+    try:
+        value = Fraction(rate)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+    return float(value)
+
+
+def _build_metadata(path: str, size: int, mtime_ns: int, probe: Dict[str, Any]) -> MediaMetadata:
+    """ffprobeの結果から型付きメタデータを作成"""
+    streams = probe.get("streams", [])
+    fmt = probe.get("format", {})
+    video_stream = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    audio_stream = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+
+    metadata = MediaMetadata(
+        path=path,
+        size=size,
+        mtime_ns=mtime_ns,
+        duration=float(fmt.get("duration", 0) or 0),
+        bit_rate=int(fmt.get("bit_rate", 0) or 0),
+        format_name=fmt.get("format_name", ""),
+        streams=streams,
+        has_video=video_stream is not None,
+        has_audio=audio_stream is not None,
+    )
+    if video_stream:
+        metadata.width = int(video_stream.get("width", 0))
+        metadata.height = int(video_stream.get("height", 0))
+        metadata.fps = parse_frame_rate(video_stream.get("r_frame_rate", "0/1"))
+        metadata.video_codec = video_stream.get("codec_name", "")
+        metadata.pix_fmt = video_stream.get("pix_fmt", "")
+    if audio_stream:
+        metadata.audio_codec = audio_stream.get("codec_name", "")
+        metadata.sample_rate = int(audio_stream.get("sample_rate", 0))
+        metadata.channels = int(audio_stream.get("channels", 0))
+    return metadata
+
+
+def _probe_keyframes(path: str) -> List[float]:
+    """映像ストリームのキーフレーム位置（秒）を取得"""
+    probe = ffmpeg.probe(path, select_streams="v:0", skip_frame="nokey", show_entries="frame=pts_time")
+    return sorted(float(frame["pts_time"]) for frame in probe.get("frames", []) if frame.get("pts_time") not in (None, "N/A"))
+
+
+def _read_sidecar(path: str, size: int, mtime_ns: int) -> Optional[MediaMetadata]:
+    sidecar_path = path + SIDECAR_SUFFIX
+    try:
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        metadata = MediaMetadata(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+    # 元ファイルが更新されていたら無効
+    if metadata.size != size or metadata.mtime_ns != mtime_ns:
+        return None
+    return metadata
+
+
+def _write_sidecar(path: str, metadata: MediaMetadata) -> None:
+    sidecar_path = path + SIDECAR_SUFFIX
+    temp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata.dict(), f, ensure_ascii=False)
+        os.replace(temp_path, sidecar_path)
+    except OSError as e:
+        print(f"DEBUG: メタデータのサイドカー保存エラー: {e}")
+
+
+def probe_media(path: str, with_keyframes: bool = False, use_sidecar: bool = False) -> MediaMetadata:
+    """動画ファイルのメタデータを取得する
+
+    (パス, 更新時刻, サイズ) をキーにプロセス内LRUでキャッシュするため、同じファイルに対するffprobeは1回だけ実行される。
+
+    Args:
+        path: 動画ファイルのパス
+        with_keyframes: キーフレーム位置も取得するかどうか（全フレームを走査するため重い）
+        use_sidecar: 元ファイルの隣にJSONを保存し、プロセスをまたいで再利用するかどうか
+
+    Raises:
+        ffmpeg.Error: ffprobeが失敗した場合
+        OSError: ファイルが存在しない場合
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        metadata = _cache.get(key)
+        if metadata is not None:
+            _cache.move_to_end(key)
+
+    if metadata is None and use_sidecar:
+        metadata = _read_sidecar(path, stat.st_size, stat.st_mtime_ns)
+
+    updated = False
+    if metadata is None:
+        metadata = _build_metadata(path, stat.st_size, stat.st_mtime_ns, ffmpeg.probe(path))
+        updated = True
+
+    if with_keyframes and metadata.keyframes is None:
+        metadata.keyframes = _probe_keyframes(path) if metadata.has_video else []
+        updated = True
+
+    with _cache_lock:
+        _cache[key] = metadata
+        _cache.move_to_end(key)
+        while len(_cache) > MEDIA_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    if use_sidecar and updated:
+        _write_sidecar(path, metadata)
+
+    return metadata
+
+
+def get_media_duration(path: str) -> float:
+    """動画ファイルの長さ（秒）を取得"""
+    return probe_media(path).duration
+
+
+def clear_media_cache() -> None:
+    """プロセス内キャッシュをクリア"""
+    with _cache_lock:
+        _cache.clear()
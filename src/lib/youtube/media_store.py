@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""ダウンロードした元動画の共有ストア（動画ID・フォーマット指定ごとに重複排除）
+
+{store_dir}/{video_id}/{フォーマット指定のハッシュ}/ に動画・音声と manifest.json を置く。ダウンロードは一時ディレクトリで行い、
+完了後にディレクトリごと配置するため、途中で中断したファイルを参照することはない。
+利用中のContextから参照されているエントリは、サイズ上限によるLRUの削除対象から除く（参照は一定期間更新されなければ失効する）。
+元動画の一部の時刻範囲だけをダウンロードしたクリップも、範囲ごとに1つのエントリとして保存する。
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.setting import env_setting
+
+MANIFEST_NAME = "manifest.json"
+STAGING_DIR_NAME = ".staging"
+
+# 中断したダウンロードの作業ディレクトリを再開用に残す期間（秒）
+STAGING_MAX_AGE = 7 * 24 * 3600
+
+# acquire() した参照の既定の有効期間（秒）
+REFERENCE_TTL = 6 * 3600
+
+
+class MediaEntry(BaseModel):
+    """ストアに保存された元動画"""
+
+    key: str
+    video_id: str
+    format_selector: str
+    video_path: Optional[str] = None
+    audio_path: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)  # VideoInfo と同じ形式の動画情報
+    size: int = 0
+    created_at: float = 0.0
+    clip_start: Optional[float] = None  # 一部の時刻範囲のみのクリップの場合、元動画での開始時刻（秒）
+    clip_end: Optional[float] = None
+
+    @property
+    def is_clip(self) -> bool:
+        return self.clip_start is not None
+
+    def covers(self, start_time: float, end_time: float) -> bool:
+        """元動画の範囲 [start_time, end_time] の映像を含むかどうか（全体のダウンロードは常に含む）"""
+        if not self.video_path:
+            return False
+        return not self.is_clip or (self.clip_start <= start_time and end_time <= self.clip_end)
+
+
+class MediaStore:
+    """元動画の共有ストア（サイズ上限付きLRU）
+
+    キーは動画IDとyt-dlpのフォーマット指定から作成する。LRUの順序は manifest.json の更新時刻で管理し、参照時に更新する。
+    参照カウントはプロセス内で管理し、acquire() したエントリは release() されるか、reference_ttl 秒の間 acquire() で
+    更新されなくなるまで削除しない（release() されずに終了したStreamlitのセッションの参照が残り続けないようにする）。
+    """
+
+    def __init__(self, store_dir: str, max_bytes: int, reference_ttl: float = REFERENCE_TTL):
+        self.store_dir = os.path.abspath(store_dir)
+        self.max_bytes = max_bytes
+        self.reference_ttl = reference_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._references: Dict[str, Dict[str, float]] = {}  # キー → owner → 最後に acquire() した時刻（time.monotonic()）
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def make_key(self, video_id: str, format_selector: str, clip_range: Optional[Tuple[float, float]] = None) -> str:
+        """キーを作成（{video_id}/{フォーマット指定とクリップの範囲のハッシュ}）"""
+        safe_video_id = re.sub(r"[^A-Za-z0-9_-]", "_", video_id)
+        identity = format_selector if clip_range is None else f"{format_selector}@{clip_range[0]:.3f}-{clip_range[1]:.3f}"
+        return f"{safe_video_id}/{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]}"
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.store_dir, *key.split("/"))
+
+    def _read_entry(self, entry_dir: str) -> Optional[MediaEntry]:
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: 動画ストアのmanifest読み込みエラー ({entry_dir}): {e}")
+            return None
+
+        entry = MediaEntry(**manifest)
+        # manifestにはファイル名のみを保存し、読み込み時にストア内のパスにする
+        entry.video_path = os.path.join(entry_dir, entry.video_path) if entry.video_path else None
+        entry.audio_path = os.path.join(entry_dir, entry.audio_path) if entry.audio_path else None
+        if any(path and not os.path.exists(path) for path in (entry.video_path, entry.audio_path)):
+            return None
+        return entry
+
+    def _write_manifest(self, entry_dir: str, entry: MediaEntry) -> None:
+        manifest = entry.dict()
+        manifest["video_path"] = os.path.basename(entry.video_path) if entry.video_path else None
+        manifest["audio_path"] = os.path.basename(entry.audio_path) if entry.audio_path else None
+        path = os.path.join(entry_dir, MANIFEST_NAME)
+        # 同一ディレクトリ内の一時ファイルを経由して原子的に配置する
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def get(self, key: str) -> Optional[MediaEntry]:
+        """キーでエントリを取得（なければNone）"""
+        entry_dir = self._entry_dir(key)
+        entry = self._read_entry(entry_dir)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(os.path.join(entry_dir, MANIFEST_NAME))
+        except FileNotFoundError:
+            pass
+        return entry
+
+    def lookup(self, video_id: str, format_selector: Optional[str] = None) -> Optional[MediaEntry]:
+        """動画IDで元動画全体のエントリを探す（format_selectorを省略した場合は最後に使われたもの）"""
+        if format_selector is not None:
+            return self.get(self.make_key(video_id, format_selector))
+
+        entries = [entry for entry in self.list_entries(video_id) if not entry.is_clip]
+        if not entries:
+            with self._lock:
+                self.misses += 1
+            return None
+        latest = max(entries, key=lambda entry: os.path.getmtime(os.path.join(self._entry_dir(entry.key), MANIFEST_NAME)))
+        return self.get(latest.key)
+
+    def find_covering(self, video_id: str, format_selector: str, start_time: float, end_time: float) -> Optional[MediaEntry]:
+        """元動画の範囲を含むエントリを探す（同じフォーマット指定の全体のダウンロードを優先し、なければ範囲が最も短いクリップ）"""
+        candidates = [entry for entry in self.list_entries(video_id) if entry.format_selector == format_selector and entry.covers(start_time, end_time)]
+        if not candidates:
+            with self._lock:
+                self.misses += 1
+            return None
+        best = min(candidates, key=lambda entry: (entry.is_clip, (entry.clip_end - entry.clip_start) if entry.is_clip else 0))
+        return self.get(best.key)
+
+    def list_entries(self, video_id: Optional[str] = None) -> List[MediaEntry]:
+        """保存されているエントリの一覧（video_id指定時はその動画のみ）"""
+        if video_id is not None:
+            video_dirs = [os.path.join(self.store_dir, re.sub(r"[^A-Za-z0-9_-]", "_", video_id))]
+        else:
+            video_dirs = [entry.path for entry in os.scandir(self.store_dir) if entry.is_dir() and entry.name != STAGING_DIR_NAME]
+
+        entries = []
+        for video_dir in video_dirs:
+            if not os.path.isdir(video_dir):
+                continue
+            for format_dir in os.scandir(video_dir):
+                entry = self._read_entry(format_dir.path) if format_dir.is_dir() else None
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    @contextmanager
+    def key_lock(self, key: str) -> Iterator[None]:
+        """同じキーのダウンロードを同時に1つだけ実行するためのロック（プロセス内）"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            yield
+
+    @contextmanager
+    def staging(self, key: Optional[str] = None, keep_on_error: bool = False) -> Iterator[str]:
+        """ダウンロード用の作業ディレクトリ（ストアと同じファイルシステム上、終了時に削除）
+
+        Args:
+            key: 指定した場合はキーごとに固定のディレクトリを使う（前回中断したダウンロードの .part を引き継ぐ）
+            keep_on_error: 例外で終了した場合にディレクトリを残すかどうか（次回の再開用、STAGING_MAX_AGE を過ぎると evict() で削除）
+        """
+        name = key.replace("/", "__") if key else uuid.uuid4().hex
+        staging_dir = os.path.join(self.store_dir, STAGING_DIR_NAME, name)
+        os.makedirs(staging_dir, exist_ok=True)
+        try:
+            yield staging_dir
+        except BaseException:
+            if not keep_on_error:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def commit(
+        self,
+        video_id: str,
+        format_selector: str,
+        staging_dir: str,
+        video_path: Optional[str] = None,
+        audio_path: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        clip_range: Optional[Tuple[float, float]] = None,
+    ) -> MediaEntry:
+        """一時ディレクトリにダウンロードしたファイルをストアに配置する
+
+        Args:
+            video_id: 動画ID
+            format_selector: ダウンロードに使ったyt-dlpのフォーマット指定
+            staging_dir: staging() で作成した一時ディレクトリ
+            video_path: 一時ディレクトリ内の動画ファイル
+            audio_path: 一時ディレクトリ内の音声ファイル
+            metadata: 動画情報
+            clip_range: 一部の時刻範囲のみをダウンロードした場合の (開始, 終了)（秒）
+
+        Returns:
+            配置したエントリ（別プロセスが先に配置していた場合はそのエントリ）
+        """
+        key = self.make_key(video_id, format_selector, clip_range)
+        entry_dir = self._entry_dir(key)
+        content_dir = os.path.join(staging_dir, "content" if clip_range is None else f"content_{uuid.uuid4().hex}")
+        os.makedirs(content_dir, exist_ok=True)
+
+        files = {}
+        for name, path in (("video", video_path), ("audio", audio_path)):
+            if path:
+                files[name] = os.path.join(content_dir, f"{name}{os.path.splitext(path)[1]}")
+                os.replace(path, files[name])
+
+        entry = MediaEntry(
+            key=key,
+            video_id=video_id,
+            format_selector=format_selector,
+            video_path=files.get("video"),
+            audio_path=files.get("audio"),
+            metadata=metadata or {},
+            size=sum(os.path.getsize(path) for path in files.values()),
+            created_at=time.time(),
+            clip_start=clip_range[0] if clip_range else None,
+            clip_end=clip_range[1] if clip_range else None,
+        )
+        self._write_manifest(content_dir, entry)
+
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        try:
+            # ディレクトリごとリネームして原子的に配置する
+            os.rename(content_dir, entry_dir)
+        except OSError:
+            existing = self._read_entry(entry_dir)
+            if existing is not None:
+                return existing
+            # manifestのない壊れたエントリは置き換える
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(content_dir, entry_dir)
+        return self._read_entry(entry_dir)
+
+    def add_audio(self, entry: MediaEntry, audio_path: str) -> MediaEntry:
+        """既存のエントリに音声ファイルを追加する"""
+        entry_dir = self._entry_dir(entry.key)
+        target_path = os.path.join(entry_dir, f"audio{os.path.splitext(audio_path)[1]}")
+        # 同一ディレクトリ内の一時ファイルを経由して原子的に配置する
+        temp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+        shutil.move(audio_path, temp_path)
+        os.replace(temp_path, target_path)
+        entry = entry.copy(update={"audio_path": target_path, "size": entry.size + os.path.getsize(target_path)})
+        self._write_manifest(entry_dir, entry)
+        return entry
+
+    def acquire(self, key: str, owner: str) -> None:
+        """ownerがエントリを参照していることを登録、または参照の有効期間を延長（参照中は削除しない）"""
+        with self._lock:
+            self._references.setdefault(key, {})[owner] = time.monotonic()
+
+    def release(self, key: str, owner: str) -> None:
+        """ownerの参照を解除"""
+        with self._lock:
+            owners = self._references.get(key)
+            if owners is None:
+                return
+            owners.pop(owner, None)
+            if not owners:
+                del self._references[key]
+
+    def reference_count(self, key: str) -> int:
+        """エントリを参照しているownerの数（有効期間を過ぎた参照は解除する）"""
+        expires_before = time.monotonic() - self.reference_ttl
+        with self._lock:
+            owners = self._references.get(key)
+            if owners is None:
+                return 0
+            for owner in [owner for owner, acquired_at in owners.items() if acquired_at < expires_before]:
+                del owners[owner]
+            if not owners:
+                del self._references[key]
+                return 0
+            return len(owners)
+
+    def _remove_stale_staging(self) -> None:
+        staging_root = os.path.join(self.store_dir, STAGING_DIR_NAME)
+        if not os.path.isdir(staging_root):
+            return
+        for staging_dir in os.scandir(staging_root):
+            try:
+                if time.time() - staging_dir.stat().st_mtime > STAGING_MAX_AGE:
+                    shutil.rmtree(staging_dir.path, ignore_errors=True)
+            except FileNotFoundError:
+                pass
+
+    def evict(self) -> int:
+        """サイズ上限を超えている場合、参照されていないエントリを最終利用が古いものから削除する（古い作業ディレクトリも削除）
+
+        Returns:
+            削除したエントリ数
+        """
+        self._remove_stale_staging()
+        entries = []
+        total_size = 0
+        for entry in self.list_entries():
+            entry_dir = self._entry_dir(entry.key)
+            try:
+                last_used = os.path.getmtime(os.path.join(entry_dir, MANIFEST_NAME))
+            except FileNotFoundError:
+                continue
+            entries.append((last_used, entry.size, entry.key))
+            total_size += entry.size
+
+        removed = 0
+        for _, size, key in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            if self.reference_count(key) > 0:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total_size -= size
+            removed += 1
+            print(f"DEBUG: 動画ストアから削除 - {key}")
+        return removed
+
+    def total_bytes(self) -> int:
+        """保存されている動画・音声の合計サイズ"""
+        return sum(entry.size for entry in self.list_entries())
+
+    def stats(self) -> Dict[str, int]:
+        """累計のヒット・ミス数を取得"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_default_media_store: Optional[MediaStore] = None
+
+
+def get_default_media_store() -> MediaStore:
+    """設定値に基づく共有ストアを取得"""
+    global _default_media_store
+    if _default_media_store is None:
+        _default_media_store = MediaStore(os.path.join(env_setting.CACHE_DIR, "media"), env_setting.MEDIA_STORE_MAX_BYTES, env_setting.MEDIA_STORE_REFERENCE_TTL_SECONDS)
+    return _default_media_store
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""レンダリング済みセグメントのディスクキャッシュ"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+from src.setting import env_setting
+
+# ソース動画のフィンガープリントで読み込む先頭・末尾のバイト数
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+
+
+def fingerprint_source(source_path: str) -> str:
+    """ソース動画のフィンガープリントを作成
+
+    数GBの動画全体をハッシュすると遅いため、サイズ・更新時刻と先頭/末尾1MBのハッシュで代用する。
+    """
+    stat = os.stat(source_path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    with open(source_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(FINGERPRINT_SAMPLE_BYTES, stat.st_size - FINGERPRINT_SAMPLE_BYTES))
+            digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def _link_or_copy(source_path: str, dest_path: str) -> None:
+    """ハードリンクを作成（別のファイルシステムなどでリンクできない場合はコピー）"""
+    try:
+        os.link(source_path, dest_path)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(source_path, dest_path)
+
+
+class SegmentRenderCache:
+    """セグメント動画のコンテンツアドレス型キャッシュ（サイズ上限付きLRU）
+
+    キーはソースのフィンガープリント・切り出し範囲・エンコードパラメータから作成する。
+    LRUの順序はファイルの更新時刻で管理し、ヒット時に更新時刻を更新する。
+    ジョブはキャッシュ内のファイルを直接参照せず、作業ディレクトリのハードリンク（またはコピー）を使うため、
+    他のジョブの evict() で削除されても使用中のセグメントは消えない。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, source_fingerprint: str, start_time: float, end_time: float, params: Dict[str, Any]) -> str:
+        """キャッシュキーを作成"""
+        payload = {"source": source_fingerprint, "start": round(float(start_time), 3), "end": round(float(end_time), 3), "params": params}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp4")
+
+    def get(self, key: str, dest_path: str) -> Optional[str]:
+        """キャッシュ済みセグメントを dest_path（ジョブの作業ディレクトリ内）にリンクし、dest_path を返す（なければNone）"""
+        path = self._path_for(key)
+        try:
+            os.utime(path)
+            _link_or_copy(path, dest_path)
+        except FileNotFoundError:
+            # 更新時刻の更新とリンクの間に他のジョブが削除した場合もミスとして扱う
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return dest_path
+
+    def put(self, key: str, file_path: str) -> None:
+        """レンダリング済みファイルをキャッシュへ登録（file_path はそのまま残し、ジョブはそちらを使う）"""
+        path = self._path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 同一ディレクトリ内の一時ファイルを経由して原子的に配置する
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        _link_or_copy(file_path, temp_path)
+        os.replace(temp_path, path)
+
+    def evict(self) -> int:
+        """サイズ上限を超えている場合、最終利用が古いものから削除する
+
+        実行中のジョブは作業ディレクトリのリンクを使っているため、キャッシュ側のファイルを削除しても影響しない。
+
+        Returns:
+            削除したファイル数
+        """
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".mp4"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """累計のヒット・ミス数を取得"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_default_render_cache: Optional[SegmentRenderCache] = None
+
+
+def get_default_render_cache() -> SegmentRenderCache:
+    """設定値に基づく共有キャッシュを取得"""
+    global _default_render_cache
+    if _default_render_cache is None:
+        _default_render_cache = SegmentRenderCache(os.path.join(env_setting.CACHE_DIR, "render_segments"), env_setting.RENDER_CACHE_MAX_BYTES)
+    return _default_render_cache
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""動画品質ごとのエンコード設定"""
+
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+
+
+class RenderProfile(BaseModel):
+    """libx264/AACによるエンコード設定（ハードウェアエンコーダには依存しない）"""
+
+    name: str
+    preset: str
+    crf: int
+    tune: Optional[str] = None
+    threads: int = 4  # 1エンコードあたりのスレッド数（0は自動）
+    width: int = 1080
+    height: int = 1920
+    audio_bitrate: str = "128k"
+
+    def video_kwargs(self) -> Dict[str, Any]:
+        """映像エンコード用のffmpeg出力オプション"""
+        kwargs: Dict[str, Any] = {"vcodec": "libx264", "preset": self.preset, "crf": self.crf}
+        if self.tune:
+            kwargs["tune"] = self.tune
+        if self.threads:
+            kwargs["threads"] = self.threads
+        return kwargs
+
+    def audio_kwargs(self) -> Dict[str, Any]:
+        """音声エンコード用のffmpeg出力オプション"""
+        return {"acodec": "aac", "audio_bitrate": self.audio_bitrate}
+
+    def cache_params(self) -> Dict[str, Any]:
+        """出力内容に影響するパラメータ（レンダーキャッシュのキー用）"""
+        return self.dict(exclude={"name", "threads"})
+
+
+RENDER_PROFILES: Dict[str, RenderProfile] = {
+    "high": RenderProfile(name="high", preset="medium", crf=20, tune="film", threads=4, width=1080, height=1920, audio_bitrate="192k"),
+    "medium": RenderProfile(name="medium", preset="fast", crf=23, threads=4, width=720, height=1280, audio_bitrate="128k"),
+    "low": RenderProfile(name="low", preset="veryfast", crf=28, threads=2, width=540, height=960, audio_bitrate="96k"),
+}
+
+
+def get_render_profile(quality: str) -> RenderProfile:
+    """品質名からエンコード設定を取得
+
+    Raises:
+        ValueError: 未定義の品質名の場合
+    """
+    if quality not in RENDER_PROFILES:
+        raise ValueError(f"サポートされていない動画品質: {quality}")
+    return RENDER_PROFILES[quality]
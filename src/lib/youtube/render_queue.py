@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""動画レンダリングのバックグラウンドジョブキュー
+
+Streamlitのスクリプト実行とは別のプロセスプールでレンダリングを行い、ジョブの状態・進捗はDAO経由でジョブテーブルに保存する。
+ページの再実行やブラウザの再読み込みがあっても、ジョブIDからいつでも状態を取得できる。
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from src.agent_sdk.schemas.youtube import VideoProcessingResult
+from src.lib.dao.render_job import (
+    create_render_job,
+    fail_interrupted_render_jobs,
+    finish_render_job,
+    get_active_render_jobs,
+    get_render_job,
+    get_render_jobs,
+    request_render_job_cancel,
+    start_render_job,
+    update_render_job_progress,
+)
+from src.setting import env_setting
+
+JOB_KINDS = ("single", "batch")
+
+# 進捗をジョブテーブルへ書き込む最小間隔（秒）
+PROGRESS_UPDATE_INTERVAL = 1.0
+
+
+# このプロセスで動作中のキューのID
+_live_queue_ids = set()
+_live_queue_ids_lock = threading.Lock()
+
+
+class RenderJobCancelled(Exception):
+    """レンダリングジョブのキャンセル要求を受けた"""
+
+
+def _is_queue_alive(queue_id: Optional[str]) -> bool:
+    """ジョブを投入したキュー（ホスト名:プロセスID:インスタンスID）が動作中かどうか
+
+    同じホストのキューのみプロセスの有無で判定し、他のホストのキューは判定できないため動作中とみなす。
+    キューのIDがないジョブ（キューのIDを記録する前に投入されたもの）は終了したものとみなす。
+    """
+    parts = (queue_id or "").rsplit(":", 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return False
+    host, pid, _ = parts
+    if host != socket.gethostname():
+        return True
+    if int(pid) == os.getpid():
+        with _live_queue_ids_lock:
+            return queue_id in _live_queue_ids
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _run_render_job(job_id: str) -> str:
+    """ワーカープロセスでジョブを実行する
+
+    Returns:
+        ジョブの最終ステータス
+    """
+    from src.lib.youtube.video_processing import create_short_video, create_short_videos_batch
+
+    if not start_render_job(job_id, os.getpid()):
+        # 開始前にキャンセルされた
+        return "cancelled"
+
+    job = get_render_job(job_id)
+    params = json.loads(job.params)
+    last_update = 0.0
+
+    def progress_callback(message: str, progress: float):
+        nonlocal last_update
+        now = time.monotonic()
+        if progress < 1.0 and now - last_update < PROGRESS_UPDATE_INTERVAL:
+            return
+        last_update = now
+        if update_render_job_progress(job_id, progress, message):
+            raise RenderJobCancelled(job_id)
+
+    try:
+        if job.kind == "batch":
+            results = create_short_videos_batch(progress_callback=progress_callback, **params)
+            succeeded = any(result.success for result in results)
+            result_json = json.dumps([result.dict() for result in results], ensure_ascii=False, default=str)
+            error = None if succeeded else "; ".join(result.error or "" for result in results)
+        else:
+            result = create_short_video(progress_callback=progress_callback, **params)
+            succeeded = result.success
+            result_json = json.dumps(result.dict(), ensure_ascii=False, default=str)
+            error = result.error
+    except RenderJobCancelled:
+        succeeded, result_json, error = False, None, None
+    except Exception as e:
+        finish_render_job(job_id, "failed", error=f"レンダリングジョブエラー: {str(e)}")
+        return "failed"
+
+    # 動画処理関数は例外を結果に変換するため、キャンセルはジョブテーブル側のフラグで判定する
+    job = get_render_job(job_id)
+    if job is not None and job.cancel_requested:
+        finish_render_job(job_id, "cancelled", error="キャンセルされました")
+        return "cancelled"
+
+    status = "succeeded" if succeeded else "failed"
+    finish_render_job(job_id, status, result=result_json, error=error)
+    return status
+
+
+class RenderQueue:
+    """プロセスプールで動画レンダリングを実行するジョブキュー
+
+    1プロセス内で共有し、複数の編集者のジョブを投入順に max_workers 件ずつ並列実行する。
+    ジョブには投入したキューのIDを記録し、起動時は投入したキューが終了しているジョブのみを中断扱いにする
+    （同じDBを共有する他のプロセスのキューのジョブには触れない）。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or env_setting.RENDER_QUEUE_WORKERS
+        self.queue_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        with _live_queue_ids_lock:
+            _live_queue_ids.add(self.queue_id)
+        orphaned = [job.id for job in get_active_render_jobs() or [] if not _is_queue_alive(job.queue_id)]
+        interrupted = fail_interrupted_render_jobs(orphaned)
+        if interrupted:
+            print(f"DEBUG: 中断されたレンダリングジョブ: {interrupted}件")
+        # Streamlitのスレッドを引き継がないよう、ワーカーはspawnで起動する
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, params: Dict[str, Any], owner: str = "") -> str:
+        """ジョブを投入してジョブIDを返す
+
+        Args:
+            kind: "single"（create_short_video）または "batch"（create_short_videos_batch）
+            params: 動画処理関数に渡すキーワード引数（JSONに変換可能な値のみ、progress_callbackは不要）
+            owner: ジョブの投入者
+
+        Raises:
+            ValueError: 未定義のジョブ種別の場合
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"サポートされていないジョブ種別: {kind}")
+
+        params = dict(params)
+        if "max_workers" not in params:
+            # 同時実行するジョブ間でCPUを分け合う
+            from src.lib.youtube.video_processing import get_default_segment_workers
+
+            params["max_workers"] = max(1, get_default_segment_workers() // self.max_workers)
+
+        job_id = uuid.uuid4().hex
+        create_render_job(job_id, kind, json.dumps(params, ensure_ascii=False), owner=owner, queue_id=self.queue_id)
+        future = self._executor.submit(_run_render_job, job_id)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        print(f"DEBUG: レンダリングジョブ投入: {job_id} ({kind})")
+        return job_id
+
+    def _forget(self, job_id: str) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブの状態（ステータス・進捗・メッセージなど）を取得"""
+        job = get_render_job(job_id)
+        if job is None:
+            return None
+        status = job.to_dict()
+        status.pop("params")
+        status.pop("result")
+        return status
+
+    def list_jobs(self, owner: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """最近のジョブの状態を新しい順に取得"""
+        jobs = get_render_jobs(owner=owner, limit=limit) or []
+        return [{key: value for key, value in job.to_dict().items() if key not in ("params", "result")} for job in jobs]
+
+    def cancel(self, job_id: str) -> bool:
+        """ジョブをキャンセルする（実行中の場合は次の進捗の書き込み時に実行中のffmpegを終了させて停止）"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return request_render_job_cancel(job_id)
+
+    def result(self, job_id: str) -> Optional[Union[VideoProcessingResult, List[VideoProcessingResult]]]:
+        """完了したジョブの処理結果を取得（未完了の場合はNone）"""
+        job = get_render_job(job_id)
+        if job is None or not job.result:
+            return None
+        data = json.loads(job.result)
+        if isinstance(data, list):
+            return [VideoProcessingResult(**item) for item in data]
+        return VideoProcessingResult(**data)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        with _live_queue_ids_lock:
+            _live_queue_ids.discard(self.queue_id)
+
+
+_default_render_queue: Optional[RenderQueue] = None
+_default_render_queue_lock = threading.Lock()
+
+
+def get_render_queue() -> RenderQueue:
+    """プロセス内で共有するレンダリングキューを取得"""
+    global _default_render_queue
+    with _default_render_queue_lock:
+        if _default_render_queue is None:
+            _default_render_queue = RenderQueue()
+        return _default_render_queue
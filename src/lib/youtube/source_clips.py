@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""カットの範囲だけを切り出した元動画クリップ（cuts-first ダウンロード）
+
+元動画全体の代わりに、カットの前後に余白を加えた範囲だけをダウンロードしたクリップを使う。
+クリップは元動画の時刻範囲と対応付けて保持し、レンダリング時は元動画の時刻をクリップ内の時刻に変換して入力する。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.agent_sdk.schemas.youtube import SourceClip
+
+# カットの前後に加える余白（秒）。キーフレーム単位の切り出しやカットの微調整に備える
+CLIP_PADDING = 2.0
+
+# これより近い取得範囲は1つにまとめる（秒）
+CLIP_MERGE_GAP = 5.0
+
+
+def plan_clip_windows(
+    cut_segments: Iterable[Dict[str, Any]], padding: float = CLIP_PADDING, merge_gap: float = CLIP_MERGE_GAP, duration: Optional[float] = None
+) -> List[Tuple[float, float]]:
+    """カットの範囲に余白を加え、重なる・近い範囲を結合した取得範囲（開始時刻順）"""
+    windows = []
+    for segment in cut_segments:
+        start_time, end_time = float(segment.get("start_time", 0)), float(segment.get("end_time", 0))
+        if end_time <= start_time:
+            continue
+        start_time = max(0.0, start_time - padding)
+        end_time = end_time + padding
+        if duration:
+            end_time = min(float(duration), end_time)
+        windows.append((start_time, end_time))
+
+    merged: List[Tuple[float, float]] = []
+    for start_time, end_time in sorted(windows):
+        if merged and start_time - merged[-1][1] <= merge_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_time))
+        else:
+            merged.append((start_time, end_time))
+    return [(round(start_time, 3), round(end_time, 3)) for start_time, end_time in merged]
+
+
+class SourceClipIndex:
+    """元動画の時刻範囲からクリップとクリップ内の時刻を引く索引"""
+
+    def __init__(self, clips: Iterable[SourceClip]):
+        self.clips = sorted(clips, key=lambda clip: (clip.start_time, -clip.end_time))
+
+    @classmethod
+    def from_dicts(cls, clips: Iterable[Any]) -> "SourceClipIndex":
+        """辞書（レンダリングジョブのパラメータ）またはSourceClipのリストから作成"""
+        return cls(clip if isinstance(clip, SourceClip) else SourceClip(**clip) for clip in clips)
+
+    def find(self, start_time: float, end_time: float) -> Optional[SourceClip]:
+        """範囲 [start_time, end_time] 全体を含むクリップ（なければNone）"""
+        for clip in self.clips:
+            if clip.start_time > start_time:
+                break
+            if clip.end_time >= end_time:
+                return clip
+        return None
+
+    def locate(self, start_time: float, end_time: float) -> Tuple[str, float, float]:
+        """元動画の範囲を (クリップのパス, クリップ内の開始, クリップ内の終了) に変換
+
+        Raises:
+            ValueError: 範囲を含むクリップがない場合
+        """
+        clip = self.find(start_time, end_time)
+        if clip is None:
+            raise ValueError(f"カット {start_time:.2f}〜{end_time:.2f} 秒を含むクリップがありません")
+        return clip.path, start_time - clip.start_time, end_time - clip.start_time
+
+    def missing_segments(self, cut_segments: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """クリップに含まれないカット（長さのないカットは除く）"""
+        return [segment for segment in cut_segments if segment.get("end_time", 0) > segment.get("start_time", 0) and self.find(segment["start_time"], segment["end_time"]) is None]
+
+    @property
+    def paths(self) -> List[str]:
+        return [clip.path for clip in self.clips]
+
+    def __len__(self) -> int:
+        return len(self.clips)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""エージェントが整形した字幕と元の字幕チャンクの対応付け"""
+
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+from src.lib.youtube.transcript_index import TranscriptIntervalIndex
+
+# 対応付けに必要な時間範囲の重なり（IoU: 重なり / 和集合）の下限
+ALIGNMENT_MIN_IOU = 0.5
+
+# 対応付けた字幕がチャンクの長さのこの割合以上と重なる場合、そのチャンクも補正テキストに置き換える
+ALIGNMENT_MIN_COVERAGE = 0.5
+
+
+class SubtitleAlignment(BaseModel):
+    """字幕チャンクと整形済み字幕の対応付け結果"""
+
+    corrections: Dict[int, str] = Field(default_factory=dict)  # チャンクのインデックス（インデックスの並び順）→ 補正テキスト
+    replaced: Dict[int, int] = Field(default_factory=dict)  # 補正テキストに含まれる他のチャンク → 補正テキストを持つチャンク
+    total: int = 0  # 整形済み字幕の数
+    matched: int = 0  # チャンクに対応付けられた整形済み字幕の数
+    unmatched: List[Dict[str, Any]] = Field(default_factory=list)  # 対応付けられなかった整形済み字幕
+
+    @property
+    def match_rate(self) -> float:
+        return self.matched / self.total if self.total else 1.0
+
+
+def _iou(start_a: float, end_a: float, start_b: float, end_b: float) -> float:
+    overlap = min(end_a, end_b) - max(start_a, start_b)
+    if overlap <= 0:
+        return 0.0
+    union = max(end_a, end_b) - min(start_a, start_b)
+    return overlap / union if union > 0 else 0.0
+
+
+def align_scenario_subtitles(
+    transcript_index: TranscriptIntervalIndex,
+    scenario_subtitles: List[Dict[str, Any]],
+    min_iou: float = ALIGNMENT_MIN_IOU,
+    min_coverage: float = ALIGNMENT_MIN_COVERAGE,
+) -> SubtitleAlignment:
+    """整形済み字幕を時間範囲の重なりで字幕チャンクに対応付ける
+
+    チャンク・字幕とも開始時刻順に並べ、スイープラインで重なる組だけを比較する（O(n + m + 重なりの数)）。
+    1つの字幕が複数のチャンクに重なる場合は、IoUが最も大きいチャンクに対応付け、長さの min_coverage 以上が字幕と重なる
+    他のチャンクは replaced に記録する（補正テキストとそのチャンクの元のテキストを重ねて表示しないため）。
+    """
+    subtitles = sorted(
+        ((float(subtitle.get("start_time", 0)), float(subtitle.get("end_time", 0)), position) for position, subtitle in enumerate(scenario_subtitles) if subtitle.get("text")),
+    )
+
+    # 字幕ごとの最良のチャンク: 字幕の位置 → (IoU, チャンクのインデックス)
+    best_for_subtitle: Dict[int, tuple] = {}
+    # 字幕ごとの、長さの min_coverage 以上が重なるチャンク: 字幕の位置 → [(重なり, チャンクのインデックス)]
+    covered_by_subtitle: Dict[int, List[tuple]] = {}
+    active: List[tuple] = []
+    next_subtitle = 0
+    for chunk_index in range(len(transcript_index)):
+        chunk_start = transcript_index.starts[chunk_index]
+        chunk_end = transcript_index.ends[chunk_index]
+
+        # チャンクの終了より前に始まる字幕を追加し、チャンクの開始までに終わった字幕を除く
+        while next_subtitle < len(subtitles) and subtitles[next_subtitle][0] < chunk_end:
+            active.append(subtitles[next_subtitle])
+            next_subtitle += 1
+        active = [subtitle for subtitle in active if subtitle[1] > chunk_start]
+
+        for subtitle_start, subtitle_end, position in active:
+            iou = _iou(chunk_start, chunk_end, subtitle_start, subtitle_end)
+            if iou >= min_iou and iou > best_for_subtitle.get(position, (0.0, -1))[0]:
+                best_for_subtitle[position] = (iou, chunk_index)
+            overlap = min(chunk_end, subtitle_end) - max(chunk_start, subtitle_start)
+            if overlap > 0 and overlap >= min_coverage * (chunk_end - chunk_start):
+                covered_by_subtitle.setdefault(position, []).append((overlap, chunk_index))
+
+    # 1つのチャンクに複数の字幕が対応する場合はIoUが最も大きいものを採用
+    best_for_chunk: Dict[int, tuple] = {}
+    for position, (iou, chunk_index) in best_for_subtitle.items():
+        if iou > best_for_chunk.get(chunk_index, (0.0, -1))[0]:
+            best_for_chunk[chunk_index] = (iou, position)
+
+    # 補正テキストを持たないチャンクは、最も重なりの大きい対応付け済みの字幕に含める
+    best_cover: Dict[int, tuple] = {}
+    for chunk_index, (_, position) in best_for_chunk.items():
+        for overlap, covered_index in covered_by_subtitle.get(position, []):
+            if covered_index not in best_for_chunk and overlap > best_cover.get(covered_index, (0.0, -1))[0]:
+                best_cover[covered_index] = (overlap, chunk_index)
+
+    matched_positions = {position for _, position in best_for_chunk.values()}
+    return SubtitleAlignment(
+        corrections={chunk_index: scenario_subtitles[position]["text"] for chunk_index, (_, position) in best_for_chunk.items()},
+        replaced={covered_index: chunk_index for covered_index, (_, chunk_index) in best_cover.items()},
+        total=len(subtitles),
+        matched=len(matched_positions),
+        unmatched=[scenario_subtitles[position] for _, _, position in subtitles if position not in matched_positions],
+    )
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""字幕をPNG画像として事前に描画し、overlayフィルタで焼き込む
+
+subtitlesフィルタ（libass）は最終エンコード時にフレームごとに字幕を描画するため、縁取り・影付きの縦動画では
+エンコード時間の無視できない割合を占める。ここでは内容の異なる字幕ごとに1回だけ透過PNGを描画し、
+表示区間だけ有効になる overlay フィルタで合成する。
+"""
+
+import os
+import platform
+import re
+from typing import Dict, List, Optional, Tuple
+
+import ffmpeg
+from PIL import Image, ImageDraw, ImageFont
+from pydantic import BaseModel, Field
+
+# "libass": subtitlesフィルタで描画 / "overlay": 事前に描画したPNGを overlay フィルタで合成
+SUBTITLE_RENDERERS = ("libass", "overlay")
+
+# 日本語を含む字幕を描画できるフォントの候補（先にあるものを優先）
+CJK_FONT_PATHS = {
+    "Linux": [
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+        "/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+        "/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf",
+        "/usr/share/fonts/truetype/takao-gothic/TakaoPGothic.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ],
+    "Darwin": ["/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc", "/System/Library/Fonts/Hiragino Sans GB.ttc", "/System/Library/Fonts/Helvetica.ttc"],
+    "Windows": ["C:/Windows/Fonts/meiryob.ttc", "C:/Windows/Fonts/meiryo.ttc", "C:/Windows/Fonts/msgothic.ttc", "C:/Windows/Fonts/arial.ttf"],
+}
+
+# ASS字幕の基準解像度（ASS_HEADER の PlayResX）。スタイルの大きさはこの幅に対する値
+STYLE_BASE_WIDTH = 1080
+
+_ASS_OVERRIDE_TAG = re.compile(r"\{[^}]*\}")
+_TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})")
+
+
+class SubtitleCue(BaseModel):
+    """字幕ファイルの1キュー"""
+
+    start: float
+    end: float
+    text: str
+
+
+class SubtitleStyle(BaseModel):
+    """字幕画像のスタイル（ASS_HEADER の Default スタイルと同じ見た目）"""
+
+    font_size: int = 48
+    outline: int = 3
+    shadow: int = 2
+    margin_h: int = 50
+    margin_v: int = 120
+    line_spacing: float = 1.2
+    fill_color: Tuple[int, int, int, int] = (255, 255, 255, 255)
+    outline_color: Tuple[int, int, int, int] = (0, 0, 0, 255)
+    shadow_color: Tuple[int, int, int, int] = (0, 0, 0, 128)
+
+    def scaled(self, width: int) -> "SubtitleStyle":
+        """出力動画の幅に合わせて大きさを換算したスタイル"""
+        scale = width / STYLE_BASE_WIDTH
+        return self.copy(
+            update={
+                "font_size": max(1, round(self.font_size * scale)),
+                "outline": round(self.outline * scale),
+                "shadow": round(self.shadow * scale),
+                "margin_h": round(self.margin_h * scale),
+                "margin_v": round(self.margin_v * scale),
+            }
+        )
+
+
+class OverlayImage(BaseModel):
+    """描画済みの字幕画像と、その画像を表示する区間"""
+
+    path: str
+    x: int
+    y: int
+    windows: List[Tuple[float, float]] = Field(default_factory=list)
+
+    def enable_expression(self) -> str:
+        """overlay フィルタの enable に渡す式（表示区間のいずれかに含まれる間だけ有効）"""
+        return "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in self.windows)
+
+
+def find_subtitle_font() -> str:
+    """日本語を描画できるフォントのパスを取得（見つからない場合は空文字列）"""
+    for font_path in CJK_FONT_PATHS.get(platform.system(), []):
+        if os.path.exists(font_path):
+            return font_path
+    return ""
+
+
+def _parse_timestamp(value: str) -> float:
+    match = _TIMESTAMP.search(value)
+    if not match:
+        raise ValueError(f"時刻を解析できません: {value}")
+    hours, minutes, seconds, fraction = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction) / 10 ** len(fraction)
+
+
+def read_subtitle_cues(subtitle_path: str) -> List[SubtitleCue]:
+    """SRT/VTT/ASS字幕ファイルからキューを読み込む
+
+    Raises:
+        ValueError: 時刻を解析できない行がある場合
+    """
+    with open(subtitle_path, encoding="utf-8-sig") as f:
+        content = f.read()
+
+    cues = []
+    if subtitle_path.lower().endswith(".ass"):
+        for line in content.splitlines():
+            if not line.startswith("Dialogue:"):
+                continue
+            # Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text（Textのみカンマを含みうる）
+            fields = line.split(":", 1)[1].split(",", 9)
+            text = _ASS_OVERRIDE_TAG.sub("", fields[9]).replace("\\N", "\n").replace("\\n", "\n").strip()
+            cues.append(SubtitleCue(start=_parse_timestamp(fields[1]), end=_parse_timestamp(fields[2]), text=text))
+    else:
+        # SRT/VTTは空行区切りのブロックで、"-->" を含む行が時刻、それ以降がテキスト
+        for block in re.split(r"\n\s*\n", content.replace("\r\n", "\n")):
+            lines = block.strip().splitlines()
+            timing_index = next((i for i, line in enumerate(lines) if "-->" in line), None)
+            if timing_index is None:
+                continue
+            start_text, end_text = lines[timing_index].split("-->", 1)
+            cues.append(SubtitleCue(start=_parse_timestamp(start_text), end=_parse_timestamp(end_text), text="\n".join(lines[timing_index + 1 :]).strip()))
+
+    return [cue for cue in cues if cue.text and cue.end > cue.start]
+
+
+def _wrap_line(draw: ImageDraw.ImageDraw, line: str, font: ImageFont.FreeTypeFont, max_width: float) -> List[str]:
+    """1行を描画幅に収まるように折り返す（日本語は文字単位、空白があれば空白で折り返す）"""
+    wrapped = []
+    current = ""
+    for char in line:
+        if current and draw.textlength(current + char, font=font) > max_width:
+            break_at = current.rfind(" ")
+            if break_at > 0:
+                wrapped.append(current[:break_at])
+                current = current[break_at + 1 :]
+            else:
+                wrapped.append(current)
+                current = ""
+        current += char
+    wrapped.append(current)
+    return wrapped
+
+
+def render_cue_image(text: str, output_path: str, width: int, height: int, font_path: str = "", style: Optional[SubtitleStyle] = None) -> Tuple[int, int]:
+    """字幕テキストを縁取り・影付きの透過PNGに描画する
+
+    画像は文字の範囲だけの大きさにし（合成するピクセル数を減らすため）、下中央揃えで配置する。
+
+    Returns:
+        出力動画上の画像の左上座標 (x, y)
+    """
+    style = style or SubtitleStyle()
+    font = ImageFont.truetype(font_path, style.font_size) if font_path else ImageFont.load_default(size=style.font_size)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+    max_text_width = width - 2 * style.margin_h - 2 * style.outline
+    lines = [wrapped for line in text.split("\n") for wrapped in _wrap_line(measure, line, font, max_text_width)]
+    line_height = round(style.font_size * style.line_spacing)
+    line_widths = [measure.textlength(line, font=font) for line in lines]
+
+    padding = style.outline + style.shadow
+    image_width = int(max(line_widths, default=0)) + 2 * padding
+    image_height = line_height * len(lines) + 2 * padding
+    image = Image.new("RGBA", (image_width, image_height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    for i, (line, line_width) in enumerate(zip(lines, line_widths)):
+        x = (image_width - line_width) / 2
+        y = padding + i * line_height
+        if style.shadow:
+            draw.text(
+                (x + style.shadow, y + style.shadow),
+                line,
+                font=font,
+                fill=style.shadow_color,
+                stroke_width=style.outline,
+                stroke_fill=style.shadow_color,
+            )
+        draw.text((x, y), line, font=font, fill=style.fill_color, stroke_width=style.outline, stroke_fill=style.outline_color)
+
+    # 圧縮率よりも書き出し・読み込みの速さを優先する
+    image.save(output_path, format="PNG", compress_level=1)
+    return max(0, (width - image_width) // 2), max(0, height - style.margin_v - image_height)
+
+
+def prepare_overlay_images(
+    cues: List[SubtitleCue], image_dir: str, width: int, height: int, font_path: Optional[str] = None, style: Optional[SubtitleStyle] = None
+) -> List[OverlayImage]:
+    """内容の異なる字幕ごとに1回だけ画像を描画し、同じ字幕の表示区間はまとめる"""
+    if font_path is None:
+        font_path = find_subtitle_font()
+    style = (style or SubtitleStyle()).scaled(width)
+    os.makedirs(image_dir, exist_ok=True)
+
+    overlay_images: Dict[str, OverlayImage] = {}
+    for cue in cues:
+        overlay_image = overlay_images.get(cue.text)
+        if overlay_image is None:
+            image_path = os.path.join(image_dir, f"subtitle_{len(overlay_images):04d}.png")
+            x, y = render_cue_image(cue.text, image_path, width, height, font_path, style)
+            overlay_image = overlay_images[cue.text] = OverlayImage(path=image_path, x=x, y=y)
+        overlay_image.windows.append((cue.start, cue.end))
+
+    print(f"DEBUG: 字幕画像を描画 - キュー数: {len(cues)}, 画像数: {len(overlay_images)}")
+    return list(overlay_images.values())
+
+
+def apply_subtitle_overlays(video_stream, overlay_images: List[OverlayImage]):
+    """描画済みの字幕画像を、表示区間だけ有効な overlay フィルタで映像ストリームに合成する
+
+    静止画の入力は1フレームだけだが、overlay は入力の終了後も最後のフレームを使い続ける（eof_action=repeat）。
+    """
+    for overlay_image in overlay_images:
+        image_stream = ffmpeg.input(overlay_image.path).video
+        video_stream = ffmpeg.overlay(video_stream, image_stream, x=overlay_image.x, y=overlay_image.y, eof_action="repeat", enable=overlay_image.enable_expression())
+    return video_stream
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""字幕ファイル（SRT/VTT/ASS）のストリーミング書き込み"""
+
+import os
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+SUBTITLE_FORMATS = ("srt", "vtt", "ass")
+
+# ASSファイルのヘッダー（縦動画用に最適化、フォントサイズ埋め込み）
+ASS_HEADER = """[Script Info]
+Title: YouTube Short Subtitles
+ScriptType: v4.00+
+PlayResX: 1080
+PlayResY: 1920
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,48,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,1,0,0,0,100,100,0,0,1,3,2,2,50,50,120,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+
+"""
+
+
+def split_milliseconds(seconds: float) -> Tuple[int, int, int, int]:
+    """秒数を (時, 分, 秒, ミリ秒) に分解（整数ミリ秒に丸めてから計算し、浮動小数の誤差で1ms欠けるのを防ぐ）"""
+    total_ms = max(0, int(round(seconds * 1000)))
+    total_seconds, millisecs = divmod(total_ms, 1000)
+    total_minutes, secs = divmod(total_seconds, 60)
+    hours, minutes = divmod(total_minutes, 60)
+    return hours, minutes, secs, millisecs
+
+
+def format_srt_time(seconds: float) -> str:
+    """秒数をSRT時間形式に変換 (HH:MM:SS,mmm)"""
+    hours, minutes, secs, millisecs = split_milliseconds(seconds)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
+
+
+def format_vtt_time(seconds: float) -> str:
+    """秒数をWebVTT時間形式に変換 (HH:MM:SS.mmm)"""
+    hours, minutes, secs, millisecs = split_milliseconds(seconds)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millisecs:03d}"
+
+
+def format_ass_time(seconds: float) -> str:
+    """秒数をASS時間形式に変換 (H:MM:SS.CC)"""
+    hours, minutes, secs, millisecs = split_milliseconds(seconds)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{millisecs // 10:02d}"
+
+
+class SubtitleWriter:
+    """字幕キューを1件ずつテキストストリームへ書き込む"""
+
+    format = ""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.count = 0
+        self._header_written = False
+
+    def header(self) -> str:
+        return ""
+
+    def accepts(self, start: float, end: float, text: str) -> bool:
+        """書き込む対象のキューかどうか（空テキストや無効な時間範囲を除外）"""
+        return bool(text) and end > start and start >= 0
+
+    def format_cue(self, start: float, end: float, text: str) -> str:
+        raise NotImplementedError
+
+    def write_header(self) -> None:
+        if not self._header_written:
+            self.stream.write(self.header())
+            self._header_written = True
+
+    def write_cue(self, start: float, end: float, text: str) -> bool:
+        """キューを書き込む（除外した場合はFalse）"""
+        self.write_header()
+        text = text.strip()
+        if not self.accepts(start, end, text):
+            return False
+        self.count += 1
+        self.stream.write(self.format_cue(start, end, text))
+        return True
+
+
+class SrtWriter(SubtitleWriter):
+    format = "srt"
+
+    def format_cue(self, start: float, end: float, text: str) -> str:
+        return f"{self.count}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n"
+
+
+class VttWriter(SubtitleWriter):
+    format = "vtt"
+
+    def header(self) -> str:
+        return "WEBVTT\n\n"
+
+    def accepts(self, start: float, end: float, text: str) -> bool:
+        return bool(text)
+
+    def format_cue(self, start: float, end: float, text: str) -> str:
+        return f"{format_vtt_time(start)} --> {format_vtt_time(end)}\n{text}\n\n"
+
+
+class AssWriter(SubtitleWriter):
+    format = "ass"
+
+    def header(self) -> str:
+        return ASS_HEADER
+
+    def format_cue(self, start: float, end: float, text: str) -> str:
+        # ASSでは改行を \N で表す
+        text = text.replace("\n", "\\N")
+        return f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Default,,0,0,0,,{text}\n"
+
+
+SUBTITLE_WRITERS = {"srt": SrtWriter, "vtt": VttWriter, "ass": AssWriter}
+
+
+def create_subtitle_writer(format: str, stream: TextIO) -> SubtitleWriter:
+    """形式名から字幕ライターを作成
+
+    Raises:
+        ValueError: サポートされていない字幕形式の場合
+    """
+    writer_class = SUBTITLE_WRITERS.get(format.lower())
+    if writer_class is None:
+        raise ValueError(f"サポートされていない字幕形式: {format}")
+    return writer_class(stream)
+
+
+def write_subtitles(cues: Iterable[Dict[str, Any]], writers: List[SubtitleWriter]) -> int:
+    """キュー（start/end/text）を1回だけ走査し、すべてのライターへ書き込む
+
+    Returns:
+        走査したキューの数
+    """
+    for writer in writers:
+        writer.write_header()
+    total = 0
+    for cue in cues:
+        total += 1
+        for writer in writers:
+            writer.write_cue(cue["start"], cue["end"], cue["text"])
+    return total
+
+
+@contextmanager
+def open_subtitle_writers(paths_by_format: Dict[str, str]) -> Iterator[List[SubtitleWriter]]:
+    """形式ごとの出力ファイルを開き、ライターのリストを返す（終了時にすべて閉じる）
+
+    Raises:
+        ValueError: サポートされていない字幕形式の場合
+    """
+    for format in paths_by_format:
+        if format.lower() not in SUBTITLE_WRITERS:
+            raise ValueError(f"サポートされていない字幕形式: {format}")
+
+    with ExitStack() as stack:
+        writers = []
+        for format, path in paths_by_format.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            stream = stack.enter_context(open(path, "w", encoding="utf-8"))
+            writers.append(create_subtitle_writer(format, stream))
+        yield writers
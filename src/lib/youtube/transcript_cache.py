@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""取得済み字幕のディスクキャッシュ（動画ID・言語・自動生成/手動ごとの圧縮JSON）"""
+
+import gzip
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from src.lib.youtube.transcript_fetchers import TranscriptFetchResult
+from src.setting import env_setting
+
+
+class TranscriptCache:
+    """字幕のディスクキャッシュ
+
+    {cache_dir}/{video_id}/{language}.{manual|generated}.json.gz に、元の字幕チャンクと処理済み字幕を保存する。
+    有効期限（ttl秒）を過ぎたものは参照しない（次に取得したときに上書きされる）。
+    """
+
+    def __init__(self, cache_dir: str, ttl: int):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.ttl = ttl
+
+    def _path_for(self, video_id: str, language: str, is_generated: bool) -> str:
+        safe_video_id = re.sub(r"[^A-Za-z0-9_-]", "_", video_id)
+        safe_language = re.sub(r"[^A-Za-z0-9_-]", "_", language)
+        return os.path.join(self.cache_dir, safe_video_id, f"{safe_language}.{'generated' if is_generated else 'manual'}.json.gz")
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: 字幕キャッシュの読み込みエラー ({path}): {e}")
+            return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def _write(self, path: str, entry: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 同一ディレクトリ内の一時ファイルを経由して原子的に配置する
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"DEBUG: 字幕キャッシュの保存エラー ({path}): {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, video_id: str, languages: List[str]) -> Optional[Dict[str, Any]]:
+        """languages の優先順位で有効なキャッシュを探す（各言語は手動字幕を優先、最後に任意言語で取得したもの）"""
+        for language in list(languages) + ["auto"]:
+            for is_generated in (False, True):
+                entry = self._read(self._path_for(video_id, language, is_generated))
+                if entry is not None:
+                    return entry
+        return None
+
+    def put(self, result: TranscriptFetchResult) -> None:
+        """取得した字幕を保存（同じキーの処理済み字幕は破棄される）"""
+        entry = {"fetched_at": time.time(), "processed": None, **result.dict()}
+        self._write(self._path_for(result.video_id, result.language, result.is_generated), entry)
+
+    def get_processed(self, video_id: str, language: str, is_generated: bool, signature: str) -> Optional[List[Dict[str, Any]]]:
+        """処理済み字幕を取得（処理方法のシグネチャが一致する場合のみ）"""
+        entry = self._read(self._path_for(video_id, language, is_generated))
+        processed = entry.get("processed") if entry else None
+        if not processed or processed.get("signature") != signature:
+            return None
+        return processed.get("chunks")
+
+    def put_processed(self, video_id: str, language: str, is_generated: bool, signature: str, chunks: List[Dict[str, Any]]) -> None:
+        """処理済み字幕を、元の字幕と同じエントリに保存"""
+        path = self._path_for(video_id, language, is_generated)
+        entry = self._read(path)
+        if entry is None:
+            return
+        entry["processed"] = {"signature": signature, "chunks": chunks}
+        self._write(path, entry)
+
+
+_default_transcript_cache: Optional[TranscriptCache] = None
+
+
+def get_default_transcript_cache() -> TranscriptCache:
+    """設定値に基づく共有キャッシュを取得"""
+    global _default_transcript_cache
+    if _default_transcript_cache is None:
+        _default_transcript_cache = TranscriptCache(os.path.join(env_setting.CACHE_DIR, "transcripts"), env_setting.TRANSCRIPT_CACHE_TTL_SECONDS)
+    return _default_transcript_cache
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""エージェントに渡す字幕のコンパクトな表現（1チャンク1行）とトークン数の概算
+
+チャンクの辞書のリストと連結テキストの両方を渡すと字幕を2回送ることになるため、1チャンクを `開始秒|テキスト` の1行で表す。
+終了秒は次の行の開始秒と同じ場合は省略し、次の行と連続しない場合（および各ページの最終行）のみ `開始秒-終了秒|テキスト` とする。
+"""
+
+from typing import List, Optional, Sequence
+
+from src.agent_sdk.schemas.base import PaginatedResponse
+from src.lib.youtube.columnar_transcript import ColumnarTranscript
+
+try:
+    import tiktoken
+except ImportError:  # 未インストールの場合は文字数から概算する
+    tiktoken = None
+
+# 各行の形式の説明（ツールの結果とエージェントの指示で共通）
+COMPACT_TRANSCRIPT_FORMAT = "各行は `開始秒|テキスト`（終了秒は次の行の開始秒）。次の行と連続しない行とページの最終行は `開始秒-終了秒|テキスト`"
+
+DEFAULT_PAGE_SIZE = 200
+
+# 終了秒と次の行の開始秒をこの差（秒）以内（ミリ秒に丸めて同じ値）なら連続とみなす
+_CONTIGUOUS_TOLERANCE = 0.0005
+
+TOKEN_ENCODING = "o200k_base"
+_encoding = None
+
+
+def format_seconds(seconds: float) -> str:
+    """秒数を短い表記にする（ミリ秒の精度の小数第3位まで、末尾の0は省略）"""
+    return f"{seconds:.3f}".rstrip("0").rstrip(".") or "0"
+
+
+def compact_transcript_lines(transcript: ColumnarTranscript, indices: Sequence[int]) -> List[str]:
+    """指定したチャンクを `開始秒|テキスト` の行にする（indicesは開始時刻順）"""
+    lines = []
+    for position, index in enumerate(indices):
+        start = transcript.starts[index]
+        end = start + transcript.durations[index]
+        text = " ".join(transcript.text_at(index).split())  # 改行を含むテキストも1行にする
+        next_start = transcript.starts[indices[position + 1]] if position + 1 < len(indices) else None
+        if next_start is not None and abs(next_start - end) <= _CONTIGUOUS_TOLERANCE:
+            lines.append(f"{format_seconds(start)}|{text}")
+        else:
+            lines.append(f"{format_seconds(start)}-{format_seconds(end)}|{text}")
+    return lines
+
+
+def paginate_compact_transcript(
+    transcript: ColumnarTranscript,
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+) -> PaginatedResponse[str]:
+    """字幕をコンパクトな行に変換して1ページ分を返す
+
+    start_time / end_time を指定した場合は、その時間範囲と重なるチャンクのみを対象にする。
+
+    Raises:
+        ValueError: page または page_size が1未満の場合
+    """
+    if page < 1 or page_size < 1:
+        raise ValueError(f"page と page_size は1以上を指定してください（page={page}, page_size={page_size}）")
+
+    if start_time is not None or end_time is not None:
+        indices = transcript.overlapping_indices(start_time or 0.0, end_time if end_time is not None else float("inf"))
+    else:
+        indices = list(range(len(transcript)))
+    if any(transcript.starts[a] > transcript.starts[b] for a, b in zip(indices, indices[1:])):
+        indices.sort(key=lambda index: transcript.starts[index])
+
+    offset = (page - 1) * page_size
+    return PaginatedResponse[str](
+        success=True,
+        items=compact_transcript_lines(transcript, indices[offset : offset + page_size]),
+        total_count=len(indices),
+        page=page,
+        page_size=page_size,
+        has_next=offset + page_size < len(indices),
+        has_previous=page > 1,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのトークン数（tiktokenがあれば o200k_base で数え、なければ文字数から概算）
+
+    概算はASCII文字4文字で1トークン、それ以外（日本語など）は1文字1トークンとする。
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        return len(_encoding.encode(text))
+    ascii_chars = sum(1 for char in text if char.isascii())
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
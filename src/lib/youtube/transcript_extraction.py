@@ -1,69 +1,64 @@
 # -*- coding: utf-8 -*-
 """YouTube字幕抽出用ツール"""
 
-from typing import Dict, List, Any, Optional
-from youtube_transcript_api import YouTubeTranscriptApi
-import re
-from copy import deepcopy
+from typing import Dict, Iterable, List, Any, Optional
+from src.lib.youtube.transcript_cache import TranscriptCache, get_default_transcript_cache
+from src.lib.youtube.transcript_fetchers import TranscriptFetcher, TranscriptUnavailableError, YouTubeTranscriptFetcher
+from src.lib.youtube.transcript_normalizer import get_transcript_normalizer
+from src.lib.youtube.transcript_segmentation import ends_sentence, iter_sentence_pieces, segment_transcript
 
+# 文章分割・結合の処理方法が変わった場合に上げる（キャッシュ済みの処理済み字幕を無効にする）
+TRANSCRIPT_PROCESSING_VERSION = 1
 
-def extract_youtube_transcript(video_id: str, languages: List[str] = ["ja", "ja-JP", "en", "en-US"]) -> Dict[str, Any]:
-    """YouTube動画の字幕を抽出する
+
+def extract_youtube_transcript(
+    video_id: str,
+    languages: List[str] = ["ja", "ja-JP", "en", "en-US"],
+    fetcher: Optional[TranscriptFetcher] = None,
+    cache: Optional[TranscriptCache] = None,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """YouTube動画の字幕を抽出する（キャッシュにあればネットワークにアクセスしない）
 
     Args:
         video_id: YouTube動画ID
         languages: 字幕言語の優先順位リスト
+        fetcher: 字幕の取得元（未指定時はYouTube）
+        cache: 字幕キャッシュ（未指定時は共有キャッシュ）
+        use_cache: キャッシュを参照・保存するかどうか
 
     Returns:
         字幕データを含む辞書
     """
     try:
-        # 利用可能な字幕をチェック
-        available_transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
-
-        transcript_list = None
-        used_language = None
+        if use_cache and cache is None:
+            cache = get_default_transcript_cache()
 
-        # 指定された言語で字幕を取得
-        for lang in languages:
-            try:
-                transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=[lang])
-                used_language = lang
-                break
-            except Exception:
-                continue
-
-        # 指定言語で取得できない場合、利用可能な任意の言語で取得
-        if transcript_list is None:
+        entry = cache.get(video_id, languages) if use_cache else None
+        cached = entry is not None
+        if cached:
+            print(f"DEBUG: 字幕キャッシュを使用 - {video_id} ({entry['language']}, 自動生成: {entry['is_generated']})")
+        else:
             try:
-                # 自動生成字幕も含めて取得
-                transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-                used_language = "auto"
-            except Exception as e:
-                return {"success": False, "error": f"字幕が見つかりません: {str(e)}", "transcript": None, "language": None, "available_languages": []}
-
-        # 利用可能な言語リストを取得
-        available_languages = []
-        try:
-            for transcript in available_transcripts:
-                available_languages.append(
-                    {
-                        "language": transcript.language,
-                        "language_code": transcript.language_code,
-                        "is_generated": transcript.is_generated,
-                        "is_translatable": transcript.is_translatable,
-                    }
-                )
-        except Exception:
-            pass
-
+                result = (fetcher or YouTubeTranscriptFetcher()).fetch(video_id, languages)
+            except TranscriptUnavailableError as e:
+                return {"success": False, "error": str(e), "transcript": None, "language": None, "available_languages": []}
+            if use_cache:
+                cache.put(result)
+            entry = result.dict()
+
+        transcript_list = entry["transcript"]
         return {
             "success": True,
             "error": None,
+            "video_id": video_id,
             "transcript": transcript_list,
-            "language": used_language,
-            "available_languages": available_languages,
+            "language": entry["language"],
+            "language_code": entry["language_code"],
+            "is_generated": entry["is_generated"],
+            "available_languages": entry["available_languages"],
             "total_segments": len(transcript_list) if transcript_list else 0,
+            "cached": cached,
         }
 
     except Exception as e:
@@ -74,7 +69,7 @@ def extract_youtube_transcript(video_id: str, languages: List[str] = ["ja", "ja-
 
 
 def split_transcript_by_sentence(transcript_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """字幕を文章単位で分割する（。で分割）
+    """字幕を文章単位で分割する（。！？!? などの文末記号ごとに分割）
 
     Args:
         transcript_chunks: 元の字幕チャンク
@@ -85,47 +80,21 @@ def split_transcript_by_sentence(transcript_chunks: List[Dict[str, Any]]) -> Lis
     result = []
 
     for entry in transcript_chunks:
-        text = entry.get("text", "")
-        start = entry.get("start", 0)
-        duration = entry.get("duration", 0)
-
-        if "。" in text:
-            split_index = text.index("。") + 1  # 「。」の直後で分割
-            first_text = text[:split_index]
-            second_text = text[split_index:]
-
-            total_len = len(text)
-            len_first = len(first_text)
-            len_second = len(second_text)
-
-            # durationの比率を文字数ベースで計算
-            duration_first = duration * (len_first / total_len) if total_len > 0 else 0
-            duration_second = duration - duration_first
-
-            result.append(
-                {
-                    "text": first_text,
-                    "start": start,
-                    "duration": round(duration_first, 3),
-                }
-            )
-
-            if second_text.strip():  # 空文字でない場合のみ追加
-                result.append(
-                    {
-                        "text": second_text,
-                        "start": round(start + duration_first, 3),
-                        "duration": round(duration_second, 3),
-                    }
-                )
-        else:
-            result.append(deepcopy(entry))
+        pieces = list(iter_sentence_pieces(entry.get("text", ""), entry.get("start", 0), entry.get("duration", 0)))
+        if len(pieces) <= 1:
+            # 分割の必要がないチャンクは値がすべて不変なので浅いコピーで足りる
+            result.append(dict(entry))
+            continue
+
+        # durationの比率を文字数ベースで計算
+        for text, start, duration, _ in pieces:
+            result.append({"text": text, "start": round(start, 3), "duration": round(duration, 3)})
 
     return result
 
 
 def merge_transcript_until_period(transcript_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """字幕を「。」を基準に結合し、文章単位にする
+    """字幕を文末記号（。！？!? など）を基準に結合し、文章単位にする
 
     Args:
         transcript_chunks: 分割された字幕チャンク
@@ -150,7 +119,7 @@ def merge_transcript_until_period(transcript_chunks: List[Dict[str, Any]]) -> Li
 
     for chunk in transcript_chunks:
         buffer.append(chunk)
-        if chunk.get("text", "").endswith("。"):
+        if ends_sentence(chunk.get("text", "")):
             flush_buffer()
 
     # 残りがあれば最後にflush
@@ -158,56 +127,75 @@ def merge_transcript_until_period(transcript_chunks: List[Dict[str, Any]]) -> Li
     return merged
 
 
-def fix_transcript_text(transcript_chunks: List[Dict[str, Any]], custom_replacements: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+def fix_transcript_text(
+    transcript_chunks: List[Dict[str, Any]], custom_replacements: Optional[Dict[str, str]] = None, dictionary_paths: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
     """字幕テキストの自動修正
 
+    置換辞書とフィラー除去はコンパイル済みの正規化器で、全チャンクをまとめて1回の走査で処理する。
+
     Args:
         transcript_chunks: 字幕チャンク
         custom_replacements: カスタム置換辞書
+        dictionary_paths: 置換辞書ファイル（JSONまたはタブ区切り、未指定時は設定の TRANSCRIPT_DICTIONARY_PATH）
 
     Returns:
         修正された字幕チャンク
     """
-    # デフォルトの置換パターン
-    default_replacements = {
-        # 一般的な誤変換
-        "トレサビリティ": "トレーサビリティ",
-        "脳水症": "農水省",
-        "ハカソ": "ハッカソン",
-        "チーム未来": "チームみらい",
-        "安野の高ひ": "安野たかひろ",
-        "安野高ひ": "安野たかひろ",
-        # フィラー除去パターン
-        r"\bあ\b": "",
-        r"\bえー\b": "",
-        r"\bうー\b": "",
-        r"\bんー\b": "",
-    }
-
-    # カスタム置換を追加
-    if custom_replacements:
-        default_replacements.update(custom_replacements)
+    return get_transcript_normalizer(dictionary_paths, custom_replacements).normalize_chunks(transcript_chunks)
 
-    result = []
 
-    for chunk in transcript_chunks:
-        text = chunk.get("text", "")
+def process_transcript_chunks(
+    transcript_chunks: Iterable[Dict[str, Any]], custom_replacements: Optional[Dict[str, str]] = None, dictionary_paths: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """文章分割・結合・テキスト修正を1回の走査で行う
+
+    split_transcript_by_sentence → merge_transcript_until_period → fix_transcript_text と同じ処理を、
+    中間リストを作らずにチャンクごとに逐次処理する。
 
-        # 置換処理
-        for pattern, replacement in default_replacements.items():
-            if pattern.startswith("r'") and pattern.endswith("'"):
-                # 正規表現パターン
-                regex_pattern = pattern[2:-1]  # r'...' の部分を取り出し
-                text = re.sub(regex_pattern, replacement, text)
-            else:
-                # 通常の文字列置換
-                text = text.replace(pattern, replacement)
+    Args:
+        transcript_chunks: 元の字幕チャンク（取得途中のイテレーターでもよい）
+        custom_replacements: カスタム置換辞書
+        dictionary_paths: 置換辞書ファイル（未指定時は設定の TRANSCRIPT_DICTIONARY_PATH）
+
+    Returns:
+        文章単位に整形・修正された字幕チャンク
+    """
+    return list(segment_transcript(transcript_chunks, get_transcript_normalizer(dictionary_paths, custom_replacements)))
 
-        # 連続する空白を単一に
-        text = re.sub(r"\s+", " ", text).strip()
 
-        # 結果に追加
-        if text:  # 空文字でない場合のみ
-            result.append({"text": text, "start": chunk.get("start", 0), "duration": chunk.get("duration", 0)})
+def get_processed_transcript(
+    transcript_result: Dict[str, Any],
+    custom_replacements: Optional[Dict[str, str]] = None,
+    dictionary_paths: Optional[List[str]] = None,
+    cache: Optional[TranscriptCache] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """extract_youtube_transcript の結果から処理済み字幕を取得（同じ辞書で処理済みのものがキャッシュにあれば再利用）
 
-    return result
+    Args:
+        transcript_result: extract_youtube_transcript の戻り値
+        custom_replacements: カスタム置換辞書
+        dictionary_paths: 置換辞書ファイル（未指定時は設定の TRANSCRIPT_DICTIONARY_PATH）
+        cache: 字幕キャッシュ（未指定時は共有キャッシュ）
+        use_cache: キャッシュを参照・保存するかどうか
+
+    Returns:
+        文章単位に整形・修正された字幕チャンク
+    """
+    normalizer = get_transcript_normalizer(dictionary_paths, custom_replacements)
+    signature = f"v{TRANSCRIPT_PROCESSING_VERSION}:{normalizer.signature}"
+    cache_key = (transcript_result.get("video_id"), transcript_result.get("language"), transcript_result.get("is_generated", False))
+
+    if use_cache and cache_key[0]:
+        if cache is None:
+            cache = get_default_transcript_cache()
+        processed = cache.get_processed(*cache_key, signature)
+        if processed is not None:
+            print(f"DEBUG: 処理済み字幕のキャッシュを使用 - {cache_key[0]}")
+            return processed
+
+    processed = list(segment_transcript(transcript_result.get("transcript") or [], normalizer))
+    if use_cache and cache_key[0]:
+        cache.put_processed(*cache_key, signature, processed)
+    return processed
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""字幕の取得元（YouTube / ローカルファイル）
+
+字幕トラックの一覧取得と1トラックの取得を TranscriptTransport に分け、どのトラックを使うかは TranscriptFetcher が
+一覧から1回だけ選ぶ。一覧の取得と選んだトラックの取得の2回で済み、言語ごとに取得を試す必要がない。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from youtube_transcript_api import YouTubeTranscriptApi
+
+
+class TranscriptUnavailableError(Exception):
+    """指定した動画の字幕を取得できない"""
+
+
+class TranscriptTrack(BaseModel):
+    """動画で利用できる字幕トラック"""
+
+    language: str = ""
+    language_code: str
+    is_generated: bool = False
+    is_translatable: bool = False
+    handle: Any = Field(default=None, exclude=True)  # 取得元ごとのトラックのオブジェクト
+
+    def to_language_info(self) -> Dict[str, Any]:
+        return {"language": self.language, "language_code": self.language_code, "is_generated": self.is_generated, "is_translatable": self.is_translatable}
+
+
+class TranscriptFetchResult(BaseModel):
+    """取得した字幕と言語情報"""
+
+    video_id: str
+    language: str  # 優先言語のどれで取得したか（優先言語になく任意の言語で取得した場合は "auto"）
+    language_code: str = ""  # 実際に取得した字幕の言語コード
+    is_generated: bool = False
+    transcript: List[Dict[str, Any]] = Field(default_factory=list)
+    available_languages: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+def select_transcript_track(tracks: List[TranscriptTrack], languages: List[str]) -> Optional[TranscriptTrack]:
+    """一覧から使用する字幕トラックを選ぶ
+
+    languages の順に探し、同じ言語では手動字幕を自動生成字幕より優先する（TranscriptCache.get と同じ順序）。
+    どれもなければ先頭の手動字幕、次に先頭の自動生成字幕。
+    """
+    by_key = {(track.language_code, track.is_generated): track for track in reversed(tracks)}
+    for lang in languages:
+        for is_generated in (False, True):
+            if (lang, is_generated) in by_key:
+                return by_key[(lang, is_generated)]
+    manual_tracks = [track for track in tracks if not track.is_generated]
+    return (manual_tracks or tracks or [None])[0]
+
+
+class TranscriptTransport:
+    """字幕トラックの一覧と内容を取得する通信層のインターフェース"""
+
+    def list_tracks(self, video_id: str) -> List[TranscriptTrack]:
+        """
+        Raises:
+            TranscriptUnavailableError: 動画の字幕一覧を取得できない場合
+        """
+        raise NotImplementedError
+
+    def fetch_track(self, video_id: str, track: TranscriptTrack) -> List[Dict[str, Any]]:
+        """トラックの字幕チャンク（text/start/duration の辞書）を取得"""
+        raise NotImplementedError
+
+
+class YouTubeTranscriptTransport(TranscriptTransport):
+    """youtube-transcript-api で取得する（http_client に requests.Session を渡すと通信を差し替えられる）"""
+
+    def __init__(self, http_client: Optional[Any] = None):
+        self.api = YouTubeTranscriptApi(http_client=http_client)
+
+    def list_tracks(self, video_id: str) -> List[TranscriptTrack]:
+        try:
+            transcript_list = self.api.list(video_id)
+        except Exception as e:
+            raise TranscriptUnavailableError(f"字幕が見つかりません: {str(e)}") from e
+        return [
+            TranscriptTrack(
+                language=transcript.language,
+                language_code=transcript.language_code,
+                is_generated=transcript.is_generated,
+                is_translatable=transcript.is_translatable,
+                handle=transcript,
+            )
+            for transcript in transcript_list
+        ]
+
+    def fetch_track(self, video_id: str, track: TranscriptTrack) -> List[Dict[str, Any]]:
+        return track.handle.fetch().to_raw_data()
+
+
+class LocalTranscriptTransport(TranscriptTransport):
+    """ローカルのJSONファイルから取得する（ネットワークなしでの動作確認・テスト用）
+
+    {directory}/{video_id}.json に、字幕チャンクのリスト（日本語の手動字幕とみなす）または
+    {"transcripts": [{"language_code": "ja", "language": "日本語", "is_generated": false, "chunks": [...]}, ...]} を置く。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def list_tracks(self, video_id: str) -> List[TranscriptTrack]:
+        path = os.path.join(self.directory, f"{video_id}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise TranscriptUnavailableError(f"字幕が見つかりません: {str(e)}") from e
+
+        if isinstance(data, list):
+            data = {"transcripts": [{"language_code": "ja", "language": "日本語", "is_generated": False, "chunks": data}]}
+        return [
+            TranscriptTrack(
+                language=transcript.get("language", transcript["language_code"]),
+                language_code=transcript["language_code"],
+                is_generated=transcript.get("is_generated", False),
+                handle=transcript.get("chunks", []),
+            )
+            for transcript in data.get("transcripts", [])
+        ]
+
+    def fetch_track(self, video_id: str, track: TranscriptTrack) -> List[Dict[str, Any]]:
+        return track.handle
+
+
+class CountingTranscriptTransport(TranscriptTransport):
+    """別の取得元をラップし、一覧・取得のリクエスト数を数える（ベンチマーク用、latencyで1リクエストの遅延を模擬）"""
+
+    def __init__(self, transport: TranscriptTransport, latency: float = 0.0):
+        self.transport = transport
+        self.latency = latency
+        self.list_requests = 0
+        self.fetch_requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def requests(self) -> int:
+        return self.list_requests + self.fetch_requests
+
+    def list_tracks(self, video_id: str) -> List[TranscriptTrack]:
+        with self._lock:
+            self.list_requests += 1
+        time.sleep(self.latency)
+        return self.transport.list_tracks(video_id)
+
+    def fetch_track(self, video_id: str, track: TranscriptTrack) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.fetch_requests += 1
+        time.sleep(self.latency)
+        return self.transport.fetch_track(video_id, track)
+
+
+class TranscriptFetcher:
+    """字幕トラックの一覧を1回取得し、選んだ1トラックだけを取得する"""
+
+    def __init__(self, transport: TranscriptTransport):
+        self.transport = transport
+
+    def fetch(self, video_id: str, languages: List[str]) -> TranscriptFetchResult:
+        """languages の優先順位（同じ言語では手動字幕を優先）で字幕を取得する
+
+        Raises:
+            TranscriptUnavailableError: 字幕を取得できない場合
+        """
+        tracks = self.transport.list_tracks(video_id)
+        track = select_transcript_track(tracks, languages)
+        if track is None:
+            raise TranscriptUnavailableError(f"字幕が見つかりません: {video_id}")
+
+        try:
+            transcript = self.transport.fetch_track(video_id, track)
+        except TranscriptUnavailableError:
+            raise
+        except Exception as e:
+            raise TranscriptUnavailableError(f"字幕の取得に失敗しました: {str(e)}") from e
+
+        return TranscriptFetchResult(
+            video_id=video_id,
+            language=track.language_code if track.language_code in languages else "auto",
+            language_code=track.language_code,
+            is_generated=track.is_generated,
+            transcript=transcript,
+            available_languages=[track.to_language_info() for track in tracks],
+        )
+
+
+class YouTubeTranscriptFetcher(TranscriptFetcher):
+    """YouTubeから字幕を取得する"""
+
+    def __init__(self, http_client: Optional[Any] = None):
+        super().__init__(YouTubeTranscriptTransport(http_client))
+
+
+class LocalTranscriptFetcher(TranscriptFetcher):
+    """ローカルのJSONファイルから字幕を取得する（LocalTranscriptTransport を参照）"""
+
+    def __init__(self, directory: str):
+        super().__init__(LocalTranscriptTransport(directory))
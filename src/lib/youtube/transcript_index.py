@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""字幕チャンクの時間範囲インデックス"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Union
+
+from src.lib.youtube.columnar_transcript import ColumnarTranscript
+
+
+class TranscriptIntervalIndex:
+    """字幕チャンクを開始時刻順の配列で保持し、時間範囲と重なるチャンクを二分探索で取得する
+
+    開始時刻の配列と「終了時刻の累積最大値」の配列を持つ。累積最大値は単調増加になるため、
+    範囲 [start, end) と重なりうるチャンクの先頭・末尾をどちらも bisect で求められる（O(log n + k)）。
+    ColumnarTranscript の開始時刻・長さの配列から直接作成し、開始時刻順でない場合のみ並べ替えたコピーを持つ。
+    """
+
+    def __init__(self, transcript_chunks: Union[ColumnarTranscript, Iterable[Dict[str, Any]]]):
+        transcript = ColumnarTranscript.from_chunks(transcript_chunks)
+        if not transcript._is_sorted:
+            # 開始時刻が同じチャンクは元の順序を保つ（sortedは安定ソート）
+            transcript = transcript.take(sorted(range(len(transcript)), key=transcript.starts.__getitem__))
+        self.chunks = transcript
+        self.starts = array("d", transcript.starts)
+        self.ends = array("d", map(float.__add__, transcript.starts, transcript.durations))
+        self.max_ends = array("d")
+        max_end = float("-inf")
+        for end in self.ends:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def overlapping_indices(self, start_time: float, end_time: float) -> List[int]:
+        """範囲 [start_time, end_time) と部分的にでも重なるチャンクのインデックス（開始時刻順）"""
+        # start < end_time を満たすのは先頭から hi 件
+        hi = bisect_left(self.starts, end_time)
+        # lo より前のチャンクは終了時刻がすべて start_time 以下
+        lo = bisect_right(self.max_ends, start_time, 0, hi)
+        return [i for i in range(lo, hi) if self.ends[i] > start_time]
+
+    def overlapping(self, start_time: float, end_time: float) -> List[Mapping]:
+        """範囲 [start_time, end_time) と部分的にでも重なるチャンク（開始時刻順）"""
+        return [self.chunks[i] for i in self.overlapping_indices(start_time, end_time)]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""字幕テキストの正規化（誤変換の置換・フィラー除去）
+
+置換辞書の全ての語を1つのトライ木から作った正規表現にまとめ、フィラー除去と合わせて1回の走査で置換する。
+正規表現は先頭文字から順に分岐するため、辞書の語数が増えても1文字あたりの処理量はほぼ一定になる。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.setting import env_setting
+
+# 既定の置換辞書（一般的な誤変換）
+DEFAULT_REPLACEMENTS = {
+    "トレサビリティ": "トレーサビリティ",
+    "脳水症": "農水省",
+    "ハカソ": "ハッカソン",
+    "チーム未来": "チームみらい",
+    "安野の高ひ": "安野たかひろ",
+    "安野高ひ": "安野たかひろ",
+}
+
+# 単独で現れた場合に除去するフィラー
+DEFAULT_FILLER_WORDS = ("あ", "えー", "うー", "んー")
+
+# バッチ処理でチャンクを連結する区切り文字（置換対象の語やフィラーの境界をまたがない）
+_CHUNK_SEPARATOR = "\x00"
+
+_WHITESPACE = re.compile(r"\s+")
+
+# プロセス内キャッシュの最大件数
+NORMALIZER_CACHE_SIZE = 16
+
+
+def _build_trie(words: Iterable[str]) -> Dict[str, Any]:
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True  # 語の終端
+    return trie
+
+
+def _trie_to_pattern(node: Dict[str, Any]) -> str:
+    alternatives = [re.escape(char) + _trie_to_pattern(child) for char, child in sorted(node.items()) if char]
+    if not alternatives:
+        return ""
+    pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    if "" in node:
+        # ここで終わる語もある場合は続きを省略可能にする（貪欲なので長い語が優先される）
+        return f"(?:{pattern})?"
+    return pattern
+
+
+def compile_word_pattern(words: Iterable[str]) -> str:
+    """語の集合をトライ木の形の正規表現にする（同じ位置では最も長い語に一致）"""
+    return _trie_to_pattern(_build_trie(word for word in words if word))
+
+
+class TranscriptNormalizer:
+    """置換辞書とフィラーをコンパイルした正規化器"""
+
+    def __init__(self, replacements: Optional[Dict[str, str]] = None, filler_words: Iterable[str] = DEFAULT_FILLER_WORDS):
+        self.replacements = {source: target for source, target in (replacements or {}).items() if source}
+        self.filler_words = tuple(filler_words)
+
+        patterns = []
+        if self.filler_words:
+            # \b と同じく、前後が単語構成文字でない場合のみフィラーとみなす
+            patterns.append(f"(?P<filler>(?<!\\w){compile_word_pattern(self.filler_words)}(?!\\w))")
+        if self.replacements:
+            patterns.append(f"(?P<word>{compile_word_pattern(self.replacements)})")
+        self._pattern = re.compile("|".join(patterns)) if patterns else None
+
+        # 同じ辞書・フィラーで処理した結果かどうかを判定するためのシグネチャ
+        payload = json.dumps([sorted(self.replacements.items()), list(self.filler_words)], ensure_ascii=False)
+        self.signature = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        if match.lastgroup == "filler":
+            return ""
+        return self.replacements[match.group()]
+
+    def normalize(self, text: str) -> str:
+        """1つのテキストを正規化（置換・フィラー除去・空白の整理）"""
+        if self._pattern is not None:
+            text = self._pattern.sub(self._replace, text)
+        return _WHITESPACE.sub(" ", text).strip()
+
+    def normalize_texts(self, texts: List[str]) -> List[str]:
+        """複数のテキストを連結して1回の走査で正規化"""
+        joined = _CHUNK_SEPARATOR.join(text.replace(_CHUNK_SEPARATOR, " ") for text in texts)
+        if self._pattern is not None:
+            joined = self._pattern.sub(self._replace, joined)
+        return [part.strip() for part in _WHITESPACE.sub(" ", joined).split(_CHUNK_SEPARATOR)]
+
+    def normalize_chunks(self, transcript_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """字幕チャンクのテキストを正規化し、空になったチャンクを除く"""
+        texts = self.normalize_texts([chunk.get("text", "") for chunk in transcript_chunks])
+        return [
+            {"text": text, "start": chunk.get("start", 0), "duration": chunk.get("duration", 0)} for chunk, text in zip(transcript_chunks, texts) if text  # 空文字でない場合のみ
+        ]
+
+
+def load_replacement_dictionary(path: str) -> Dict[str, str]:
+    """置換辞書ファイルを読み込む
+
+    JSONは {"誤": "正"} または [["誤", "正"], ...]、それ以外はタブ区切り（1行に「誤<TAB>正」、#で始まる行はコメント）。
+
+    Raises:
+        ValueError: 辞書の形式が正しくない場合
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        if path.lower().endswith(".json"):
+            data = json.load(f)
+            if isinstance(data, dict):
+                return {str(source): str(target) for source, target in data.items()}
+            if isinstance(data, list) and all(isinstance(item, list) and len(item) == 2 for item in data):
+                return {str(source): str(target) for source, target in data}
+            raise ValueError(f"置換辞書の形式が正しくありません: {path}")
+
+        replacements = {}
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            source, separator, target = line.partition("\t")
+            if not separator:
+                raise ValueError(f"置換辞書の形式が正しくありません: {path}:{line_number}")
+            replacements[source] = target
+        return replacements
+
+
+def _dictionary_key(path: str) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+_cache: "OrderedDict[Tuple, TranscriptNormalizer]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_transcript_normalizer(dictionary_paths: Optional[List[str]] = None, custom_replacements: Optional[Dict[str, str]] = None) -> TranscriptNormalizer:
+    """既定の辞書・辞書ファイル・カスタム置換（後のものが優先）をコンパイルした正規化器を取得
+
+    辞書ファイルはサイズと更新日時をキーにキャッシュするため、ファイルを更新すると次回の呼び出しで再コンパイルされる。
+    dictionary_paths を省略した場合は env_setting.TRANSCRIPT_DICTIONARY_PATH を使う。
+    """
+    if dictionary_paths is None:
+        dictionary_paths = [env_setting.TRANSCRIPT_DICTIONARY_PATH] if env_setting.TRANSCRIPT_DICTIONARY_PATH else []
+    dictionary_keys = tuple(_dictionary_key(path) for path in dictionary_paths)
+    key = (dictionary_keys, tuple(sorted((custom_replacements or {}).items())))
+
+    with _cache_lock:
+        normalizer = _cache.get(key)
+        if normalizer is not None:
+            _cache.move_to_end(key)
+            return normalizer
+
+    replacements = dict(DEFAULT_REPLACEMENTS)
+    for path, _, _ in dictionary_keys:
+        replacements.update(load_replacement_dictionary(path))
+    replacements.update(custom_replacements or {})
+    normalizer = TranscriptNormalizer(replacements)
+    print(f"DEBUG: 字幕正規化の辞書をコンパイル - 語数: {len(normalizer.replacements)}")
+
+    with _cache_lock:
+        _cache[key] = normalizer
+        while len(_cache) > NORMALIZER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return normalizer
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""字幕チャンクの文単位への分割・結合（ジェネレーターによる逐次処理）"""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.lib.youtube.transcript_normalizer import TranscriptNormalizer
+
+# 文末記号（連続する記号と直後の閉じ括弧・引用符も文に含める）。ASCIIの "." は小数点などを除くため空白か末尾の直前のみ
+SENTENCE_END = re.compile(r"(?:[。！？!?]+|\.(?=[\s」』）)\"']|$))[」』）)\"']*")
+_SENTENCE_END_AT_TAIL = re.compile(r"(?:[。！？!?]+|\.)[」』）)\"']*\s*$")
+
+
+def ends_sentence(text: str) -> bool:
+    """テキストが文末記号で終わっているかどうか"""
+    return _SENTENCE_END_AT_TAIL.search(text) is not None
+
+
+def iter_sentence_pieces(text: str, start: float, duration: float) -> Iterator[Tuple[str, float, float, bool]]:
+    """チャンクのテキストを文末記号の直後で分割し、durationを文字数の比率で配分する
+
+    Returns:
+        (テキスト, 開始, 長さ, 文末かどうか) のイテレーター（空白のみの断片は除く）
+    """
+    total_len = len(text)
+    position = 0
+    offset = 0.0
+    for match in SENTENCE_END.finditer(text):
+        piece = text[position : match.end()]
+        piece_duration = duration * len(piece) / total_len
+        yield piece, start + offset, piece_duration, True
+        position = match.end()
+        offset += piece_duration
+
+    rest = text[position:]
+    if rest.strip():
+        yield rest, start + offset, duration - offset, False
+
+
+class SentenceSegmenter:
+    """字幕チャンクを受け取るたびに、完成した文を返す
+
+    チャンクを文末記号で分割し、文末までの断片を結合して1文にする。normalizerを指定した場合は完成した文ごとに正規化し、
+    空になった文は返さない。チャンクが届くたびに feed() を呼び、最後に flush() で残りを取り出す。
+    """
+
+    def __init__(self, normalizer: Optional[TranscriptNormalizer] = None):
+        self.normalizer = normalizer
+        self._texts: List[str] = []
+        self._start = 0.0
+        self._duration = 0.0
+
+    def _emit(self) -> Optional[Dict[str, Any]]:
+        if not self._texts:
+            return None
+        text = "".join(self._texts)
+        sentence = {"text": text, "start": round(self._start, 3), "duration": round(self._duration, 3)}
+        self._texts = []
+        self._duration = 0.0
+        if self.normalizer is not None:
+            sentence["text"] = self.normalizer.normalize(text)
+            if not sentence["text"]:
+                return None
+        return sentence
+
+    def feed(self, chunk: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """チャンクを1つ追加し、このチャンクで完成した文を返す"""
+        for piece, start, duration, is_sentence_end in iter_sentence_pieces(chunk.get("text", ""), chunk.get("start", 0), chunk.get("duration", 0)):
+            if not self._texts:
+                self._start = start
+            self._texts.append(piece)
+            self._duration += duration
+            if is_sentence_end:
+                sentence = self._emit()
+                if sentence is not None:
+                    yield sentence
+
+    def flush(self) -> Iterator[Dict[str, Any]]:
+        """文末記号で終わっていない残りを1文として返す"""
+        sentence = self._emit()
+        if sentence is not None:
+            yield sentence
+
+
+def segment_transcript(transcript_chunks: Iterable[Dict[str, Any]], normalizer: Optional[TranscriptNormalizer] = None) -> Iterator[Dict[str, Any]]:
+    """字幕チャンクを1回の走査で文単位に分割・結合（normalizer指定時は正規化も）する"""
+    segmenter = SentenceSegmenter(normalizer)
+    for chunk in transcript_chunks:
+        yield from segmenter.feed(chunk)
+    yield from segmenter.flush()
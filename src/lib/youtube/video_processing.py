@@ -1,11 +1,32 @@
 # -*- coding: utf-8 -*-
 """動画処理・編集用ツール"""
 
+import io
 import os
 import tempfile
-from typing import Dict, List, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 import ffmpeg
 from src.agent_sdk.schemas.youtube import VideoProcessingResult
+from src.lib.youtube.ffmpeg_progress import EncodeProgress, ProgressTracker, run_ffmpeg
+from src.lib.youtube.media_probe import get_media_duration, probe_media
+from src.lib.youtube.media_store import get_default_media_store
+from src.lib.youtube.render_cache import SegmentRenderCache, fingerprint_source, get_default_render_cache
+from src.lib.youtube.render_profiles import RenderProfile, get_render_profile
+from src.lib.youtube.source_clips import SourceClipIndex
+from src.lib.youtube.subtitle_alignment import align_scenario_subtitles
+from src.lib.youtube.subtitle_overlay import SUBTITLE_RENDERERS, apply_subtitle_overlays, prepare_overlay_images, read_subtitle_cues
+from src.lib.youtube.subtitle_writers import (  # noqa: F401  format_*_time は従来どおりこのモジュールからも利用できる
+    SUBTITLE_FORMATS,
+    create_subtitle_writer,
+    format_ass_time,
+    format_srt_time,
+    format_vtt_time,
+    open_subtitle_writers,
+    write_subtitles,
+)
+from src.lib.youtube.transcript_index import TranscriptIntervalIndex
+from src.lib.youtube.working_storage import estimate_intermediate_bytes, is_tmpfs_path, working_directory
 
 
 def get_system_font_path() -> str:
@@ -29,6 +50,536 @@ def get_system_font_path() -> str:
         return ""
 
 
+def get_default_segment_workers(encoder_threads: int = 4) -> int:
+    """CPUコア数とlibx264のスレッド使用量からセグメント並列数の既定値を求める"""
+    cpu_count = os.cpu_count() or 1
+    return max(1, cpu_count // max(1, encoder_threads))
+
+
+# SRT/VTT字幕を焼き込む際のスタイル（ASSはファイル内にスタイルを埋め込み済み）
+SUBTITLE_FORCE_STYLE = "Fontsize=48,Bold=1,OutlineColour=&H00000000,Outline=3,Shadow=2,MarginV=120,Alignment=2"
+
+RENDER_MODES = ("multi_pass", "single_pass")
+
+# 進捗を通知する間隔（秒）。ワーカースレッドの進捗はこの間隔で呼び出し元スレッドから通知する
+PROGRESS_POLL_INTERVAL = 0.5
+
+# 出力動画の長さに対する各パスの処理時間の目安（進捗率の重み）
+CONCAT_STAGE_WEIGHT = 0.02
+SUBTITLE_STAGE_WEIGHT = 1.0
+BGM_STAGE_WEIGHT = 0.1
+
+
+def _to_vertical_layout(video_stream, width: int = 1080, height: int = 1920):
+    """映像ストリームを縦動画レイアウト（既定は1080x1920）に変換するフィルタを追加"""
+    # 元動画のアスペクト比を保持してリサイズ（縦動画内に収まるように）
+    video_stream = video_stream.filter("scale", w=width, h=width, force_original_aspect_ratio="decrease")
+
+    # 縦動画キャンバスを作成し、中央に元動画を配置
+    return video_stream.filter("pad", w=width, h=height, x="(ow-iw)/2", y="(oh-ih)/2", color="black")
+
+
+def _apply_subtitles(video_stream, subtitle_path: str, profile: RenderProfile, subtitle_renderer: str = "libass", image_dir: Optional[str] = None):
+    """映像ストリームに字幕を焼き込むフィルタを追加（パスのエスケープはffmpeg-pythonが行う）
+
+    subtitle_renderer="overlay" の場合は字幕ごとの画像を image_dir に描画し、overlayフィルタで合成する。
+    """
+    if subtitle_renderer == "overlay":
+        overlay_images = prepare_overlay_images(read_subtitle_cues(subtitle_path), image_dir, profile.width, profile.height)
+        return apply_subtitle_overlays(video_stream, overlay_images)
+    if subtitle_path.lower().endswith(".ass"):
+        return video_stream.filter("subtitles", subtitle_path)
+    return video_stream.filter("subtitles", subtitle_path, force_style=SUBTITLE_FORCE_STYLE)
+
+
+def _render_segment(
+    source_video_path: str,
+    start_time: float,
+    end_time: float,
+    segment_path: str,
+    has_audio: bool,
+    profile: RenderProfile,
+    on_progress: Optional[Callable[[EncodeProgress], None]] = None,
+) -> bool:
+    """1セグメントを縦動画レイアウトで切り出す（ワーカースレッドから呼ばれる）
+
+    Returns:
+        セグメントファイルが作成されたかどうか
+    """
+    try:
+        # ffmpegで切り出し（縦動画レイアウト）
+        input_stream = ffmpeg.input(source_video_path, ss=start_time, to=end_time)
+        video_stream = _to_vertical_layout(input_stream.video, profile.width, profile.height)
+
+        # テキストオーバーレイは一時的に無効化中
+
+        if has_audio:
+            audio_stream = input_stream.audio
+            cmd = ffmpeg.output(video_stream, audio_stream, segment_path, **profile.video_kwargs(), **profile.audio_kwargs()).overwrite_output()
+        else:
+            cmd = ffmpeg.output(video_stream, segment_path, **profile.video_kwargs()).overwrite_output()
+
+        try:
+            run_ffmpeg(cmd, on_progress)
+            print(f"DEBUG: セグメント処理完了: {segment_path}")
+        except ffmpeg.Error as e:
+            print(f"DEBUG: FFmpeg エラー - stdout: {e.stdout}")
+            print(f"DEBUG: FFmpeg エラー - stderr: {e.stderr}")
+            return False
+
+    except Exception as e:
+        print(f"DEBUG: セグメント処理エラー ({segment_path}): {e}")
+        import traceback
+
+        print(f"DEBUG: スタックトレース: {traceback.format_exc()}")
+        return False
+
+    # ファイルが実際に作成されたかチェック
+    if not os.path.exists(segment_path):
+        print(f"DEBUG: ファイルが作成されませんでした: {segment_path}")
+        return False
+
+    print(f"DEBUG: 作成されたファイルサイズ: {os.path.getsize(segment_path)} bytes")
+    return True
+
+
+def _render_single_pass(
+    source_video_path: str,
+    segments: List[Dict[str, float]],
+    output_path: str,
+    has_audio: bool,
+    profile: RenderProfile,
+    subtitle_path: Optional[str] = None,
+    bgm_path: Optional[str] = None,
+    on_progress: Optional[Callable[[EncodeProgress], None]] = None,
+    subtitle_renderer: str = "libass",
+    image_dir: Optional[str] = None,
+    source_clips: Optional[SourceClipIndex] = None,
+) -> None:
+    """全カットを1つのfilter_complexで構成し、1回のエンコードで出力する
+
+    カット毎の入力シーク → 縦動画レイアウト → concat → subtitles → amix(BGM) を1グラフにまとめるため、
+    セグメントファイルや結合ファイルなどの中間ファイルを作らない。
+    trim/atrimで1入力を切り分けると長尺ソースを先頭からデコードすることになるため、カット毎に入力シークする。
+    source_clipsを指定した場合は、各カットを含むクリップを入力にする。
+    """
+    concat_inputs = []
+    for segment in segments:
+        input_path, start_time, end_time = _locate_cut(source_video_path, source_clips, segment["start_time"], segment["end_time"])
+        source = ffmpeg.input(input_path, ss=start_time, to=end_time)
+        concat_inputs.append(_to_vertical_layout(source.video, profile.width, profile.height))
+        if has_audio:
+            concat_inputs.append(source.audio)
+
+    if has_audio:
+        joined = ffmpeg.concat(*concat_inputs, v=1, a=1).node
+        video_stream, audio_stream = joined[0], joined[1]
+    else:
+        video_stream, audio_stream = ffmpeg.concat(*concat_inputs, v=1, a=0), None
+
+    if subtitle_path and os.path.exists(subtitle_path):
+        video_stream = _apply_subtitles(video_stream, subtitle_path, profile, subtitle_renderer, image_dir)
+
+    if bgm_path and os.path.exists(bgm_path):
+        bgm_stream = ffmpeg.input(bgm_path).audio.filter("volume", 0.2)
+        if audio_stream is not None:
+            audio_stream = ffmpeg.filter([audio_stream, bgm_stream], "amix", inputs=2, duration="first", dropout_transition=2)
+        else:
+            audio_stream = bgm_stream.filter("atrim", duration=sum(seg["end_time"] - seg["start_time"] for seg in segments))
+
+    streams = [video_stream] if audio_stream is None else [video_stream, audio_stream]
+    output_kwargs = profile.video_kwargs()
+    if audio_stream is not None:
+        output_kwargs.update(profile.audio_kwargs())
+
+    cmd = ffmpeg.output(*streams, output_path, **output_kwargs).overwrite_output()
+    print(f"DEBUG: シングルパス FFmpeg コマンド: {' '.join(cmd.get_args())}")
+    run_ffmpeg(cmd, on_progress)
+
+
+def resolve_source_video_path(source_video_path: Optional[str] = None, source_media_key: Optional[str] = None) -> Optional[str]:
+    """元動画のパスを決定する（source_media_key指定時は元動画ストアから探し、なければsource_video_pathを使う）"""
+    if source_media_key:
+        entry = get_default_media_store().get(source_media_key)
+        if entry is not None and entry.video_path:
+            return entry.video_path
+        print(f"DEBUG: 元動画ストアに見つかりません - {source_media_key}")
+    return source_video_path or None
+
+
+def resolve_source_clips(source_clips: List[Dict[str, Any]]) -> SourceClipIndex:
+    """クリップ（SourceClipの辞書）の索引を作成する（パスにファイルがない場合はmedia_keyで元動画ストアから探し、見つからないクリップは除く）"""
+    clips = []
+    for clip in SourceClipIndex.from_dicts(source_clips).clips:
+        if not os.path.exists(clip.path) and clip.media_key:
+            entry = get_default_media_store().get(clip.media_key)
+            if entry is not None and entry.video_path:
+                clip = clip.copy(update={"path": entry.video_path})
+        if os.path.exists(clip.path):
+            clips.append(clip)
+        else:
+            print(f"DEBUG: クリップが見つかりません - {clip.path} ({clip.start_time:.2f}〜{clip.end_time:.2f}秒)")
+    return SourceClipIndex(clips)
+
+
+def _locate_cut(source_video_path: str, source_clips: Optional[SourceClipIndex], start_time: float, end_time: float) -> Tuple[str, float, float]:
+    """カットの入力ファイルと入力内の時刻（source_clips指定時はカットを含むクリップとクリップ内の時刻）"""
+    if source_clips is None:
+        return source_video_path, start_time, end_time
+    return source_clips.locate(start_time, end_time)
+
+
+def _resolve_render_source(
+    source_video_path: Optional[str], source_media_key: Optional[str], source_clips: Optional[List[Dict[str, Any]]], cut_segments: List[Dict[str, Any]]
+) -> Tuple[Optional[str], Optional[SourceClipIndex], Optional[str]]:
+    """レンダリングの入力を決定する
+
+    Returns:
+        (元動画のパス, クリップの索引（source_clips未指定時はNone）, エラーメッセージ（入力が見つからない場合）)
+    """
+    if source_clips:
+        clip_index = resolve_source_clips(source_clips)
+        missing_segments = clip_index.missing_segments(cut_segments)
+        if not len(clip_index) or missing_segments:
+            return None, None, f"カットを含むクリップが見つかりません（{len(missing_segments)}個のカット）"
+        return source_video_path or None, clip_index, None
+
+    source_video_path = resolve_source_video_path(source_video_path, source_media_key)
+    if not source_video_path or not os.path.exists(source_video_path):
+        return None, None, "元動画ファイルが見つかりません"
+    return source_video_path, None, None
+
+
+def get_keyframe_times(video_path: str) -> List[float]:
+    """映像ストリームのキーフレーム位置（秒）を取得（サイドカーにも保存して再利用）"""
+    return probe_media(video_path, with_keyframes=True, use_sidecar=True).keyframes or []
+
+
+def _plan_smart_cut(start_time: float, end_time: float, keyframes: List[float]) -> List[Dict[str, Any]]:
+    """カット範囲をGOP単位のコピー区間と境界の再エンコード区間に分割する
+
+    Returns:
+        {"start", "end", "copy"} のリスト（copy=Trueはストリームコピー）
+    """
+    first_key = next((k for k in keyframes if k >= start_time), None)
+    last_key = next((k for k in reversed(keyframes) if k <= end_time), None)
+
+    # カット内に完全なGOPがない場合は全体を再エンコード
+    if first_key is None or last_key is None or first_key >= last_key:
+        return [{"start": start_time, "end": end_time, "copy": False}]
+
+    parts = []
+    if first_key > start_time:
+        parts.append({"start": start_time, "end": first_key, "copy": False})
+    parts.append({"start": first_key, "end": last_key, "copy": True})
+    if end_time > last_key:
+        parts.append({"start": last_key, "end": end_time, "copy": False})
+    return parts
+
+
+def create_preview_video(
+    source_video_path: str,
+    cut_segments: List[Dict[str, Any]],
+    output_path: Optional[str] = None,
+    progress_callback: Optional[callable] = None,
+    source_clips: Optional[SourceClipIndex] = None,
+) -> VideoProcessingResult:
+    """スマートカットでプレビュー動画を高速に作成する
+
+    キーフレーム位置を入力ごとに一度だけ取得し、カット内の完全なGOPは映像をストリームコピー、
+    カット境界の不完全なGOPのみ元動画と同じ解像度・コーデックで再エンコードする。
+    音声は結合する全区間でコーデック・サンプルレート・チャンネル数を揃えるため、コピーする区間も含めてAACに再エンコードする。
+    縦動画レイアウト・字幕・BGMは適用しない（元動画のアスペクト比のまま）。
+    source_clipsを指定した場合は、各カットを含むクリップを入力にする（クリップは同じフォーマットでダウンロードしたもの）。
+    """
+    try:
+        if output_path is None:
+            output_dir = tempfile.mkdtemp()
+            output_path = os.path.join(output_dir, "preview.mp4")
+
+        source_info = probe_media(source_clips.paths[0] if source_clips is not None else source_video_path)
+        if not source_info.has_video:
+            return VideoProcessingResult(success=False, error="元動画に映像ストリームがありません")
+
+        # ストリームコピーした区間と結合できるのは、再エンコード側も同じコーデックで出力できる場合のみ
+        can_copy = source_info.video_codec == "h264"
+        keyframes_by_input: Dict[str, List[float]] = {}
+        print(f"DEBUG: スマートカット - コピー可能: {can_copy}")
+
+        # 元の音声（opusなど）のままコピーすると再エンコード区間のAACと混在して結合できないため、音声は常に再エンコードする
+        audio_kwargs = {"acodec": "aac", "ar": source_info.sample_rate or 44100, "ac": source_info.channels or 2} if source_info.has_audio else {}
+        copy_kwargs = {"vcodec": "copy", **audio_kwargs}
+        encode_kwargs = {
+            "vcodec": "libx264",
+            "preset": "ultrafast",
+            "crf": 23,
+            "s": f"{source_info.width}x{source_info.height}",
+            "pix_fmt": source_info.pix_fmt or "yuv420p",
+            **audio_kwargs,
+        }
+
+        with working_directory(estimate_intermediate_bytes(sum(max(0, seg.get("end_time", 0) - seg.get("start_time", 0)) for seg in cut_segments))) as temp_dir:
+            part_files = []
+            copied_seconds = 0.0
+            encoded_seconds = 0.0
+
+            valid_segments = [seg for seg in cut_segments if seg.get("end_time", 0) > seg.get("start_time", 0)]
+            for i, segment in enumerate(valid_segments):
+                if progress_callback:
+                    progress_callback(f"プレビュー セグメント {i+1}/{len(valid_segments)} を処理中...", (i / len(valid_segments)) * 0.9)
+
+                input_path, start_time, end_time = _locate_cut(source_video_path, source_clips, segment["start_time"], segment["end_time"])
+                if can_copy and input_path not in keyframes_by_input:
+                    keyframes_by_input[input_path] = get_keyframe_times(input_path)
+                    print(f"DEBUG: スマートカット - キーフレーム数: {len(keyframes_by_input[input_path])} ({input_path})")
+                parts = _plan_smart_cut(start_time, end_time, keyframes_by_input[input_path]) if can_copy else [{"start": start_time, "end": end_time, "copy": False}]
+                for part in parts:
+                    part_path = os.path.join(temp_dir, f"part_{len(part_files):04d}.ts")
+                    duration = part["end"] - part["start"]
+                    if part["copy"]:
+                        # キーフレーム位置から正確に開始するよう、わずかに後ろへシークする
+                        (
+                            ffmpeg.input(input_path, ss=part["start"] + 0.001, t=duration)
+                            .output(part_path, avoid_negative_ts="make_zero", f="mpegts", **copy_kwargs)
+                            .overwrite_output()
+                            .run(capture_stdout=True, capture_stderr=True)
+                        )
+                        copied_seconds += duration
+                    else:
+                        (
+                            ffmpeg.input(input_path, ss=part["start"], t=duration)
+                            .output(part_path, f="mpegts", **encode_kwargs)
+                            .overwrite_output()
+                            .run(capture_stdout=True, capture_stderr=True)
+                        )
+                        encoded_seconds += duration
+                    part_files.append(part_path)
+
+            if not part_files:
+                return VideoProcessingResult(success=False, error=f"有効なセグメントが見つかりませんでした。処理されたセグメント数: {len(cut_segments)}")
+
+            if progress_callback:
+                progress_callback("プレビューを結合中...", 0.9)
+
+            concat_file_path = os.path.join(temp_dir, "concat_list.txt")
+            with open(concat_file_path, "w", encoding="utf-8") as f:
+                for part_file in part_files:
+                    f.write(f"file '{part_file}'\n")
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            (ffmpeg.input(concat_file_path, format="concat", safe=0).output(output_path, c="copy").overwrite_output().run(capture_stdout=True, capture_stderr=True))
+
+        if progress_callback:
+            progress_callback("完了!", 1.0)
+
+        return VideoProcessingResult(
+            success=True,
+            output_path=output_path,
+            video_info=get_video_info(output_path),
+            segments_processed=len(valid_segments),
+            processing_details={
+                "subtitle_added": False,
+                "bgm_added": False,
+                "format": "mp4",
+                "quality": "draft",
+                "render_mode": "smart_cut",
+                "copied_seconds": round(copied_seconds, 3),
+                "encoded_seconds": round(encoded_seconds, 3),
+            },
+        )
+
+    except ffmpeg.Error as e:
+        return VideoProcessingResult(success=False, error=f"プレビュー作成エラー: {e.stderr.decode('utf-8', errors='ignore')[-500:] if e.stderr else str(e)}")
+    except Exception as e:
+        return VideoProcessingResult(success=False, error=f"プレビュー作成エラー: {str(e)}")
+
+
+def _add_segment_stages(tracker: ProgressTracker, segment_jobs: List[tuple]) -> None:
+    """セグメントジョブごとの進捗ステージを登録（重みはセグメントの長さ）"""
+    for i, start_time, end_time, _ in segment_jobs:
+        tracker.add_stage(f"segment_{i}", weight=end_time - start_time, duration=end_time - start_time, label=f"セグメント {i+1} をエンコード中")
+
+
+def _add_finalize_stages(tracker: ProgressTracker, output_duration: float, subtitle_path: Optional[str], bgm_path: Optional[str], prefix: str = "") -> None:
+    """結合（字幕・BGMを含む）の進捗ステージを登録"""
+    if subtitle_path and os.path.exists(subtitle_path):
+        weight, label = SUBTITLE_STAGE_WEIGHT, "結合・字幕を追加中"
+    elif bgm_path and os.path.exists(bgm_path):
+        weight, label = BGM_STAGE_WEIGHT, "結合・BGMを追加中"
+    else:
+        weight, label = CONCAT_STAGE_WEIGHT, "セグメントを結合中"
+    tracker.add_stage(f"{prefix}finalize", weight=output_duration * weight, duration=output_duration, label=label)
+
+
+def _render_segments(
+    source_video_path: str,
+    segment_jobs: List[tuple],
+    profile: RenderProfile,
+    has_audio: bool,
+    worker_count: int,
+    render_cache: Optional[SegmentRenderCache] = None,
+    tracker: Optional[ProgressTracker] = None,
+    source_clips: Optional[SourceClipIndex] = None,
+) -> tuple:
+    """セグメントジョブ (インデックス, 開始, 終了, 出力パス) を並列にエンコードする
+
+    render_cacheを指定した場合はキャッシュ済みのセグメントを出力パスにリンクして再利用し、新たに作成したセグメントをキャッシュへ登録する。
+    trackerには _add_segment_stages で登録したステージの進捗を反映する。
+    source_clipsを指定した場合は、各セグメントを含むクリップから切り出す（キャッシュのキーはクリップとクリップ内の時刻）。
+
+    Returns:
+        (インデックス→セグメントパスの辞書, キャッシュヒット数, キャッシュから再利用したセグメントのバイト数)
+    """
+    rendered_segments = {}
+    segment_cache_keys = {}
+    cache_hits = 0
+    reused_segment_bytes = 0
+    # 各セグメントの入力ファイルと入力内の時刻
+    segment_inputs = {i: _locate_cut(source_video_path, source_clips, start_time, end_time) for i, start_time, end_time, _ in segment_jobs}
+    if render_cache is not None:
+        source_fingerprints: Dict[str, str] = {}
+        encode_params = dict(profile.cache_params(), has_audio=has_audio)
+        pending_jobs = []
+        for job in segment_jobs:
+            i = job[0]
+            input_path, start_time, end_time = segment_inputs[i]
+            if input_path not in source_fingerprints:
+                source_fingerprints[input_path] = fingerprint_source(input_path)
+            segment_cache_keys[i] = render_cache.make_key(source_fingerprints[input_path], start_time, end_time, encode_params)
+            cached_path = render_cache.get(segment_cache_keys[i], job[3])
+            if cached_path:
+                print(f"DEBUG: セグメント {i+1} キャッシュヒット: {cached_path}")
+                rendered_segments[i] = cached_path
+                reused_segment_bytes += os.path.getsize(cached_path)
+                cache_hits += 1
+                if tracker:
+                    tracker.complete_stage(f"segment_{i}", cached=True)
+            else:
+                pending_jobs.append(job)
+    else:
+        pending_jobs = segment_jobs
+
+    if pending_jobs:
+        if tracker:
+            tracker.flush()
+
+        executor = ThreadPoolExecutor(max_workers=worker_count)
+        try:
+            futures = {
+                executor.submit(
+                    _render_segment,
+                    *segment_inputs[i],
+                    segment_path,
+                    has_audio,
+                    profile,
+                    tracker.stage_callback(f"segment_{i}") if tracker else None,
+                ): (i, segment_path)
+                for i, _, _, segment_path in pending_jobs
+            }
+
+            # ワーカーの進捗は一定間隔で呼び出し元スレッドから通知する
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, timeout=PROGRESS_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, segment_path = futures[future]
+                    if future.result():
+                        if render_cache is not None:
+                            render_cache.put(segment_cache_keys[i], segment_path)
+                        rendered_segments[i] = segment_path
+                    if tracker:
+                        tracker.complete_stage(f"segment_{i}")
+                if tracker:
+                    tracker.flush()
+        finally:
+            # 例外時は未着手のジョブを破棄する
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    return rendered_segments, cache_hits, reused_segment_bytes
+
+
+def _finalize_short_video(
+    segment_files: List[str],
+    temp_dir: str,
+    output_path: str,
+    subtitle_path: Optional[str],
+    bgm_path: Optional[str],
+    video_format: str,
+    profile: RenderProfile,
+    has_audio: bool,
+    tracker: Optional[ProgressTracker] = None,
+    stage_prefix: str = "",
+    flush_progress: bool = True,
+    subtitle_renderer: str = "libass",
+) -> Optional[str]:
+    """エンコード済みセグメントを結合し、字幕・BGMを追加して output_path に出力する
+
+    結合・字幕・BGMは concat demuxer を入力とする1回のffmpegで行い、merged/with_subs/with_bgm などの中間ファイルを作らない。
+    字幕がない場合は映像を再エンコードせずにコピーする。
+    subtitle_renderer="overlay" の場合、字幕画像は temp_dir に描画する。
+    出力は output_path と同じディレクトリの一時ファイルに書き込み、完了後に置き換える。
+
+    trackerには _add_finalize_stages で登録したステージの進捗を反映する。
+    ワーカースレッドから呼ぶ場合は flush_progress=False とし、通知は呼び出し元スレッドで行う。
+
+    Returns:
+        エラーメッセージ（成功時はNone）
+    """
+    on_progress = None
+    if tracker is not None:
+        update = tracker.stage_callback(f"{stage_prefix}finalize")
+
+        def on_progress(progress: EncodeProgress) -> None:
+            update(progress)
+            if flush_progress:
+                tracker.flush()
+
+    # セグメント結合用のファイルリスト作成
+    concat_file_path = os.path.join(temp_dir, "concat_list.txt")
+    with open(concat_file_path, "w", encoding="utf-8") as f:
+        for segment_file in segment_files:
+            f.write(f"file '{segment_file}'\n")
+
+    merged = ffmpeg.input(concat_file_path, format="concat", safe=0)
+    video_stream = merged.video
+    audio_stream = merged.audio if has_audio else None
+    output_kwargs: Dict[str, Any] = {"vcodec": "copy"}
+
+    # 字幕追加（必要に応じて）
+    if subtitle_path and os.path.exists(subtitle_path):
+        video_stream = _apply_subtitles(video_stream, subtitle_path, profile, subtitle_renderer, os.path.join(temp_dir, "subtitle_images"))
+        output_kwargs = profile.video_kwargs()
+
+    # BGM追加（必要に応じて）
+    if bgm_path and os.path.exists(bgm_path):
+        bgm_stream = ffmpeg.input(bgm_path).audio.filter("volume", 0.2)
+        if audio_stream is not None:
+            audio_stream = ffmpeg.filter([audio_stream, bgm_stream], "amix", inputs=2, duration="first", dropout_transition=2)
+        else:
+            audio_stream = bgm_stream
+            output_kwargs["shortest"] = None
+        output_kwargs.update(profile.audio_kwargs())
+    elif audio_stream is not None:
+        output_kwargs["acodec"] = "copy"
+
+    streams = [video_stream] if audio_stream is None else [video_stream, audio_stream]
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    output_root, output_ext = os.path.splitext(output_path)
+    partial_path = f"{output_root}.partial{output_ext or '.' + video_format}"
+    try:
+        run_ffmpeg(ffmpeg.output(*streams, partial_path, **output_kwargs).overwrite_output(), on_progress)
+        os.replace(partial_path, output_path)
+    except Exception as e:
+        print(f"DEBUG: セグメント結合エラー: {e}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        if isinstance(e, ffmpeg.Error) and e.stderr:
+            return f"セグメント結合エラー: {e.stderr.decode('utf-8', errors='ignore')[-500:]}"
+        return f"セグメント結合エラー: {str(e)}"
+
+    return None
+
+
 def create_short_video(
     source_video_path: str,
     cut_segments: List[Dict[str, Any]],  # 一時的に古い型を保持
@@ -39,23 +590,43 @@ def create_short_video(
     quality: str = "high",
     progress_callback: Optional[callable] = None,
     scenario_info: Optional[Dict[str, Any]] = None,  # 企画情報を追加
+    max_workers: Optional[int] = None,
+    render_mode: str = "multi_pass",
+    use_render_cache: bool = True,
+    render_cache: Optional[SegmentRenderCache] = None,
+    event_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    subtitle_renderer: str = "libass",
+    source_media_key: Optional[str] = None,
+    source_clips: Optional[List[Dict[str, Any]]] = None,
 ) -> VideoProcessingResult:
     """カットセグメントに基づいてショート動画を作成する
 
     Args:
-        source_video_path: 元動画ファイルのパス
+        source_video_path: 元動画ファイルのパス（source_media_keyを指定した場合はストアに見つからないときのみ使用）
         cut_segments: カットセグメントのリスト
         output_path: 出力ファイルパス
         subtitle_path: 字幕ファイルパス
         bgm_path: BGMファイルパス
         video_format: 出力フォーマット
-        quality: 動画品質
+        quality: 動画品質（"draft"の場合はスマートカットによるプレビューを作成し、字幕・BGMは適用しない）
         progress_callback: 進捗コールバック関数
+        max_workers: セグメントを並列エンコードするワーカー数（未指定時はCPU数から自動決定）
+        render_mode: "multi_pass"（セグメント毎にエンコードして結合）または "single_pass"（filter_complexで1回だけエンコード）
+        use_render_cache: multi_passで変更のないセグメントをキャッシュから再利用するかどうか
+        render_cache: 使用するセグメントキャッシュ（未指定時は共有キャッシュ）
+        event_callback: ffmpegの進捗（出力時間・fps・倍速）やパスの完了を通知する構造化イベントのコールバック
+        subtitle_renderer: 字幕の焼き込み方式（"libass": subtitlesフィルタ / "overlay": 事前に描画した字幕画像を合成）
+        source_media_key: 元動画ストアのキー（指定時はストアから元動画を探す）
+        source_clips: カットの範囲だけをダウンロードしたクリップ（SourceClipの辞書のリスト、指定時は元動画の代わりに使う）
 
     Returns:
         処理結果を含む辞書
     """
     try:
+        source_video_path, clip_index, source_error = _resolve_render_source(source_video_path, source_media_key, source_clips, cut_segments or [])
+        if source_error:
+            return VideoProcessingResult(success=False, error=source_error)
+
         # 出力パス設定
         if output_path is None:
             output_dir = tempfile.mkdtemp()
@@ -65,180 +636,106 @@ def create_short_video(
         if not cut_segments:
             return VideoProcessingResult(success=False, error="カットセグメントが指定されていません")
 
+        if render_mode not in RENDER_MODES:
+            return VideoProcessingResult(success=False, error=f"サポートされていないレンダリングモード: {render_mode}")
+
+        if subtitle_renderer not in SUBTITLE_RENDERERS:
+            return VideoProcessingResult(success=False, error=f"サポートされていない字幕の焼き込み方式: {subtitle_renderer}")
+
+        # ドラフト品質はスマートカットのプレビューで高速に作成
+        if quality == "draft":
+            return create_preview_video(source_video_path, cut_segments, output_path=output_path, progress_callback=progress_callback, source_clips=clip_index)
+
+        try:
+            profile = get_render_profile(quality)
+        except ValueError as e:
+            return VideoProcessingResult(success=False, error=str(e))
+
         # 元動画の音声トラック確認（最初に一度だけ実行）
         try:
-            probe_result = ffmpeg.probe(source_video_path)
-            has_audio = any(stream["codec_type"] == "audio" for stream in probe_result["streams"])
+            has_audio = probe_media(clip_index.paths[0] if clip_index is not None else source_video_path).has_audio
             print(f"DEBUG: 元動画に音声トラック: {has_audio}")
         except Exception as e:
             print(f"DEBUG: 音声トラック確認エラー: {e}")
             has_audio = True  # エラーの場合は音声ありと仮定
 
-        # 一時ディレクトリ作成
-        temp_dir = tempfile.mkdtemp()
-        segment_files = []
-
-        # 各セグメントを切り出し
-        print(f"DEBUG: 処理するセグメント数: {len(cut_segments)}")
-        for i, segment in enumerate(cut_segments):
-            if progress_callback:
-                progress_callback(f"セグメント {i+1}/{len(cut_segments)} を処理中...", (i / len(cut_segments)) * 0.7)
-
-            start_time = segment.get("start_time", 0)
-            end_time = segment.get("end_time", 0)
-            print(f"DEBUG: セグメント {i+1}: {start_time}s - {end_time}s")
-
-            if end_time <= start_time:
-                print(f"DEBUG: セグメント {i+1} スキップ: 無効な時間範囲 ({start_time} >= {end_time})")
-                continue
-
-            segment_path = os.path.join(temp_dir, f"segment_{i:03d}.mp4")
+        if render_mode == "single_pass":
+            return _create_short_video_single_pass(
+                source_video_path,
+                cut_segments,
+                output_path,
+                subtitle_path,
+                bgm_path,
+                video_format,
+                profile,
+                progress_callback,
+                has_audio,
+                event_callback,
+                subtitle_renderer,
+                clip_index,
+            )
 
-            try:
-                # 企画情報を取得
-                segment_title = segment.get("content", "")
-                segment_purpose = segment.get("purpose", "")
-
-                # 企画案全体の情報も取得
-                scenario_title = ""
-                scenario_hook = ""
-                if scenario_info:
-                    scenario_title = scenario_info.get("title", "")
-                    scenario_hook = scenario_info.get("first_impact", "")
-
-                # ffmpegで切り出し（縦動画レイアウト）
-                input_stream = ffmpeg.input(source_video_path, ss=start_time, to=end_time)
-
-                # 元動画のアスペクト比を保持してリサイズ（縦動画内に収まるように）
-                video_stream = input_stream.video.filter("scale", w=1080, h=1080, force_original_aspect_ratio="decrease")
-
-                # 縦動画キャンバス（1080x1920）を作成し、中央に元動画を配置
-                video_stream = video_stream.filter("pad", w=1080, h=1920, x="(ow-iw)/2", y="(oh-ih)/2", color="black")
-
-                # システムフォントパスを取得
-                font_path = get_system_font_path()
-
-                # テキストオーバーレイは一時的に無効化してテスト
-                print(f"DEBUG: テキストオーバーレイは一時的に無効化中")
-
-                if has_audio:
-                    audio_stream = input_stream.audio
-                    cmd = ffmpeg.output(video_stream, audio_stream, segment_path, vcodec="libx264", acodec="aac", preset="fast", crf=23).overwrite_output()
-                else:
-                    cmd = ffmpeg.output(video_stream, segment_path, vcodec="libx264", preset="fast", crf=23).overwrite_output()
-
-                print(f"DEBUG: FFmpeg コマンド実行中...")
-                try:
-                    cmd.run(quiet=False, capture_stdout=True, capture_stderr=True)
-                    print(f"DEBUG: セグメント {i+1} 処理完了: {segment_path}")
-                    # ファイルが実際に作成されたかチェック
-                    if os.path.exists(segment_path):
-                        file_size = os.path.getsize(segment_path)
-                        print(f"DEBUG: 作成されたファイルサイズ: {file_size} bytes")
-                    else:
-                        print(f"DEBUG: ファイルが作成されませんでした: {segment_path}")
-                except ffmpeg.Error as e:
-                    print(f"DEBUG: FFmpeg エラー - stdout: {e.stdout}")
-                    print(f"DEBUG: FFmpeg エラー - stderr: {e.stderr}")
+        # 中間ファイル用の作業ディレクトリ（容量が足りればRAM上、失敗時も必ず削除）
+        output_duration = sum(max(0, seg.get("end_time", 0) - seg.get("start_time", 0)) for seg in cut_segments)
+        estimated_bytes = estimate_intermediate_bytes(output_duration, video_bitrate=profile.width * profile.height * 3)
+        with working_directory(estimated_bytes) as temp_dir:
+            # 各セグメントの切り出しジョブを作成（出力ファイル名は元のインデックス順を保持）
+            print(f"DEBUG: 処理するセグメント数: {len(cut_segments)}")
+            segment_jobs = []
+            for i, segment in enumerate(cut_segments):
+                start_time = segment.get("start_time", 0)
+                end_time = segment.get("end_time", 0)
+                print(f"DEBUG: セグメント {i+1}: {start_time}s - {end_time}s")
+
+                if end_time <= start_time:
+                    print(f"DEBUG: セグメント {i+1} スキップ: 無効な時間範囲 ({start_time} >= {end_time})")
                     continue
 
-            except Exception as e:
-                print(f"DEBUG: セグメント {i+1} 処理エラー: {e}")
-                import traceback
+                segment_jobs.append((i, start_time, end_time, os.path.join(temp_dir, f"segment_{i:03d}.mp4")))
 
-                print(f"DEBUG: スタックトレース: {traceback.format_exc()}")
-                continue
+            # セグメントを並列に切り出し
+            if max_workers is None:
+                max_workers = get_default_segment_workers(profile.threads)
+            worker_count = max(1, min(max_workers, len(segment_jobs)))
+            print(f"DEBUG: セグメント並列数: {worker_count}")
 
-            if os.path.exists(segment_path):
-                segment_files.append(segment_path)
+            # 全パスの進捗を出力動画の長さで重み付けして合算する
+            tracker = ProgressTracker(progress_callback, event_callback, end=0.99)
+            _add_segment_stages(tracker, segment_jobs)
+            _add_finalize_stages(tracker, sum(end_time - start_time for _, start_time, end_time, _ in segment_jobs), subtitle_path, bgm_path)
 
-        print(f"DEBUG: 最終的に作成されたセグメントファイル数: {len(segment_files)}")
-        if segment_files:
-            for i, file_path in enumerate(segment_files):
-                print(f"DEBUG: セグメントファイル {i+1}: {file_path}")
-
-        if not segment_files:
-            error_msg = f"有効なセグメントが見つかりませんでした。処理されたセグメント数: {len(cut_segments)}"
-            print(f"DEBUG: {error_msg}")
-            return VideoProcessingResult(success=False, error=error_msg)
-
-        # セグメント結合用のファイルリスト作成
-        concat_file_path = os.path.join(temp_dir, "concat_list.txt")
-        with open(concat_file_path, "w", encoding="utf-8") as f:
-            for segment_file in segment_files:
-                f.write(f"file '{segment_file}'\n")
-
-        # セグメント結合
-        if progress_callback:
-            progress_callback("セグメントを結合中...", 0.7)
-
-        temp_output = os.path.join(temp_dir, f"merged.{video_format}")
-        try:
-            (
-                ffmpeg.input(concat_file_path, format="concat", safe=0)
-                .output(temp_output, vcodec="copy", acodec="copy")  # 映像と音声を明示的にコピー
-                .overwrite_output()
-                .run(quiet=True)
+            if use_render_cache and render_cache is None:
+                render_cache = get_default_render_cache()
+            rendered_segments, cache_hits, reused_segment_bytes = _render_segments(
+                source_video_path, segment_jobs, profile, has_audio, worker_count, render_cache if use_render_cache else None, tracker, clip_index
             )
 
-            # 結合後の音声確認
-            try:
-                merge_probe = ffmpeg.probe(temp_output)
-                merged_has_audio = any(stream["codec_type"] == "audio" for stream in merge_probe["streams"])
-                print(f"DEBUG: 結合後動画に音声トラック: {merged_has_audio}")
-            except Exception as e:
-                print(f"DEBUG: 結合後音声確認エラー: {e}")
-
-        except Exception as e:
-            print(f"DEBUG: セグメント結合エラー: {e}")
-            return VideoProcessingResult(success=False, error=f"セグメント結合エラー: {str(e)}")
+            segment_files = [rendered_segments[i] for i in sorted(rendered_segments)]
 
-        # 字幕追加（必要に応じて）
-        if subtitle_path and os.path.exists(subtitle_path):
-            if progress_callback:
-                progress_callback("字幕を追加中...", 0.8)
-            temp_with_subs = os.path.join(temp_dir, f"with_subs.{video_format}")
-            # パスのエスケープ処理を事前に行う
-            escaped_subtitle_path = subtitle_path.replace(":", "\\:")
-
-            # ファイル拡張子で字幕処理を切り替え
-            if subtitle_path.lower().endswith(".ass"):
-                # ASS形式の場合：フォントサイズは埋め込み済み、force_styleは不要
-                subtitle_filter = f"subtitles={escaped_subtitle_path}"
-            else:
-                # SRT/VTT形式の場合：force_styleでスタイリング
-                subtitle_filter = f"subtitles={escaped_subtitle_path}:force_style='Fontsize=48,Bold=1,OutlineColour=&H00000000,Outline=3,Shadow=2,MarginV=120,Alignment=2'"
+            print(f"DEBUG: 最終的に作成されたセグメントファイル数: {len(segment_files)}")
+            if segment_files:
+                for i, file_path in enumerate(segment_files):
+                    print(f"DEBUG: セグメントファイル {i+1}: {file_path}")
 
-            (ffmpeg.input(temp_output).output(temp_with_subs, vf=subtitle_filter, vcodec="libx264", acodec="copy", preset="fast", crf=23).overwrite_output().run(quiet=True))
-            temp_output = temp_with_subs
+            if not segment_files:
+                error_msg = f"有効なセグメントが見つかりませんでした。処理されたセグメント数: {len(cut_segments)}"
+                print(f"DEBUG: {error_msg}")
+                return VideoProcessingResult(success=False, error=error_msg)
 
-        # BGM追加（必要に応じて）
-        if bgm_path and os.path.exists(bgm_path):
-            if progress_callback:
-                progress_callback("BGMを追加中...", 0.9)
-            temp_with_bgm = os.path.join(temp_dir, f"with_bgm.{video_format}")
-            (
-                ffmpeg.input(temp_output)
-                .input(bgm_path)
-                .filter_complex("[1:a]volume=0.2[bgm];[0:a][bgm]amix=inputs=2:duration=first:dropout_transition=2[aout]")
-                .output(temp_with_bgm, **{"map": ["0:v", "[aout]"]}, vcodec="copy", acodec="aac")
-                .overwrite_output()
-                .run(quiet=True)
+            finalize_error = _finalize_short_video(
+                segment_files, temp_dir, output_path, subtitle_path, bgm_path, video_format, profile, has_audio, tracker=tracker, subtitle_renderer=subtitle_renderer
             )
-            temp_output = temp_with_bgm
+            if finalize_error:
+                return VideoProcessingResult(success=False, error=finalize_error)
 
-        # 最終出力
-        if progress_callback:
-            progress_callback("最終出力を生成中...", 0.95)
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        if temp_output != output_path:
-            if os.path.exists(output_path):
-                os.remove(output_path)
-            os.rename(temp_output, output_path)
+            # 中間ファイルの書き込み量（最終出力を除く）を記録（作業ディレクトリはwithを抜けると削除される）
+            # キャッシュからリンクしたセグメントは書き込み量に含めない
+            intermediate_bytes = _directory_size(temp_dir) - reused_segment_bytes
 
-        # 一時ファイル削除
-        cleanup_temp_directory(temp_dir)
+            if use_render_cache:
+                evicted = render_cache.evict()
+                if evicted:
+                    print(f"DEBUG: レンダーキャッシュから{evicted}件を削除")
 
         # 結果情報取得
         video_info = get_video_info(output_path)
@@ -251,13 +748,393 @@ def create_short_video(
             output_path=output_path,
             video_info=video_info,
             segments_processed=len(segment_files),
-            processing_details={"subtitle_added": subtitle_path is not None, "bgm_added": bgm_path is not None, "format": video_format, "quality": quality},
+            processing_details={
+                "subtitle_added": subtitle_path is not None,
+                "bgm_added": bgm_path is not None,
+                "format": video_format,
+                "quality": quality,
+                "render_profile": profile.dict(),
+                "render_mode": render_mode,
+                "subtitle_renderer": subtitle_renderer,
+                "segment_workers": worker_count,
+                "intermediate_bytes": intermediate_bytes,
+                "working_storage": "tmpfs" if is_tmpfs_path(temp_dir) else "disk",
+                "render_cache": {"enabled": use_render_cache, "hits": cache_hits, "misses": len(segment_jobs) - cache_hits if use_render_cache else 0},
+                "encode_stats": tracker.stats(),
+                "source_clips": len(clip_index) if clip_index is not None else 0,
+            },
         )
 
     except Exception as e:
         return VideoProcessingResult(success=False, error=f"動画処理エラー: {str(e)}")
 
 
+def _create_short_video_single_pass(
+    source_video_path: str,
+    cut_segments: List[Dict[str, Any]],
+    output_path: str,
+    subtitle_path: Optional[str],
+    bgm_path: Optional[str],
+    video_format: str,
+    profile: RenderProfile,
+    progress_callback: Optional[callable],
+    has_audio: bool,
+    event_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    subtitle_renderer: str = "libass",
+    source_clips: Optional[SourceClipIndex] = None,
+) -> VideoProcessingResult:
+    """シングルパスモードでショート動画を作成する"""
+    segments = []
+    for i, segment in enumerate(cut_segments):
+        start_time = segment.get("start_time", 0)
+        end_time = segment.get("end_time", 0)
+        if end_time <= start_time:
+            print(f"DEBUG: セグメント {i+1} スキップ: 無効な時間範囲 ({start_time} >= {end_time})")
+            continue
+        segments.append({"start_time": start_time, "end_time": end_time})
+
+    if not segments:
+        return VideoProcessingResult(success=False, error=f"有効なセグメントが見つかりませんでした。処理されたセグメント数: {len(cut_segments)}")
+
+    output_duration = sum(seg["end_time"] - seg["start_time"] for seg in segments)
+    tracker = ProgressTracker(progress_callback, event_callback, end=0.99)
+    tracker.add_stage("single_pass", weight=output_duration, duration=output_duration, label=f"{len(segments)}セグメントを1パスでエンコード中")
+    tracker.set_message(f"{len(segments)}セグメントを1パスでエンコード中...")
+    tracker.flush()
+
+    def on_progress(progress: EncodeProgress) -> None:
+        tracker.update("single_pass", progress)
+        tracker.flush()
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    try:
+        # 字幕画像（subtitle_renderer="overlay" の場合のみ）の描画先
+        with working_directory(prefix="shortmovie_subtitles_") as image_dir:
+            _render_single_pass(
+                source_video_path,
+                segments,
+                output_path,
+                has_audio,
+                profile,
+                subtitle_path=subtitle_path,
+                bgm_path=bgm_path,
+                on_progress=on_progress,
+                subtitle_renderer=subtitle_renderer,
+                image_dir=image_dir,
+                source_clips=source_clips,
+            )
+    except ffmpeg.Error as e:
+        print(f"DEBUG: FFmpeg エラー - stderr: {e.stderr}")
+        return VideoProcessingResult(success=False, error=f"シングルパスエンコードエラー: {e.stderr.decode('utf-8', errors='ignore')[-500:] if e.stderr else str(e)}")
+
+    video_info = get_video_info(output_path)
+
+    if progress_callback:
+        progress_callback("完了!", 1.0)
+
+    return VideoProcessingResult(
+        success=True,
+        output_path=output_path,
+        video_info=video_info,
+        segments_processed=len(segments),
+        processing_details={
+            "subtitle_added": subtitle_path is not None,
+            "bgm_added": bgm_path is not None,
+            "format": video_format,
+            "quality": profile.name,
+            "render_profile": profile.dict(),
+            "render_mode": "single_pass",
+            "subtitle_renderer": subtitle_renderer,
+            "intermediate_bytes": 0,
+            "encode_stats": tracker.stats(),
+            "source_clips": len(source_clips) if source_clips is not None else 0,
+        },
+    )
+
+
+def create_short_videos_batch(
+    source_video_path: str,
+    scenarios: List[Dict[str, Any]],
+    output_dir: Optional[str] = None,
+    subtitle_paths: Optional[List[Optional[str]]] = None,
+    bgm_path: Optional[str] = None,
+    video_format: str = "mp4",
+    quality: str = "high",
+    progress_callback: Optional[callable] = None,
+    max_workers: Optional[int] = None,
+    use_render_cache: bool = True,
+    render_cache: Optional[SegmentRenderCache] = None,
+    event_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    subtitle_renderer: str = "libass",
+    source_media_key: Optional[str] = None,
+    source_clips: Optional[List[Dict[str, Any]]] = None,
+) -> List[VideoProcessingResult]:
+    """同じ元動画から複数の企画案のショート動画をまとめて作成する
+
+    全企画案のカットをまとめて計画し、同一の切り出し範囲は1回だけエンコードして共有する。
+    セグメントのエンコードと各動画の仕上げ（結合・字幕・BGM）はそれぞれ共通のワーカープールで並列に実行する。
+
+    Args:
+        source_video_path: 元動画ファイルのパス（source_media_keyを指定した場合はストアに見つからないときのみ使用）
+        scenarios: 企画案のリスト（"title" と "cut_segments" を持つ辞書）
+        output_dir: 出力ディレクトリ（未指定時は一時ディレクトリ）
+        subtitle_paths: 企画案ごとの字幕ファイルパス（scenariosと同じ順序、字幕なしはNone）
+        bgm_path: BGMファイルパス（全企画案で共通）
+        video_format: 出力フォーマット
+        quality: 動画品質（"draft"の場合は企画案ごとにスマートカットのプレビューを作成）
+        progress_callback: 進捗コールバック関数
+        max_workers: 並列に実行するffmpegの数（未指定時はCPU数から自動決定）
+        use_render_cache: 変更のないセグメントをキャッシュから再利用するかどうか
+        render_cache: 使用するセグメントキャッシュ（未指定時は共有キャッシュ）
+        event_callback: ffmpegの進捗やパスの完了を通知する構造化イベントのコールバック
+        subtitle_renderer: 字幕の焼き込み方式（"libass" または "overlay"）
+        source_media_key: 元動画ストアのキー（指定時はストアから元動画を探す）
+        source_clips: 全企画案のカットの範囲をダウンロードしたクリップ（SourceClipの辞書のリスト、指定時は元動画の代わりに使う）
+
+    Returns:
+        scenariosと同じ順序の処理結果リスト
+    """
+    if not scenarios:
+        return []
+
+    all_cut_segments = [segment for scenario in scenarios for segment in scenario.get("cut_segments", [])]
+    source_video_path, clip_index, source_error = _resolve_render_source(source_video_path, source_media_key, source_clips, all_cut_segments)
+    if source_error:
+        return [VideoProcessingResult(success=False, error=source_error) for _ in scenarios]
+
+    if subtitle_renderer not in SUBTITLE_RENDERERS:
+        return [VideoProcessingResult(success=False, error=f"サポートされていない字幕の焼き込み方式: {subtitle_renderer}") for _ in scenarios]
+
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp()
+    os.makedirs(output_dir, exist_ok=True)
+    subtitle_paths = list(subtitle_paths or [])
+    subtitle_paths += [None] * (len(scenarios) - len(subtitle_paths))
+    output_paths = [os.path.join(output_dir, f"youtube_short_{i+1:02d}_{str(scenario.get('title', '')).replace(' ', '_')}.{video_format}") for i, scenario in enumerate(scenarios)]
+
+    # ドラフト品質はキーフレーム単位のコピーが主体のため、企画案ごとにプレビューを作成する
+    if quality == "draft":
+        return [
+            create_preview_video(source_video_path, scenario.get("cut_segments", []), output_path=output_path, source_clips=clip_index)
+            for scenario, output_path in zip(scenarios, output_paths)
+        ]
+
+    try:
+        profile = get_render_profile(quality)
+    except ValueError as e:
+        return [VideoProcessingResult(success=False, error=str(e)) for _ in scenarios]
+
+    try:
+        has_audio = probe_media(clip_index.paths[0] if clip_index is not None else source_video_path).has_audio
+    except Exception as e:
+        print(f"DEBUG: 音声トラック確認エラー: {e}")
+        has_audio = True  # エラーの場合は音声ありと仮定
+
+    # 中間ファイル用の作業ディレクトリ（容量が足りればRAM上、失敗時も必ず削除）
+    output_duration = sum(max(0, seg.get("end_time", 0) - seg.get("start_time", 0)) for scenario in scenarios for seg in scenario.get("cut_segments", []))
+    estimated_bytes = estimate_intermediate_bytes(output_duration, video_bitrate=profile.width * profile.height * 3)
+    try:
+        with working_directory(estimated_bytes) as temp_dir:
+            # 全企画案のカットをまとめ、同一範囲は1つのセグメントジョブに集約する
+            unique_ranges: Dict[tuple, int] = {}
+            scenario_ranges: List[List[int]] = []
+            for scenario in scenarios:
+                range_indices = []
+                for segment in scenario.get("cut_segments", []):
+                    start_time = round(float(segment.get("start_time", 0)), 3)
+                    end_time = round(float(segment.get("end_time", 0)), 3)
+                    if end_time <= start_time:
+                        print(f"DEBUG: セグメントスキップ: 無効な時間範囲 ({start_time} >= {end_time})")
+                        continue
+                    range_indices.append(unique_ranges.setdefault((start_time, end_time), len(unique_ranges)))
+                scenario_ranges.append(range_indices)
+
+            total_cuts = sum(len(range_indices) for range_indices in scenario_ranges)
+            print(f"DEBUG: バッチ処理 - 企画案数: {len(scenarios)}, カット数: {total_cuts}, ユニークセグメント数: {len(unique_ranges)}")
+
+            segment_jobs = [(i, start_time, end_time, os.path.join(temp_dir, f"segment_{i:03d}.mp4")) for (start_time, end_time), i in unique_ranges.items()]
+
+            if max_workers is None:
+                max_workers = get_default_segment_workers(profile.threads)
+            worker_count = max(1, min(max_workers, max(len(segment_jobs), len(scenarios))))
+            print(f"DEBUG: バッチ並列数: {worker_count}")
+
+            # 共有セグメントと企画案ごとの仕上げパスの進捗を合算する
+            tracker = ProgressTracker(progress_callback, event_callback, end=0.99)
+            _add_segment_stages(tracker, segment_jobs)
+            range_durations = {i: end_time - start_time for (start_time, end_time), i in unique_ranges.items()}
+            for index, range_indices in enumerate(scenario_ranges):
+                if range_indices:
+                    _add_finalize_stages(tracker, sum(range_durations[i] for i in range_indices), subtitle_paths[index], bgm_path, prefix=f"scenario_{index}_")
+
+            if use_render_cache and render_cache is None:
+                render_cache = get_default_render_cache()
+            rendered_segments, cache_hits, reused_segment_bytes = (
+                _render_segments(source_video_path, segment_jobs, profile, has_audio, worker_count, render_cache if use_render_cache else None, tracker, clip_index)
+                if segment_jobs
+                else ({}, 0, 0)
+            )
+
+            # 企画案ごとの仕上げ（結合・字幕・BGM）を並列に実行
+            results: List[Optional[VideoProcessingResult]] = [None] * len(scenarios)
+            finalize_jobs = {}
+            executor = ThreadPoolExecutor(max_workers=min(worker_count, len(scenarios)))
+            try:
+                for index, range_indices in enumerate(scenario_ranges):
+                    segment_files = [rendered_segments[i] for i in range_indices if i in rendered_segments]
+                    if not segment_files:
+                        tracker.skip_stages(f"scenario_{index}_")
+                        results[index] = VideoProcessingResult(
+                            success=False,
+                            error=f"有効なセグメントが見つかりませんでした。処理されたセグメント数: {len(scenarios[index].get('cut_segments', []))}",
+                        )
+                        continue
+                    scenario_temp_dir = os.path.join(temp_dir, f"scenario_{index:02d}")
+                    os.makedirs(scenario_temp_dir, exist_ok=True)
+                    future = executor.submit(
+                        _finalize_short_video,
+                        segment_files,
+                        scenario_temp_dir,
+                        output_paths[index],
+                        subtitle_paths[index],
+                        bgm_path,
+                        video_format,
+                        profile,
+                        has_audio,
+                        tracker,
+                        f"scenario_{index}_",
+                        False,
+                        subtitle_renderer,
+                    )
+                    finalize_jobs[future] = (index, len(segment_files))
+
+                # 仕上げパスの進捗は一定間隔で呼び出し元スレッドから通知する
+                finished_futures = []
+                not_done = set(finalize_jobs)
+                while not_done:
+                    done, not_done = wait(not_done, timeout=PROGRESS_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    finished_futures.extend(done)
+                    tracker.flush()
+
+                for future in finished_futures:
+                    index, segments_processed = finalize_jobs[future]
+                    try:
+                        finalize_error = future.result()
+                    except Exception as e:
+                        finalize_error = f"動画処理エラー: {str(e)}"
+
+                    if finalize_error:
+                        results[index] = VideoProcessingResult(success=False, error=finalize_error)
+                    else:
+                        results[index] = VideoProcessingResult(
+                            success=True,
+                            output_path=output_paths[index],
+                            video_info=get_video_info(output_paths[index]),
+                            segments_processed=segments_processed,
+                            processing_details={
+                                "subtitle_added": subtitle_paths[index] is not None,
+                                "bgm_added": bgm_path is not None,
+                                "format": video_format,
+                                "quality": quality,
+                                "render_profile": profile.dict(),
+                                "render_mode": "batch",
+                                "subtitle_renderer": subtitle_renderer,
+                                "segment_workers": worker_count,
+                                "batch": {"scenarios": len(scenarios), "total_cuts": total_cuts, "unique_segments": len(segment_jobs)},
+                            },
+                        )
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            # 中間ファイルの書き込み量とエンコード統計はバッチ全体の値を各結果に記録する
+            encode_stats = tracker.stats()
+            intermediate_bytes = _directory_size(temp_dir) - reused_segment_bytes
+            for result in results:
+                if result.success:
+                    result.processing_details["intermediate_bytes"] = intermediate_bytes
+                    result.processing_details["working_storage"] = "tmpfs" if is_tmpfs_path(temp_dir) else "disk"
+                    result.processing_details["encode_stats"] = encode_stats
+                    result.processing_details["source_clips"] = len(clip_index) if clip_index is not None else 0
+                    result.processing_details["render_cache"] = {
+                        "enabled": use_render_cache,
+                        "hits": cache_hits,
+                        "misses": len(segment_jobs) - cache_hits if use_render_cache else 0,
+                    }
+
+            if progress_callback:
+                progress_callback("完了!", 1.0)
+            return results
+
+    except Exception as e:
+        return [VideoProcessingResult(success=False, error=f"動画処理エラー: {str(e)}") for _ in scenarios]
+
+    finally:
+        if use_render_cache and render_cache is not None:
+            render_cache.evict()
+
+
+def _iter_segment_subtitles(
+    transcript_index: TranscriptIntervalIndex,
+    cut_segments: List[Dict[str, Any]],
+    correction_mapping: Dict[int, str],
+    replaced_chunks: Optional[Dict[int, int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """カットセグメントと重なる字幕チャンクを、カット後の時間軸に合わせたキューとして順に返す
+
+    replaced_chunks（補正テキストに含まれるチャンク → 補正テキストを持つチャンク）のチャンクは個別に表示せず、
+    補正テキストを含まれるチャンク全体の時間範囲で1回だけ表示する。
+    """
+    replaced_chunks = replaced_chunks or {}
+    # 補正テキストを持つチャンク → 含まれるチャンク全体の時間範囲
+    group_spans: Dict[int, Tuple[float, float]] = {}
+    for chunk_index, group_index in replaced_chunks.items():
+        for index in (chunk_index, group_index):
+            span_start, span_end = group_spans.get(group_index, (transcript_index.starts[index], transcript_index.ends[index]))
+            group_spans[group_index] = (min(span_start, transcript_index.starts[index]), max(span_end, transcript_index.ends[index]))
+
+    current_time_offset = 0
+    for i, segment in enumerate(cut_segments):
+        start_time = segment.get("start_time", 0)
+        end_time = segment.get("end_time", 0)
+
+        # このセグメントに含まれる字幕チャンクを探す（部分重複も含む）
+        segment_chunk_count = 0
+        emitted_groups = set()
+        for chunk_index in transcript_index.overlapping_indices(start_time, end_time):
+            chunk_index = replaced_chunks.get(chunk_index, chunk_index)
+            if chunk_index in group_spans:
+                if chunk_index in emitted_groups:
+                    continue
+                emitted_groups.add(chunk_index)
+                chunk = transcript_index.chunks[chunk_index]
+                chunk_start, chunk_end = group_spans[chunk_index]
+            else:
+                chunk = transcript_index.chunks[chunk_index]
+                chunk_start = chunk.get("start", 0)
+                chunk_end = chunk_start + chunk.get("duration", 0)
+
+            # セグメント境界での切り取り
+            effective_start = max(chunk_start, start_time)
+            effective_end = min(chunk_end, end_time)
+
+            # 新しい時間軸に調整（セグメント開始を0とする）
+            adjusted_start = current_time_offset + (effective_start - start_time)
+            adjusted_end = current_time_offset + (effective_end - start_time)
+
+            # 有効な時間範囲のもののみ追加（最小0.1秒の長さを保証）
+            if adjusted_end > adjusted_start and (adjusted_end - adjusted_start) >= 0.1:
+                # 補正テキストがあれば優先
+                text = correction_mapping.get(chunk_index, chunk.get("text", "").strip())
+                if text:  # 空でないテキストのみ
+                    segment_chunk_count += 1
+                    yield {"start": adjusted_start, "end": adjusted_end, "text": text}
+
+        print(f"DEBUG: セグメント{i+1}: {start_time}s - {end_time}s, 字幕chunk数: {segment_chunk_count}")
+
+        # 次のセグメントのためのオフセット更新
+        current_time_offset += end_time - start_time
+
+
 def create_subtitle_file(
     transcript_chunks: List[Dict[str, Any]],
     cut_segments: List[Dict[str, Any]],
@@ -265,260 +1142,126 @@ def create_subtitle_file(
     format: str = "srt",
     scenario_subtitles: Optional[List[Dict[str, Any]]] = None,
     use_corrected_text: bool = True,
+    transcript_index: Optional[TranscriptIntervalIndex] = None,
+    formats: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """カットセグメントに対応する字幕ファイルを作成する
 
+    字幕キューは1回だけ生成し、指定された全形式のファイルへ順に書き込む（ファイル全体をメモリ上に組み立てない）。
+
     Args:
         transcript_chunks: YouTubeから取得した字幕チャンク（結合処理なし）
         cut_segments: カットセグメント
-        output_path: 出力ファイルパス
+        output_path: 出力ファイルパス（複数形式の場合は拡張子を各形式に置き換えたパスに出力）
         format: 字幕ファイル形式（srt, vtt, ass）
         scenario_subtitles: エージェントが整形した字幕データ（優先使用）
         use_corrected_text: テキスト補正を使用するかどうか
+        transcript_index: transcript_chunksから作成済みの時間範囲インデックス（未指定時はここで作成）
+        formats: 同時に出力する字幕形式のリスト（指定時は format より優先）
 
     Returns:
-        処理結果を含む辞書
+        処理結果を含む辞書（subtitle_path は先頭の形式のパス、subtitle_paths は形式ごとのパス）
     """
     try:
+        formats = [fmt.lower() for fmt in (formats or [format])]
+        unsupported = [fmt for fmt in formats if fmt not in SUBTITLE_FORMATS]
+        if unsupported:
+            return {"success": False, "error": f"サポートされていない字幕形式: {', '.join(unsupported)}", "subtitle_path": None}
+
         if output_path is None:
             output_dir = tempfile.mkdtemp()
-            output_path = os.path.join(output_dir, f"subtitles.{format}")
-
-        # 字幕データの処理：生の字幕chunkベースで補正テキストを適用
-        segment_subtitles = []
+            output_path = os.path.join(output_dir, f"subtitles.{formats[0]}")
+        if len(formats) == 1:
+            subtitle_paths = {formats[0]: output_path}
+        else:
+            output_base = os.path.splitext(output_path)[0]
+            subtitle_paths = {fmt: f"{output_base}.{fmt}" for fmt in formats}
 
         print(f"DEBUG: 生字幕ベース字幕作成 - transcript_chunks数: {len(transcript_chunks)}")
         print(f"DEBUG: cut_segments数: {len(cut_segments)}")
 
-        # 補正テキストマッピングを作成（scenario_subtitlesがある場合）
+        # セグメントと重なるチャンクを二分探索で取得するためのインデックス
+        if transcript_index is None:
+            transcript_index = TranscriptIntervalIndex(transcript_chunks)
+
+        # 補正テキストを時間範囲の重なりで字幕チャンクに対応付け（scenario_subtitlesがある場合）
+        alignment = None
         correction_mapping = {}
+        replaced_chunks = {}
         if scenario_subtitles and use_corrected_text:
-            print(f"DEBUG: 補正テキストマッピングを作成 - {len(scenario_subtitles)}項目")
-            for subtitle in scenario_subtitles:
-                original_start = subtitle.get("start_time", 0)
-                original_end = subtitle.get("end_time", 0)
-                corrected_text = subtitle.get("text", "")
-                # 時間範囲をキーとして補正テキストを保存
-                correction_mapping[f"{original_start:.1f}-{original_end:.1f}"] = corrected_text
-
-        # YouTubeの生字幕chunkから抽出（従来の処理）
-        current_time_offset = 0
-        for i, segment in enumerate(cut_segments):
-            start_time = segment.get("start_time", 0)
-            end_time = segment.get("end_time", 0)
-
-            print(f"DEBUG: セグメント{i+1}: {start_time}s - {end_time}s")
-
-            # このセグメントに含まれる字幕チャンクを探す
-            segment_chunks = []
-            for chunk in transcript_chunks:
-                chunk_start = chunk.get("start", 0)
-                chunk_duration = chunk.get("duration", 0)
-                chunk_end = chunk_start + chunk_duration
-
-                # セグメント範囲と重複する字幕チャンクを抽出（部分重複も含む）
-                if chunk_start < end_time and chunk_end > start_time:
-                    # セグメント境界での切り取り
-                    effective_start = max(chunk_start, start_time)
-                    effective_end = min(chunk_end, end_time)
-
-                    # 新しい時間軸に調整（セグメント開始を0とする）
-                    adjusted_start = current_time_offset + (effective_start - start_time)
-                    adjusted_end = current_time_offset + (effective_end - start_time)
-
-                    # 有効な時間範囲のもののみ追加（最小0.1秒の長さを保証）
-                    if adjusted_end > adjusted_start and (adjusted_end - adjusted_start) >= 0.1:
-                        original_text = chunk.get("text", "").strip()
-
-                        # 補正テキストがあるかチェック
-                        corrected_text = original_text
-                        if correction_mapping:
-                            # 元の時間範囲で補正テキストを検索
-                            correction_key = f"{chunk_start:.1f}-{chunk_end:.1f}"
-                            if correction_key in correction_mapping:
-                                corrected_text = correction_mapping[correction_key]
-                                print(f"DEBUG: テキスト補正適用 - {original_text[:20]}... → {corrected_text[:20]}...")
-
-                        if corrected_text:  # 空でないテキストのみ
-                            segment_chunks.append({"start": adjusted_start, "end": adjusted_end, "text": corrected_text})
-                            print(f"DEBUG: 字幕chunk追加 - {adjusted_start:.1f}s-{adjusted_end:.1f}s: {corrected_text[:20]}...")
-
-            print(f"DEBUG: セグメント{i+1}に含まれる字幕chunk数: {len(segment_chunks)}")
-            segment_subtitles.extend(segment_chunks)
-
-            # 次のセグメントのためのオフセット更新
-            current_time_offset += end_time - start_time
-
-        print(f"DEBUG: 最終的な字幕数: {len(segment_subtitles)}")
-
-        # 字幕ファイル作成
-        if format.lower() == "srt":
-            content = create_srt_content(segment_subtitles)
-        elif format.lower() == "vtt":
-            content = create_vtt_content(segment_subtitles)
-        elif format.lower() == "ass":
-            content = create_ass_content(segment_subtitles)
-        else:
-            return {"success": False, "error": f"サポートされていない字幕形式: {format}", "subtitle_path": None}
-
-        # ファイル保存
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(content)
-
-        print(f"DEBUG: 字幕ファイル作成完了: {output_path}")
-        return {"success": True, "error": None, "subtitle_path": output_path, "format": format, "subtitle_count": len(segment_subtitles)}
+            alignment = align_scenario_subtitles(transcript_index, scenario_subtitles)
+            correction_mapping = alignment.corrections
+            replaced_chunks = alignment.replaced
+            print(f"DEBUG: 補正テキスト対応付け - {alignment.matched}/{alignment.total}項目 (一致率: {alignment.match_rate:.0%})")
+            for subtitle in alignment.unmatched:
+                print(f"DEBUG: 補正テキスト対応なし - {subtitle.get('start_time')}s-{subtitle.get('end_time')}s: {str(subtitle.get('text', ''))[:20]}...")
+
+        # 字幕キューを生成しながら全形式のファイルへ書き込む
+        with open_subtitle_writers(subtitle_paths) as writers:
+            cue_count = write_subtitles(_iter_segment_subtitles(transcript_index, cut_segments, correction_mapping, replaced_chunks), writers)
+            subtitle_counts = {writer.format: writer.count for writer in writers}
+
+        print(f"DEBUG: 字幕ファイル作成完了: {subtitle_paths} (字幕数: {cue_count})")
+        return {
+            "success": True,
+            "error": None,
+            "subtitle_path": subtitle_paths[formats[0]],
+            "subtitle_paths": subtitle_paths,
+            "format": formats[0],
+            "subtitle_count": cue_count,
+            "subtitle_counts": subtitle_counts,
+            "correction_match_rate": alignment.match_rate if alignment else None,
+            "unmatched_corrections": len(alignment.unmatched) if alignment else 0,
+        }
 
     except Exception as e:
         print(f"DEBUG: 字幕ファイル作成エラー: {e}")
         return {"success": False, "error": f"字幕ファイル作成エラー: {str(e)}", "subtitle_path": None}
 
 
-def create_srt_content(subtitles: List[Dict[str, Any]]) -> str:
-    """SRT形式の字幕コンテンツを作成"""
-    content = ""
-    subtitle_index = 1
-
-    for subtitle in subtitles:
-        start_time_seconds = subtitle["start"]
-        end_time_seconds = subtitle["end"]
-        text = subtitle["text"].strip()
-
-        # 有効な字幕のみ追加（空テキストや無効な時間範囲を除外）
-        if text and end_time_seconds > start_time_seconds and start_time_seconds >= 0:
-            start_time = format_srt_time(start_time_seconds)
-            end_time = format_srt_time(end_time_seconds)
+def _render_subtitle_content(format: str, subtitles: List[Dict[str, Any]]) -> str:
+    buffer = io.StringIO()
+    writer = create_subtitle_writer(format, buffer)
+    write_subtitles(subtitles, [writer])
+    print(f"DEBUG: {format.upper()}作成完了 - 総字幕数: {writer.count}")
+    return buffer.getvalue()
 
-            content += f"{subtitle_index}\n"
-            content += f"{start_time} --> {end_time}\n"
-            content += f"{text}\n\n"
-            subtitle_index += 1
 
-            print(f"DEBUG: SRT追加 - {subtitle_index-1}: {start_time} --> {end_time} | {text[:30]}...")
-
-    print(f"DEBUG: SRT作成完了 - 総字幕数: {subtitle_index-1}")
-    return content
+def create_srt_content(subtitles: List[Dict[str, Any]]) -> str:
+    """SRT形式の字幕コンテンツを作成"""
+    return _render_subtitle_content("srt", subtitles)
 
 
 def create_vtt_content(subtitles: List[Dict[str, Any]]) -> str:
     """WebVTT形式の字幕コンテンツを作成"""
-    content = "WEBVTT\n\n"
-
-    for subtitle in subtitles:
-        start_time = format_vtt_time(subtitle["start"])
-        end_time = format_vtt_time(subtitle["end"])
-        text = subtitle["text"].strip()
-
-        if text:
-            content += f"{start_time} --> {end_time}\n"
-            content += f"{text}\n\n"
-
-    return content
+    return _render_subtitle_content("vtt", subtitles)
 
 
 def create_ass_content(subtitles: List[Dict[str, Any]]) -> str:
     """ASS形式の字幕コンテンツを作成（フォントサイズ埋め込み）"""
-    # ASSファイルのヘッダー（縦動画用に最適化）
-    content = """[Script Info]
-Title: YouTube Short Subtitles
-ScriptType: v4.00+
-PlayResX: 1080
-PlayResY: 1920
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,48,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,1,0,0,0,100,100,0,0,1,3,2,2,50,50,120,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-
-"""
-
-    for subtitle in subtitles:
-        start_time_seconds = subtitle["start"]
-        end_time_seconds = subtitle["end"]
-        text = subtitle["text"].strip()
-
-        if text and end_time_seconds > start_time_seconds and start_time_seconds >= 0:
-            start_time = format_ass_time(start_time_seconds)
-            end_time = format_ass_time(end_time_seconds)
-
-            # ASSでは特殊文字をエスケープ
-            text = text.replace("\n", "\\N")
-
-            content += f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}\n"
-
-    return content
-
-
-def format_srt_time(seconds: float) -> str:
-    """秒数をSRT時間形式に変換"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millisecs = int((seconds % 1) * 1000)
-
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
-
-
-def format_vtt_time(seconds: float) -> str:
-    """秒数をWebVTT時間形式に変換"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millisecs = int((seconds % 1) * 1000)
-
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millisecs:03d}"
-
-
-def format_ass_time(seconds: float) -> str:
-    """秒数をASS時間形式に変換 (H:MM:SS.CC)"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    centisecs = int((seconds % 1) * 100)
-
-    return f"{hours}:{minutes:02d}:{secs:02d}.{centisecs:02d}"
+    return _render_subtitle_content("ass", subtitles)
 
 
 def get_video_info(video_path: str) -> Dict[str, Any]:
     """動画ファイルの情報を取得"""
     try:
-        probe = ffmpeg.probe(video_path)
-        video_stream = next((stream for stream in probe["streams"] if stream["codec_type"] == "video"), None)
-        audio_stream = next((stream for stream in probe["streams"] if stream["codec_type"] == "audio"), None)
-
-        info = {
-            "duration": float(probe["format"].get("duration", 0)),
-            "size": int(probe["format"].get("size", 0)),
-            "bitrate": int(probe["format"].get("bit_rate", 0)),
-        }
-
-        if video_stream:
-            info.update(
-                {
-                    "width": int(video_stream.get("width", 0)),
-                    "height": int(video_stream.get("height", 0)),
-                    "fps": eval(video_stream.get("r_frame_rate", "0/1")),
-                    "video_codec": video_stream.get("codec_name", ""),
-                }
-            )
-
-        if audio_stream:
-            info.update(
-                {
-                    "audio_codec": audio_stream.get("codec_name", ""),
-                    "sample_rate": int(audio_stream.get("sample_rate", 0)),
-                    "channels": int(audio_stream.get("channels", 0)),
-                }
-            )
-
-        return info
-
+        return probe_media(video_path).to_video_info()
     except Exception as e:
         return {"error": str(e)}
 
 
+def _directory_size(directory: str) -> int:
+    """ディレクトリ配下のファイルサイズ合計を取得"""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
 def cleanup_temp_directory(temp_dir: str) -> bool:
     """一時ディレクトリを削除"""
     try:
@@ -542,8 +1285,17 @@ def estimate_processing_time(video_duration: float, num_segments: int, has_subti
     return base_time + segment_overhead + subtitle_time + bgm_time
 
 
-def validate_cut_segments(cut_segments: List[Dict[str, Any]], video_duration: float, max_total_duration: float = 90) -> Dict[str, Any]:
-    """カットセグメントの妥当性を検証"""
+def validate_cut_segments(
+    cut_segments: List[Dict[str, Any]], video_duration: Optional[float] = None, max_total_duration: float = 90, source_video_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """カットセグメントの妥当性を検証
+
+    video_durationが未指定の場合は source_video_path の長さを（キャッシュ経由で）取得して使う。
+    """
+    if not video_duration and source_video_path:
+        video_duration = get_media_duration(source_video_path)
+    video_duration = video_duration or 0
+
     errors = []
     warnings = []
     total_duration = 0
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""動画処理の中間ファイル用作業ディレクトリ"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.setting import env_setting
+
+# "auto": 容量が足りればRAM上(tmpfs)、足りなければディスク / "tmpfs": 常にRAM上 / "disk": 常にディスク
+WORK_STORAGE_MODES = ("auto", "tmpfs", "disk")
+
+# 中間ファイルの見積もりに掛ける安全係数
+ESTIMATE_SAFETY_FACTOR = 2.0
+
+
+def estimate_intermediate_bytes(output_duration: float, video_bitrate: int = 8_000_000, audio_bitrate: int = 192_000) -> int:
+    """出力動画の長さから中間ファイルの最大サイズを見積もる（バイト）"""
+    return int(output_duration * (video_bitrate + audio_bitrate) / 8 * ESTIMATE_SAFETY_FACTOR)
+
+
+def _tmpfs_free_bytes(tmpfs_dir: str) -> int:
+    try:
+        return shutil.disk_usage(tmpfs_dir).free
+    except OSError:
+        return 0
+
+
+def select_working_root(estimated_bytes: int, mode: Optional[str] = None) -> Optional[str]:
+    """作業ディレクトリを作成する親ディレクトリを選ぶ（Noneはシステムの一時ディレクトリ）
+
+    Raises:
+        ValueError: 未定義のモードの場合
+    """
+    mode = mode or env_setting.WORK_STORAGE
+    if mode not in WORK_STORAGE_MODES:
+        raise ValueError(f"サポートされていない作業ディレクトリのモード: {mode}")
+    if mode == "disk":
+        return None
+
+    tmpfs_dir = env_setting.WORK_TMPFS_DIR
+    if not os.path.isdir(tmpfs_dir):
+        return None
+    if mode == "tmpfs":
+        return tmpfs_dir
+
+    # RAMを使い切らないよう、見積もりサイズに予備を加えて空き容量と比較する
+    if _tmpfs_free_bytes(tmpfs_dir) >= estimated_bytes + env_setting.WORK_TMPFS_RESERVE_BYTES:
+        return tmpfs_dir
+    return None
+
+
+@contextmanager
+def working_directory(estimated_bytes: int = 0, mode: Optional[str] = None, prefix: str = "shortmovie_") -> Iterator[str]:
+    """中間ファイル用の作業ディレクトリを作成し、処理の成否にかかわらず終了時に削除する"""
+    root = select_working_root(estimated_bytes, mode)
+    temp_dir = tempfile.mkdtemp(prefix=prefix, dir=root)
+    print(f"DEBUG: 作業ディレクトリ: {temp_dir} ({'tmpfs' if root else 'disk'})")
+    try:
+        yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def is_tmpfs_path(path: str) -> bool:
+    """パスがRAM上の作業ディレクトリ配下かどうか"""
+    return os.path.abspath(path).startswith(os.path.abspath(env_setting.WORK_TMPFS_DIR) + os.sep)
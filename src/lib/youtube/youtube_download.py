@@ -3,11 +3,20 @@
 
 import os
 import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import ffmpeg
 import yt_dlp
 from urllib.parse import urlparse, parse_qs
-from src.agent_sdk.schemas.youtube import VideoInfo, YouTubeDownloadResult
+from src.agent_sdk.schemas.youtube import DownloadStats, SourceClip, VideoInfo, YouTubeClipsDownloadResult, YouTubeDownloadResult
+from src.lib.youtube.download_profiles import DownloadProfile, get_download_profile
+from src.lib.youtube.media_store import MediaEntry, MediaStore, get_default_media_store
+from src.lib.youtube.source_clips import CLIP_PADDING, SourceClipIndex, plan_clip_windows
+from src.setting import env_setting
 
 
 def cleanup_cookie_file(cookie_file_path: str) -> None:
@@ -48,179 +57,513 @@ def extract_video_id_from_url(url: str) -> str:
         return url
 
 
-def download_youtube_video(
-    video_url: str, output_dir: Optional[str] = None, include_audio: bool = True, video_quality: str = "720p", cookies: Optional[str] = None
+# ダウンロード済みファイルを探す際の拡張子
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".avi")
+
+
+@contextmanager
+def _ydl_options(cookies: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """yt-dlpの共通設定を作成（Cookiesは一時ファイルに書き出し、終了時に削除）"""
+    ydl_opts = default_ydl_opts.copy()
+    cookie_file_path = None
+    try:
+        if cookies:
+            # 一時的なCookieファイルを作成
+            with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as cookie_file:
+                cookie_file.write(cookies)
+                cookie_file_path = cookie_file.name
+            ydl_opts["cookiefile"] = cookie_file_path
+        yield ydl_opts
+    finally:
+        # エラーが発生した場合もCookieファイルをクリーンアップ
+        if cookie_file_path:
+            cleanup_cookie_file(cookie_file_path)
+
+
+def _video_info_from_info_dict(info: Dict[str, Any], video_id: str, video_url: str) -> Dict[str, Any]:
+    """yt-dlpのinfo dictからVideoInfo用の辞書を作成（値がNoneの項目は既定値にする）"""
+    return {
+        "video_id": video_id,
+        "title": info.get("title") or "",
+        "description": info.get("description") or "",
+        "duration": info.get("duration") or 0,
+        "duration_string": info.get("duration_string") or "",
+        "uploader": info.get("uploader") or "",
+        "upload_date": info.get("upload_date") or "",
+        "view_count": info.get("view_count") or 0,
+        "like_count": info.get("like_count") or 0,
+        "thumbnail": info.get("thumbnail") or "",
+        "webpage_url": info.get("webpage_url") or video_url,
+        "tags": info.get("tags") or [],
+        "categories": info.get("categories") or [],
+        "availability": info.get("availability") or "",
+        "age_limit": info.get("age_limit") or 0,
+    }
+
+
+def _downloaded_files(info: Dict[str, Any], output_path: Path, video_id: str) -> List[Dict[str, Any]]:
+    """ダウンロードしたファイルの一覧（filepath と、範囲を指定した場合は section_start / section_end）
+
+    info dictにない場合は出力ディレクトリから探す。
+    """
+    downloads = [
+        {"filepath": download["filepath"], "section_start": download.get("section_start"), "section_end": download.get("section_end")}
+        for download in info.get("requested_downloads") or []
+        if download.get("filepath") and os.path.exists(download["filepath"])
+    ]
+    if downloads:
+        return downloads
+    for file_path in output_path.glob(f"{video_id}_*"):
+        if file_path.suffix.lower() in VIDEO_EXTENSIONS:
+            return [{"filepath": str(file_path), "section_start": None, "section_end": None}]
+    return []
+
+
+def extract_audio_track(video_path: str, audio_path: str, bitrate: str = "192k") -> str:
+    """ダウンロード済みの動画から音声トラックをmp3として抽出（映像は読み込まない）
+
+    Raises:
+        ffmpeg.Error: ffmpegが異常終了した場合
+    """
+    ffmpeg.input(video_path).audio.output(audio_path, acodec="libmp3lame", audio_bitrate=bitrate, vn=None).overwrite_output().run(quiet=True)
+    return audio_path
+
+
+def _format_selector(download_video: bool, video_quality: str) -> str:
+    """yt-dlpのフォーマット指定（音声のみが必要な場合は音声トラックだけをダウンロード）"""
+    return f"best[height<={video_quality[:-1]}]" if download_video else "bestaudio/best"  # 720p -> 720
+
+
+class _DownloadMonitor:
+    """yt-dlpの進捗フックでダウンロード量・フラグメント数を集計し、キャンセル要求があれば中断する"""
+
+    def __init__(self, cancel_event: Optional[threading.Event] = None):
+        self.cancel_event = cancel_event
+        self.downloaded_bytes: Dict[str, int] = {}  # ファイルごとの取得済みバイト数
+        self.fragment_count = 0
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled("ダウンロードがキャンセルされました")
+
+    def hook(self, status: Dict[str, Any]) -> None:
+        self.check_cancelled()
+        filename = status.get("filename", "")
+        if status.get("status") == "finished" and status.get("total_bytes"):
+            self.downloaded_bytes[filename] = status["total_bytes"]
+        elif status.get("downloaded_bytes") is not None:
+            self.downloaded_bytes[filename] = status["downloaded_bytes"]
+        self.fragment_count = max(self.fragment_count, status.get("fragment_count") or 0)
+
+
+def _partial_bytes(output_path: Path) -> int:
+    """出力ディレクトリに残っている中断したダウンロード（.part）の合計サイズ"""
+    return sum(path.stat().st_size for path in output_path.glob("*.part") if path.is_file())
+
+
+def _run_ydl(
+    video_url: str,
+    video_id: str,
+    cookies: Optional[str] = None,
+    output_path: Optional[Path] = None,
+    format_selector: Optional[str] = None,
+    on_metadata: Optional[Callable[[VideoInfo], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    download_profile: Optional[DownloadProfile] = None,
+    download_ranges: Optional[List[Tuple[float, float]]] = None,
+    precise_cuts: bool = False,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[DownloadStats]]:
+    """1つのyt-dlpセッションで動画情報を取得し、output_path指定時はダウンロードも行う
+
+    download_ranges を指定した場合は、その時刻範囲（秒）だけを範囲ごとに別のファイルとしてダウンロードする。
+    precise_cuts=False では再エンコードせずに切り出すため、各ファイルは範囲の開始直前のキーフレームから始まることがある。
+
+    Returns:
+        (VideoInfo用の辞書, ダウンロードしたファイルの一覧（_downloaded_files を参照、ダウンロードしない場合は空）, ダウンロードの統計)
+
+    Raises:
+        yt_dlp.utils.DownloadCancelled: cancel_eventがセットされた場合
+    """
+    monitor = _DownloadMonitor(cancel_event)
+    with _ydl_options(cookies) as ydl_opts:
+        if output_path is not None:
+            if download_profile is not None:
+                ydl_opts.update(download_profile.ydl_options())
+            ydl_opts.update(
+                {
+                    "outtmpl": str(output_path / (f"{video_id}_%(section_start)s-%(section_end)s.%(ext)s" if download_ranges else f"{video_id}_%(title)s.%(ext)s")),
+                    "format": format_selector,
+                    "writeinfojson": True,  # メタデータも保存
+                    "writesubtitles": False,  # 字幕は別途取得
+                    "writeautomaticsub": False,
+                    "progress_hooks": [monitor.hook],  # 取得量の集計とダウンロード中のキャンセル確認
+                }
+            )
+            if download_ranges:
+                ydl_opts["download_ranges"] = yt_dlp.utils.download_range_func(None, download_ranges)
+                ydl_opts["force_keyframes_at_cuts"] = precise_cuts
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # メタデータ取得（抽出はこの1回のみ）
+            info = ydl.extract_info(video_url, download=False)
+            video_info = _video_info_from_info_dict(info, video_id, video_url)
+            if on_metadata is not None:
+                on_metadata(VideoInfo(**video_info))
+            if output_path is None:
+                return video_info, [], None
+
+            # 取得済みのinfo dictからダウンロード実行
+            monitor.check_cancelled()
+            resumed_bytes = _partial_bytes(output_path) if download_profile is None or download_profile.resume else 0
+            started = time.monotonic()
+            info = ydl.process_ie_result(info, download=True)
+            elapsed = time.monotonic() - started
+            downloads = _downloaded_files(info, output_path, video_id)
+
+    downloaded_bytes = sum(monitor.downloaded_bytes.values()) or sum(os.path.getsize(download["filepath"]) for download in downloads)
+    transferred_bytes = max(0, downloaded_bytes - resumed_bytes)
+    stats = DownloadStats(
+        profile=download_profile.name if download_profile else "",
+        downloaded_bytes=downloaded_bytes,
+        transferred_bytes=transferred_bytes,
+        resumed_bytes=resumed_bytes,
+        elapsed=round(elapsed, 3),
+        average_speed=round(transferred_bytes / elapsed, 1) if elapsed > 0 else 0.0,
+        fragment_count=monitor.fragment_count,
+        concurrent_fragments=download_profile.concurrent_fragments if download_profile else 1,
+    )
+    print(f"DEBUG: ダウンロード完了 - {downloaded_bytes / 1024**2:.1f}MB, {elapsed:.1f}秒, {stats.average_speed / 1024**2:.2f}MB/s (再開: {resumed_bytes}バイト)")
+    return video_info, downloads, stats
+
+
+def _fetch_into_media_store(
+    video_url: str,
+    video_id: str,
+    format_selector: str,
+    download_video: bool,
+    include_audio: bool,
+    cookies: Optional[str],
+    media_store: MediaStore,
+    on_metadata: Optional[Callable[[VideoInfo], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    download_profile: Optional[DownloadProfile] = None,
+) -> YouTubeDownloadResult:
+    """元動画ストアから取得し、なければダウンロードしてストアに保存する
+
+    ダウンロードはキーごとに固定の作業ディレクトリで行い、中断した場合は .part を残して次回のダウンロードで再開する。
+    """
+    key = media_store.make_key(video_id, format_selector)
+    # 同じ動画・フォーマットを同時にダウンロードしない
+    with media_store.key_lock(key):
+        entry = media_store.get(key)
+        cached = entry is not None
+        download_stats = None
+        if entry is None:
+            resume = download_profile is None or download_profile.resume
+            with media_store.staging(key if resume else None, keep_on_error=resume) as staging_dir:
+                video_info, downloads, download_stats = _run_ydl(video_url, video_id, cookies, Path(staging_dir), format_selector, on_metadata, cancel_event, download_profile)
+                downloaded_path = downloads[0]["filepath"] if downloads else None
+                if downloaded_path is None:
+                    return YouTubeDownloadResult(success=False, error="ダウンロードしたファイルが見つかりません", metadata=VideoInfo(**video_info))
+                audio_path = extract_audio_track(downloaded_path, os.path.join(staging_dir, f"{video_id}_audio.mp3")) if include_audio else None
+                # 音声抽出用にダウンロードした音声トラックは保存しない
+                entry = media_store.commit(
+                    video_id, format_selector, staging_dir, video_path=downloaded_path if download_video else None, audio_path=audio_path, metadata=video_info
+                )
+
+            # 保存したエントリは、呼び出し元が参照を登録する前に削除されないよう保護して容量を整理する
+            pin_owner = f"download:{uuid.uuid4().hex}"
+            media_store.acquire(entry.key, pin_owner)
+            try:
+                media_store.evict()
+            finally:
+                media_store.release(entry.key, pin_owner)
+        else:
+            if on_metadata is not None:
+                on_metadata(VideoInfo(**entry.metadata))
+            if include_audio and not entry.audio_path:
+                # 既存の動画から音声を作成して追加
+                with media_store.staging() as staging_dir:
+                    entry = media_store.add_audio(entry, extract_audio_track(entry.video_path, os.path.join(staging_dir, f"{video_id}_audio.mp3")))
+
+    print(f"DEBUG: 元動画ストア{'から取得' if cached else 'に保存'} - {entry.key}")
+    return YouTubeDownloadResult(
+        success=True,
+        video_path=entry.video_path if download_video else None,
+        audio_path=entry.audio_path if include_audio else None,
+        metadata=VideoInfo(**entry.metadata),
+        media_key=entry.key,
+        cached=cached,
+        download_stats=download_stats,
+    )
+
+
+def fetch_youtube_video(
+    video_url: str,
+    output_dir: Optional[str] = None,
+    download_video: bool = True,
+    include_audio: bool = False,
+    video_quality: str = "720p",
+    cookies: Optional[str] = None,
+    media_store: Optional[MediaStore] = None,
+    use_media_store: bool = True,
+    on_metadata: Optional[Callable[[VideoInfo], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    download_profile: Optional[str] = None,
+    rate_limit: Optional[str] = None,
 ) -> YouTubeDownloadResult:
-    """YouTube動画をダウンロードする
+    """1つのyt-dlpセッションで動画情報の取得とダウンロードを行う
+
+    extract_info は1回だけ呼び、取得したinfo dictを process_ie_result に渡してダウンロードする（再抽出しない）。
+    音声ファイルはYouTubeから別途ダウンロードせず、ダウンロードしたファイルからffmpegで抽出する。
+    output_dirを指定しない場合は元動画ストアに保存し、同じ動画・フォーマットはダウンロードせずにストアのファイルを返す。
 
     Args:
         video_url: YouTube動画のURL
-        output_dir: 出力ディレクトリ（指定しない場合は一時ディレクトリ）
-        include_audio: 音声ファイルも別途ダウンロードするかどうか
+        output_dir: 出力ディレクトリ（指定した場合は元動画ストアを使わずにこのディレクトリへダウンロード）
+        download_video: 動画をダウンロードするかどうか（Falseかつinclude_audio=Falseなら情報取得のみ）
+        include_audio: 音声ファイル（mp3）も作成するかどうか
         video_quality: 動画品質（720p, 1080p等）
         cookies: YouTubeのCookies（Netscape形式またはブラウザからエクスポートした形式）
+        media_store: 使用する元動画ストア（未指定時は共有ストア）
+        use_media_store: output_dir未指定時に元動画ストアを使うかどうか（Falseの場合は一時ディレクトリ）
+        on_metadata: 動画情報を取得した時点で（ダウンロードの完了を待たずに）呼び出すコールバック
+        cancel_event: セットされるとダウンロードを中断する
+        download_profile: ダウンロード設定の名前（未指定時は設定の DOWNLOAD_PROFILE、download_profiles.DOWNLOAD_PROFILES を参照）
+        rate_limit: 帯域制限（"2M" など、未指定時は設定の DOWNLOAD_RATE_LIMIT またはプロファイルの値）
 
     Returns:
-        ダウンロード結果の辞書
+        動画情報とダウンロードしたファイルのパスを含む結果（元動画ストアを使った場合は media_key、ダウンロードした場合は download_stats も設定）
     """
+    should_download = download_video or include_audio
     try:
-        # 出力ディレクトリの設定
-        if output_dir is None:
-            output_dir = tempfile.mkdtemp()
-
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-
         # 動画ID抽出
         video_id = extract_video_id_from_url(video_url)
         if not video_id:
-            return {"success": False, "error": "無効なYouTube URLです", "video_id": None, "video_path": None, "audio_path": None, "metadata": None}
-
-        # yt-dlp設定
-        ydl_opts = default_ydl_opts.copy()
-        ydl_opts.update(
-            {
-                "outtmpl": str(output_path / f"{video_id}_%(title)s.%(ext)s"),
-                "format": f"best[height<={video_quality[:-1]}]",  # 720p -> 720
-                "writeinfojson": True,  # メタデータも保存
-                "writesubtitles": False,  # 字幕は別途取得
-                "writeautomaticsub": False,
-            }
-        )
+            return YouTubeDownloadResult(success=False, error="無効なYouTube URLです")
 
-        # Cookiesが提供されている場合は追加
-        cookie_file_path = None
-        if cookies:
-            # 一時的なCookieファイルを作成
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as cookie_file:
-                cookie_file.write(cookies)
-                cookie_file_path = cookie_file.name
-                ydl_opts["cookiefile"] = cookie_file_path
+        if not should_download:
+            video_info, _, _ = _run_ydl(video_url, video_id, cookies, on_metadata=on_metadata)
+            return YouTubeDownloadResult(success=True, metadata=VideoInfo(**video_info))
 
-        video_path = None
-        audio_path = None
-        metadata = {}
+        profile = get_download_profile(download_profile or env_setting.DOWNLOAD_PROFILE, rate_limit or env_setting.DOWNLOAD_RATE_LIMIT or None)
+        format_selector = _format_selector(download_video, video_quality)
+        if output_dir is None and use_media_store:
+            return _fetch_into_media_store(
+                video_url,
+                video_id,
+                format_selector,
+                download_video,
+                include_audio,
+                cookies,
+                media_store or get_default_media_store(),
+                on_metadata,
+                cancel_event,
+                profile,
+            )
 
-        # 動画ダウンロード
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # メタデータ取得
-            info = ydl.extract_info(video_url, download=False)
-            metadata = {
-                "video_id": video_id,
-                "title": info.get("title", ""),
-                "description": info.get("description", ""),
-                "duration": info.get("duration", 0),
-                "uploader": info.get("uploader", ""),
-                "upload_date": info.get("upload_date", ""),
-                "view_count": info.get("view_count", 0),
-                "like_count": info.get("like_count", 0),
-                "thumbnail": info.get("thumbnail", ""),
-                "webpage_url": info.get("webpage_url", video_url),
-            }
-
-            # 動画ダウンロード実行
-            ydl.download([video_url])
-
-            # ダウンロードされたファイルを探す
-            for file_path in output_path.glob(f"{video_id}_*"):
-                if file_path.suffix.lower() in [".mp4", ".mkv", ".webm", ".avi"]:
-                    video_path = str(file_path)
-                    break
-
-        # 音声ファイルも別途ダウンロード（必要に応じて）
-        if include_audio:
-            audio_opts = {
-                "outtmpl": str(output_path / f"{video_id}_audio.%(ext)s"),
-                "format": "bestaudio/best",
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }
-                ],
-            }
-
-            with yt_dlp.YoutubeDL(audio_opts) as ydl:
-                ydl.download([video_url])
-
-                # 音声ファイルを探す
-                for file_path in output_path.glob(f"{video_id}_audio.*"):
-                    if file_path.suffix.lower() in [".mp3", ".wav", ".m4a"]:
-                        audio_path = str(file_path)
-                        break
-
-        # Cookieファイルのクリーンアップ
-        if cookie_file_path:
-            cleanup_cookie_file(cookie_file_path)
+        # 出力ディレクトリの設定
+        output_path = Path(output_dir or tempfile.mkdtemp())
+        output_path.mkdir(parents=True, exist_ok=True)
 
-        return YouTubeDownloadResult(success=True, video_path=video_path, audio_path=audio_path, metadata=VideoInfo(**metadata) if metadata else None)
+        # 同じディレクトリに中断した .part があればプロファイルの設定に従って再開する
+        video_info, downloads, download_stats = _run_ydl(video_url, video_id, cookies, output_path, format_selector, on_metadata, cancel_event, profile)
+        downloaded_path = downloads[0]["filepath"] if downloads else None
+        if downloaded_path is None:
+            return YouTubeDownloadResult(success=False, error="ダウンロードしたファイルが見つかりません", metadata=VideoInfo(**video_info))
 
-    except Exception as e:
-        # エラーが発生した場合もCookieファイルをクリーンアップ
-        if "cookie_file_path" in locals() and cookie_file_path:
-            cleanup_cookie_file(cookie_file_path)
-        return YouTubeDownloadResult(success=False, error=f"動画ダウンロードエラー: {str(e)}")
+        audio_path = extract_audio_track(downloaded_path, str(output_path / f"{video_id}_audio.mp3")) if include_audio else None
+        video_path = downloaded_path
+        if not download_video:
+            # 音声抽出用にダウンロードしたファイルは不要
+            os.remove(downloaded_path)
+            video_path = None
 
+        return YouTubeDownloadResult(success=True, video_path=video_path, audio_path=audio_path, metadata=VideoInfo(**video_info), download_stats=download_stats)
 
-def get_video_info(video_url: str, cookies: Optional[str] = None) -> YouTubeDownloadResult:
-    """YouTube動画の情報を取得（ダウンロードなし）
+    except yt_dlp.utils.DownloadCancelled as e:
+        return YouTubeDownloadResult(success=False, error=str(e))
+    except Exception as e:
+        error_label = "動画ダウンロードエラー" if should_download else "動画情報取得エラー"
+        return YouTubeDownloadResult(success=False, error=f"{error_label}: {str(e)}")
+
+
+def _source_clip(entry: MediaEntry, window_end: float) -> SourceClip:
+    """ストアのエントリをクリップとして扱う（全体のダウンロードは先頭からの1つのクリップ）"""
+    if entry.is_clip:
+        return SourceClip(path=entry.video_path, start_time=entry.clip_start, end_time=entry.clip_end, media_key=entry.key)
+    duration = float(entry.metadata.get("duration") or 0)
+    return SourceClip(path=entry.video_path, start_time=0.0, end_time=max(duration, window_end), media_key=entry.key)
+
+
+def download_youtube_clips(
+    video_url: str,
+    cut_segments: List[Dict[str, Any]],
+    padding: float = CLIP_PADDING,
+    video_quality: str = "720p",
+    cookies: Optional[str] = None,
+    media_store: Optional[MediaStore] = None,
+    download_profile: Optional[str] = None,
+    rate_limit: Optional[str] = None,
+    cancel_event: Optional[threading.Event] = None,
+    precise_cuts: bool = False,
+) -> YouTubeClipsDownloadResult:
+    """カットの前後の時刻範囲だけをダウンロードし、元動画ストアにクリップとして保存する（cuts-first）
+
+    カットに padding 秒の余白を加えて近い範囲を結合し（source_clips.plan_clip_windows）、1つのyt-dlpセッションで
+    範囲ごとに別のファイルとしてダウンロードする。ストアに範囲を含むクリップまたは全体のダウンロードがあればそれを使い、
+    足りない範囲だけをダウンロードする。返すクリップは create_short_video の source_clips にそのまま渡せる。
 
     Args:
         video_url: YouTube動画のURL
-        cookies: YouTubeのCookies（Netscape形式またはブラウザからエクスポートした形式）
+        cut_segments: カットのリスト（start_time / end_time を含む辞書、複数のシナリオのカットをまとめて渡してよい）
+        padding: カットの前後に加える余白（秒）。再エンコードせずに切り出す場合のキーフレーム位置のずれもこの余白で吸収する
+        video_quality: 動画品質（720p, 1080p等）
+        cookies: YouTubeのCookies
+        media_store: 使用する元動画ストア（未指定時は共有ストア）
+        download_profile: ダウンロード設定の名前（未指定時は設定の DOWNLOAD_PROFILE）
+        rate_limit: 帯域制限（"2M" など）
+        cancel_event: セットされるとダウンロードを中断する
+        precise_cuts: 範囲の境界で再エンコードしてフレーム単位で切り出すかどうか（遅くなる）
 
     Returns:
-        動画情報の辞書
+        クリップの一覧を含む結果
     """
     try:
         video_id = extract_video_id_from_url(video_url)
         if not video_id:
-            return YouTubeDownloadResult(success=False, error="無効なYouTube URLです")
+            return YouTubeClipsDownloadResult(success=False, error="無効なYouTube URLです")
+
+        windows = plan_clip_windows(cut_segments, padding)
+        if not windows:
+            return YouTubeClipsDownloadResult(success=False, error="ダウンロードするカットがありません")
+
+        store = media_store or get_default_media_store()
+        format_selector = _format_selector(True, video_quality)
+        clips: Dict[str, SourceClip] = {}
+        metadata: Dict[str, Any] = {}
+        download_stats = None
+        downloaded = 0
+
+        # 同じ動画・フォーマットのクリップを同時にダウンロードしない
+        with store.key_lock(store.make_key(video_id, format_selector)):
+            missing = []
+            for start_time, end_time in windows:
+                entry = store.find_covering(video_id, format_selector, start_time, end_time)
+                if entry is None:
+                    missing.append((start_time, end_time))
+                    continue
+                clips.setdefault(entry.key, _source_clip(entry, end_time))
+                metadata = metadata or entry.metadata
+            reused = len(clips)
+
+            if missing:
+                print(f"DEBUG: クリップをダウンロード - {video_id} ({len(missing)}範囲, 合計{sum(end - start for start, end in missing):.1f}秒)")
+                profile = get_download_profile(download_profile or env_setting.DOWNLOAD_PROFILE, rate_limit or env_setting.DOWNLOAD_RATE_LIMIT or None)
+                with store.staging() as staging_dir:
+                    video_info, downloads, download_stats = _run_ydl(
+                        video_url, video_id, cookies, Path(staging_dir), format_selector, None, cancel_event, profile, missing, precise_cuts
+                    )
+                    metadata = video_info
+                    for download in downloads:
+                        # yt-dlpが返す範囲を要求した範囲に対応付ける（範囲の情報がない場合は1範囲のみのとき）
+                        section_start = download.get("section_start")
+                        if section_start is None and len(missing) != 1:
+                            continue
+                        window = missing[0] if section_start is None else min(missing, key=lambda window: abs(window[0] - float(section_start)))
+                        entry = store.commit(video_id, format_selector, staging_dir, video_path=download["filepath"], metadata=video_info, clip_range=window)
+                        clips.setdefault(entry.key, _source_clip(entry, window[1]))
+                        downloaded += 1
+
+                # 保存したクリップは、呼び出し元が参照を登録する前に削除されないよう保護して容量を整理する
+                pin_owner = f"download:{uuid.uuid4().hex}"
+                for key in clips:
+                    store.acquire(key, pin_owner)
+                try:
+                    store.evict()
+                finally:
+                    for key in clips:
+                        store.release(key, pin_owner)
+
+        result = YouTubeClipsDownloadResult(
+            success=True,
+            clips=sorted(clips.values(), key=lambda clip: clip.start_time),
+            metadata=VideoInfo(**metadata) if metadata else None,
+            downloaded_clips=downloaded,
+            reused_clips=reused,
+            download_stats=download_stats,
+        )
+        missing_segments = SourceClipIndex(result.clips).missing_segments(cut_segments)
+        if missing_segments:
+            return result.copy(update={"success": False, "error": f"{len(missing_segments)}個のカットのクリップをダウンロードできませんでした"})
+        print(f"DEBUG: クリップの準備完了 - {video_id} (ダウンロード: {downloaded}, 再利用: {reused})")
+        return result
+
+    except yt_dlp.utils.DownloadCancelled as e:
+        return YouTubeClipsDownloadResult(success=False, error=str(e))
+    except Exception as e:
+        return YouTubeClipsDownloadResult(success=False, error=f"クリップのダウンロードエラー: {str(e)}")
 
-        ydl_opts = default_ydl_opts.copy()
 
-        # Cookiesが提供されている場合は追加
-        cookie_file_path = None
-        if cookies:
-            # 一時的なCookieファイルを作成
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as cookie_file:
-                cookie_file.write(cookies)
-                cookie_file_path = cookie_file.name
-                ydl_opts["cookiefile"] = cookie_file_path
+def download_media(
+    media_url: str,
+    output_dir: str,
+    name: str = "media",
+    format_selector: str = "best",
+    download_profile: str = "fast",
+    rate_limit: Optional[str] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> YouTubeDownloadResult:
+    """任意のURL（HLS/DASHのマニフェストなど）をダウンロード設定を指定してダウンロードする（ベンチマーク・動作確認用）
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
+    同じ output_dir・name で呼び出すと、中断した .part から再開する（プロファイルの resume が有効な場合）。
+    """
+    try:
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        profile = get_download_profile(download_profile, rate_limit)
+        video_info, downloads, download_stats = _run_ydl(
+            media_url, name, output_path=output_path, format_selector=format_selector, cancel_event=cancel_event, download_profile=profile
+        )
+        downloaded_path = downloads[0]["filepath"] if downloads else None
+        if downloaded_path is None:
+            return YouTubeDownloadResult(success=False, error="ダウンロードしたファイルが見つかりません", metadata=VideoInfo(**video_info))
+        return YouTubeDownloadResult(success=True, video_path=downloaded_path, metadata=VideoInfo(**video_info), download_stats=download_stats)
+    except yt_dlp.utils.DownloadCancelled as e:
+        return YouTubeDownloadResult(success=False, error=str(e))
+    except Exception as e:
+        return YouTubeDownloadResult(success=False, error=f"動画ダウンロードエラー: {str(e)}")
 
-            video_info = {
-                "video_id": video_id,
-                "title": info.get("title", ""),
-                "description": info.get("description", ""),
-                "duration": info.get("duration", 0),
-                "duration_string": info.get("duration_string", ""),
-                "uploader": info.get("uploader", ""),
-                "upload_date": info.get("upload_date", ""),
-                "view_count": info.get("view_count", 0),
-                "like_count": info.get("like_count", 0),
-                "thumbnail": info.get("thumbnail", ""),
-                "webpage_url": info.get("webpage_url", video_url),
-                "tags": info.get("tags", []),
-                "categories": info.get("categories", []),
-                "availability": info.get("availability", ""),
-                "age_limit": info.get("age_limit", 0),
-            }
-
-            # Cookieファイルのクリーンアップ
-            if cookie_file_path:
-                cleanup_cookie_file(cookie_file_path)
 
-            return YouTubeDownloadResult(success=True, metadata=VideoInfo(**video_info))
+def download_youtube_video(
+    video_url: str, output_dir: Optional[str] = None, include_audio: bool = True, video_quality: str = "720p", cookies: Optional[str] = None
+) -> YouTubeDownloadResult:
+    """YouTube動画をダウンロードする（fetch_youtube_video を参照）
 
-    except Exception as e:
-        # エラーが発生した場合もCookieファイルをクリーンアップ
-        if "cookie_file_path" in locals() and cookie_file_path:
-            cleanup_cookie_file(cookie_file_path)
-        return YouTubeDownloadResult(success=False, error=f"動画情報取得エラー: {str(e)}")
+    Args:
+        video_url: YouTube動画のURL
+        output_dir: 出力ディレクトリ（指定しない場合は元動画ストア）
+        include_audio: 音声ファイルも作成するかどうか
+        video_quality: 動画品質（720p, 1080p等）
+        cookies: YouTubeのCookies（Netscape形式またはブラウザからエクスポートした形式）
+
+    Returns:
+        ダウンロード結果
+    """
+    return fetch_youtube_video(video_url, output_dir=output_dir, download_video=True, include_audio=include_audio, video_quality=video_quality, cookies=cookies)
+
+
+def get_video_info(video_url: str, cookies: Optional[str] = None) -> YouTubeDownloadResult:
+    """YouTube動画の情報を取得（ダウンロードなし）
+
+    Args:
+        video_url: YouTube動画のURL
+        cookies: YouTubeのCookies（Netscape形式またはブラウザからエクスポートした形式）
+
+    Returns:
+        動画情報
+    """
+    return fetch_youtube_video(video_url, download_video=False, include_audio=False, cookies=cookies)
 
 
 def cleanup_temp_files(file_paths: list) -> bool:
@@ -15,6 +15,33 @@ class EnvSetting(BaseSettings):
     MYSQL_READ_ONLY_HOST: str = ""
     MYSQL_DATABASE: str = ""
 
+    # 動画・字幕などのキャッシュ保存先
+    CACHE_DIR: str = ".cache"
+    RENDER_CACHE_MAX_BYTES: int = 10 * 1024**3
+
+    # ダウンロードした元動画を保存するストアの容量上限（超えた分は参照されていない古いものから削除）
+    MEDIA_STORE_MAX_BYTES: int = 50 * 1024**3
+    # ストアのエントリへのセッションの参照の有効期間（秒）。セッションの終了は検知できないため、期間内に更新されない参照は解除する
+    MEDIA_STORE_REFERENCE_TTL_SECONDS: int = 6 * 3600
+
+    # 元動画のダウンロード設定（default / fast / throttled）と帯域制限（"2M" など、空の場合はプロファイルの値）
+    DOWNLOAD_PROFILE: str = "fast"
+    DOWNLOAD_RATE_LIMIT: str = ""
+
+    # 動画処理の中間ファイルの置き場所（auto / tmpfs / disk）
+    WORK_STORAGE: str = "auto"
+    WORK_TMPFS_DIR: str = "/dev/shm"
+    WORK_TMPFS_RESERVE_BYTES: int = 512 * 1024**2
+
+    # バックグラウンドで同時に実行するレンダリングジョブ数
+    RENDER_QUEUE_WORKERS: int = 2
+
+    # 字幕の誤変換を置換するユーザー辞書（JSONまたはタブ区切り、空の場合は既定の辞書のみ）
+    TRANSCRIPT_DICTIONARY_PATH: str = ""
+
+    # 取得した字幕のキャッシュの有効期限（秒）
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
     class Config:
         env_file = ".env.local"
 
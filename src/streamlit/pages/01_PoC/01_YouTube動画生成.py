@@ -13,6 +13,8 @@ from src.agent_sdk.context.youtube_scenario_context import YouTubeScenarioContex
 from src.agent_sdk.hooks.youtube_agent_hooks import YouTubeAgentHooks
 from src.agent_sdk.agents_registry.youtube_scenario import create_youtube_scenario_assistant
 from src.agent_sdk.utils import create_model_selector, create_model_settings, create_reasoning_setting
+from src.lib.youtube.download_profiles import DOWNLOAD_PROFILES
+from src.setting import env_setting
 from src.streamlit.components.login import check_login
 
 check_login()
@@ -32,6 +34,8 @@ if "youtube_context" not in st.session_state:
     st.session_state.youtube_context = YouTubeScenarioContext()
 
 youtube_context = st.session_state.youtube_context
+# 元動画ストアの参照はセッションの終了時に解除できないため、ページの実行ごとに有効期間を延長する
+youtube_context.refresh_source_media()
 
 # YouTubeAgentHooksのインスタンス作成
 hooks = YouTubeAgentHooks()
@@ -60,7 +64,13 @@ with tab1:
         extract_audio = st.checkbox("音声ファイルも抽出", value=False)
 
     with col2:
-        video_quality = st.selectbox("動画品質", ["720p", "1080p", "480p"], index=0)
+        source_quality = st.selectbox("動画品質", ["720p", "1080p", "480p"], index=0)
+        download_profile = st.selectbox(
+            "ダウンロード方式",
+            list(DOWNLOAD_PROFILES),
+            index=list(DOWNLOAD_PROFILES).index(env_setting.DOWNLOAD_PROFILE) if env_setting.DOWNLOAD_PROFILE in DOWNLOAD_PROFILES else 0,
+            format_func=lambda x: {"default": "標準", "fast": "高速（並列取得）", "throttled": "帯域制限"}.get(x, x),
+        )
         process_transcript = st.checkbox("字幕を自動処理", value=True)
 
     # Cookies設定（エクスパンダーで隠す）
@@ -100,70 +110,78 @@ with tab1:
         if youtube_url:
             with st.spinner("動画をダウンロード中..."):
                 try:
-                    # YouTube URLをContextに設定
-                    from src.lib.youtube.youtube_download import extract_video_id_from_url, get_video_info, download_youtube_video
-                    from src.lib.youtube.transcript_extraction import extract_youtube_transcript
-
-                    video_id = extract_video_id_from_url(youtube_url)
-
-                    # 動画情報を取得
-                    video_info_result = get_video_info(youtube_url, cookies=youtube_cookies if youtube_cookies.strip() else None)
-                    if video_info_result.success:
-                        video_info = video_info_result.metadata.dict()
-                        youtube_context.set_video_info(video_info)
-                        st.success(f"📹 動画情報を取得しました: {video_info['title']}")
-
-                        # 動画情報をデバッグ表示
-                        with st.expander("動画情報詳細"):
-                            st.json(video_info)
-
-                    # 動画をダウンロード（必要に応じて）
-                    if download_video:
-                        download_result = download_youtube_video(
-                            youtube_url, video_quality=video_quality, include_audio=extract_audio, cookies=youtube_cookies if youtube_cookies.strip() else None
-                        )
-                        if download_result.success:
-                            # Contextに動画パスを設定
-                            youtube_context.set_video_paths(download_result.video_path, download_result.audio_path or "")
-                            st.success(f"🎬 動画をダウンロードしました: {download_result.video_path}")
-                        else:
-                            st.warning(f"⚠️ 動画ダウンロードに失敗: {download_result.error}")
-                    else:
-                        st.info("💡 動画ダウンロードはスキップされました")
-
-                    # 字幕を取得
-                    transcript_result = extract_youtube_transcript(video_id)
-                    if transcript_result["success"]:
-                        # 字幕データを取得（transcript_resultの"transcript"キーから）
-                        transcript_chunks = transcript_result["transcript"]
-
-                        # 字幕を処理
-                        if process_transcript:
-                            # 文章分割と結合処理
-                            from src.lib.youtube.transcript_extraction import split_transcript_by_sentence, merge_transcript_until_period, fix_transcript_text
-
-                            split_chunks = split_transcript_by_sentence(transcript_chunks)
-                            merged_chunks = merge_transcript_until_period(split_chunks)
-                            processed_chunks = fix_transcript_text(merged_chunks)
-
-                            youtube_context.set_processed_transcript(processed_chunks)
-                            youtube_context.set_transcript_chunks(transcript_chunks)
-                        else:
-                            youtube_context.set_transcript_chunks(transcript_chunks)
-
-                        st.success(f"📝 字幕を取得しました: {transcript_result['total_segments']}セグメント ({transcript_result['language']})")
+                    # 動画情報・字幕・動画ファイルを並行して取得し、完了したものから順にContextへ設定
+                    from src.lib.youtube.fetch_pipeline import iter_youtube_sources
+
+                    stage_timings = {}
+                    for stage_result in iter_youtube_sources(
+                        youtube_url,
+                        download_video=download_video,
+                        include_audio=download_video and extract_audio,
+                        video_quality=source_quality,
+                        cookies=youtube_cookies if youtube_cookies.strip() else None,
+                        download_profile=download_profile,
+                        process_transcript=process_transcript,
+                    ):
+                        stage_timings[stage_result.stage] = round(stage_result.elapsed, 2)
+
+                        if stage_result.stage == "metadata":
+                            if stage_result.success:
+                                video_info = stage_result.result.dict()
+                                youtube_context.set_video_info(video_info)
+                                st.success(f"📹 動画情報を取得しました: {video_info['title']}")
+
+                                # 動画情報をデバッグ表示
+                                with st.expander("動画情報詳細"):
+                                    st.json(video_info)
+                            else:
+                                st.error(f"❌ 動画情報の取得に失敗: {stage_result.error}")
+
+                        elif stage_result.stage == "media":
+                            download_result = stage_result.result
+                            if stage_result.success:
+                                # Contextに動画パスを設定
+                                youtube_context.set_video_paths(download_result.video_path, download_result.audio_path or "", media_key=download_result.media_key or "")
+                                if download_result.cached:
+                                    st.success(f"🎬 ダウンロード済みの動画を使用します: {download_result.video_path}")
+                                else:
+                                    st.success(f"🎬 動画をダウンロードしました: {download_result.video_path}")
+                                if download_result.download_stats:
+                                    stats = download_result.download_stats
+                                    speed = f"{stats.average_speed / 1024**2:.2f}MB/s, 並列数: {stats.concurrent_fragments}"
+                                    st.caption(f"⬇️ {stats.downloaded_bytes / 1024**2:.1f}MB / {stats.elapsed:.1f}秒 ({speed})")
+                            elif not stage_result.cancelled:
+                                st.warning(f"⚠️ 動画ダウンロードに失敗: {stage_result.error}")
+
+                        elif stage_result.stage == "transcript":
+                            if stage_result.success:
+                                transcript_result = stage_result.result
+                                # 字幕データを取得（transcript_resultの"transcript"キーから）
+                                youtube_context.set_transcript_chunks(transcript_result["transcript"])
+                                if process_transcript:
+                                    # 文章分割・結合・テキスト修正済みの字幕（処理済みのものはキャッシュから再利用）
+                                    youtube_context.set_processed_transcript(transcript_result["processed_transcript"])
+
+                                cached_label = "、キャッシュ" if transcript_result.get("cached") else ""
+                                st.success(f"📝 字幕を取得しました: {transcript_result['total_segments']}セグメント ({transcript_result['language']}{cached_label})")
+
+                                # 字幕取得情報をデバッグ表示
+                                with st.expander("字幕取得詳細"):
+                                    st.json(
+                                        {
+                                            "language": transcript_result["language"],
+                                            "is_generated": transcript_result["is_generated"],
+                                            "cached": transcript_result["cached"],
+                                            "total_segments": transcript_result["total_segments"],
+                                            "available_languages": transcript_result["available_languages"],
+                                        }
+                                    )
+                            elif not stage_result.cancelled:
+                                st.warning(f"⚠️ 字幕取得に失敗: {stage_result.error or '不明なエラー'}")
 
-                        # 字幕取得情報をデバッグ表示
-                        with st.expander("字幕取得詳細"):
-                            st.json(
-                                {
-                                    "language": transcript_result["language"],
-                                    "total_segments": transcript_result["total_segments"],
-                                    "available_languages": transcript_result["available_languages"],
-                                }
-                            )
-                    else:
-                        st.warning(f"⚠️ 字幕取得に失敗: {transcript_result.get('error', '不明なエラー')}")
+                    if not download_video:
+                        st.info("💡 動画ダウンロードはスキップされました（動画生成時にカットの範囲だけをダウンロードします）")
+                    print(f"DEBUG: 取得段階ごとの所要時間 - {stage_timings}")
 
                     st.rerun()
 
@@ -570,35 +588,61 @@ with tab3:
                 col1, col2 = st.columns(2)
                 with col1:
                     output_format = st.selectbox("出力フォーマット", ["mp4", "mov"], index=0)
-                    video_quality = st.selectbox("動画品質", ["high", "medium", "low"], index=0)
+                    video_quality = st.selectbox("動画品質", ["high", "medium", "low", "draft"], index=0, help="draft: 縦動画化・字幕・BGMなしのプレビューを高速に作成します")
                     add_subtitles = st.checkbox("字幕を追加", value=True)
+                    subtitle_renderer = st.radio(
+                        "字幕の焼き込み方式",
+                        ["libass", "overlay"],
+                        format_func=lambda x: {"libass": "subtitlesフィルタ", "overlay": "字幕画像を合成（高速）"}[x],
+                        horizontal=True,
+                        disabled=not add_subtitles,
+                    )
 
                 with col2:
                     add_bgm = st.checkbox("BGMを追加", value=False)
                     if add_bgm:
                         bgm_file = st.file_uploader("BGMファイル", type=["mp3", "wav", "m4a"])
+                    render_mode = st.radio(
+                        "レンダリング方式",
+                        ["multi_pass", "single_pass"],
+                        format_func=lambda x: {"multi_pass": "セグメント毎にエンコード", "single_pass": "1パスでエンコード（中間ファイルなし）"}[x],
+                        horizontal=True,
+                    )
 
-                # 動画生成ボタン
+                def prepare_source_clips(segments):
+                    """カットの範囲だけをダウンロードし、レンダリングジョブに渡すクリップを返す（失敗時はNone）"""
+                    from src.lib.youtube.youtube_download import download_youtube_clips
+
+                    clips_result = download_youtube_clips(
+                        youtube_context.video_url,
+                        segments,
+                        video_quality=source_quality,
+                        cookies=youtube_cookies if youtube_cookies.strip() else None,
+                        download_profile=download_profile,
+                    )
+                    if not clips_result.success:
+                        st.error(f"❌ カットの範囲のダウンロードに失敗: {clips_result.error}")
+                        return None
+                    youtube_context.add_source_clips(clips_result.clips)
+                    st.caption(f"✂️ カットの範囲のクリップ: {len(clips_result.clips)}個 (ダウンロード: {clips_result.downloaded_clips}, 再利用: {clips_result.reused_clips})")
+                    return [clip.dict() for clip in clips_result.clips]
+
+                # 動画生成ボタン（レンダリングはバックグラウンドのジョブキューで実行）
                 if st.button("🎬 動画を生成", type="primary", disabled=not cut_segments):
-                    with st.spinner("動画を生成中...この処理には時間がかかる場合があります..."):
+                    with st.spinner("レンダリングジョブを登録中..."):
                         try:
-                            # video_processing.pyから直接ffmpegを実行
-                            from src.lib.youtube.video_processing import create_short_video, create_subtitle_file
-
-                            # プログレスバーの設定
-                            progress_bar = st.progress(0)
-                            status_text = st.empty()
+                            from src.lib.youtube.render_queue import get_render_queue
+                            from src.lib.youtube.video_processing import create_subtitle_file
 
-                            def progress_callback(message, progress):
-                                status_text.text(message)
-                                progress_bar.progress(progress)
-
-                            # 動画ファイルのパスを取得（YouTube動画をダウンロード済みと仮定）
-                            source_video_path = youtube_context.downloaded_video_path if hasattr(youtube_context, "downloaded_video_path") else None
+                            # 動画ファイルのパスを取得（元動画ストアに保存済みの場合はストアから探す）
+                            source_video_path = youtube_context.get_source_video_path()
 
+                            # 元動画をダウンロードしていない場合は、カットの範囲だけをダウンロードして使う
+                            source_clips = None
                             if not source_video_path:
-                                st.error("❌ 動画ファイルが見つかりません。まず動画をダウンロードしてください。")
-                                st.stop()
+                                source_clips = prepare_source_clips(cut_segments)
+                                if source_clips is None:
+                                    st.stop()
 
                             # 出力ディレクトリの作成
                             output_dir = tempfile.mkdtemp()
@@ -614,10 +658,18 @@ with tab3:
                                 scenario_subtitles = selected_scenario.get("subtitles", [])
                                 # ASS形式で字幕を作成（フォントサイズを確実に制御）
                                 subtitle_result = create_subtitle_file(
-                                    youtube_context.transcript_chunks, scenario_cut_segments, format="ass", scenario_subtitles=scenario_subtitles
+                                    youtube_context.transcript_chunks,
+                                    scenario_cut_segments,
+                                    format="ass",
+                                    scenario_subtitles=scenario_subtitles,
+                                    transcript_index=youtube_context.get_transcript_index(),
                                 )
                                 if subtitle_result["success"]:
                                     subtitle_path = subtitle_result["subtitle_path"]
+                                    # 整形済み字幕のタイムスタンプが元の字幕からずれていないか確認
+                                    match_rate = subtitle_result.get("correction_match_rate")
+                                    if match_rate is not None and match_rate < 0.8:
+                                        st.warning(f"⚠️ 整形済み字幕の{match_rate:.0%}しか元の字幕に対応付けられませんでした。対応しない字幕は元のテキストで表示されます。")
 
                             # BGMファイルのパス（必要に応じて）
                             bgm_path = None
@@ -628,33 +680,130 @@ with tab3:
                                 bgm_path = bgm_temp.name
                                 bgm_temp.close()
 
-                            # 動画生成実行
-                            result = create_short_video(
-                                source_video_path=source_video_path,
-                                cut_segments=scenario_cut_segments,
-                                output_path=output_path,
-                                subtitle_path=subtitle_path,
-                                bgm_path=bgm_path,
-                                video_format=output_format,
-                                quality=video_quality,
-                                progress_callback=progress_callback,
-                                scenario_info=selected_scenario,  # 企画情報を渡す
+                            # レンダリングジョブを投入
+                            job_id = get_render_queue().submit(
+                                "single",
+                                {
+                                    "source_video_path": source_video_path,
+                                    "source_media_key": youtube_context.source_media_key,
+                                    "source_clips": source_clips,
+                                    "cut_segments": scenario_cut_segments,
+                                    "output_path": output_path,
+                                    "subtitle_path": subtitle_path,
+                                    "bgm_path": bgm_path,
+                                    "video_format": output_format,
+                                    "quality": video_quality,
+                                    "scenario_info": selected_scenario,  # 企画情報を渡す
+                                    "render_mode": render_mode,
+                                    "subtitle_renderer": subtitle_renderer,
+                                },
+                                owner=st.session_state.get("username") or "",
                             )
+                            st.session_state.setdefault("render_job_ids", []).append(job_id)
+                            st.success("✅ レンダリングジョブを登録しました。進捗は下のジョブ一覧で確認できます。")
+
+                        except Exception as e:
+                            st.error(f"❌ エラーが発生しました: {str(e)}")
+                            st.code(traceback.format_exc(), language="python")
 
-                            if result.success:
-                                # 結果をcontextに保存
-                                youtube_context.set_output_path(result.output_path)
+                # 選択済み（未選択の場合はカット割りのある全て）の企画案を一括生成
+                batch_scenarios = [scenario for _, scenario in scenarios_with_cuts if scenario.get("title") in youtube_context.selected_scenarios] or [
+                    scenario for _, scenario in scenarios_with_cuts
+                ]
+                if st.button(f"🎞️ {len(batch_scenarios)}件の企画案を一括生成", disabled=len(batch_scenarios) < 2 or render_mode != "multi_pass"):
+                    with st.spinner("レンダリングジョブを登録中..."):
+                        try:
+                            from src.lib.youtube.render_queue import get_render_queue
+                            from src.lib.youtube.video_processing import create_subtitle_file
 
-                                st.success("✅ 動画が生成されました！")
-                                st.balloons()
-                                st.rerun()
-                            else:
-                                st.error(f"❌ 動画生成に失敗しました: {result.error}")
+                            source_video_path = youtube_context.get_source_video_path()
+                            source_clips = None
+                            if not source_video_path:
+                                # 全企画案のカットの範囲をまとめて1回でダウンロードする
+                                source_clips = prepare_source_clips([segment for scenario in batch_scenarios for segment in scenario.get("cut_segments", [])])
+                                if source_clips is None:
+                                    st.stop()
+
+                            subtitle_paths = []
+                            for scenario in batch_scenarios:
+                                subtitle_path = None
+                                if add_subtitles and youtube_context.transcript_chunks:
+                                    subtitle_result = create_subtitle_file(
+                                        youtube_context.transcript_chunks,
+                                        scenario.get("cut_segments", []),
+                                        format="ass",
+                                        scenario_subtitles=scenario.get("subtitles", []),
+                                        transcript_index=youtube_context.get_transcript_index(),
+                                    )
+                                    if subtitle_result["success"]:
+                                        subtitle_path = subtitle_result["subtitle_path"]
+                                subtitle_paths.append(subtitle_path)
+
+                            bgm_path = None
+                            if add_bgm and bgm_file:
+                                bgm_temp = tempfile.NamedTemporaryFile(delete=False, suffix=f".{bgm_file.name.split('.')[-1]}")
+                                bgm_temp.write(bgm_file.read())
+                                bgm_path = bgm_temp.name
+                                bgm_temp.close()
+
+                            job_id = get_render_queue().submit(
+                                "batch",
+                                {
+                                    "source_video_path": source_video_path,
+                                    "source_media_key": youtube_context.source_media_key,
+                                    "source_clips": source_clips,
+                                    "scenarios": batch_scenarios,
+                                    "subtitle_paths": subtitle_paths,
+                                    "bgm_path": bgm_path,
+                                    "video_format": output_format,
+                                    "quality": video_quality,
+                                    "subtitle_renderer": subtitle_renderer,
+                                },
+                                owner=st.session_state.get("username") or "",
+                            )
+                            st.session_state.setdefault("render_job_ids", []).append(job_id)
+                            st.success("✅ 一括レンダリングジョブを登録しました。進捗は下のジョブ一覧で確認できます。")
 
                         except Exception as e:
                             st.error(f"❌ エラーが発生しました: {str(e)}")
                             st.code(traceback.format_exc(), language="python")
 
+    @st.fragment(run_every=2)
+    def render_job_panel():
+        """レンダリングジョブの状態を定期的に取得して表示（完了したジョブの結果はcontextへ反映）"""
+        from src.lib.youtube.render_queue import get_render_queue
+
+        render_queue = get_render_queue()
+        jobs = render_queue.list_jobs(owner=st.session_state.get("username") or "", limit=10)
+        if not jobs:
+            return
+
+        st.subheader("🗂️ レンダリングジョブ")
+        applied_job_ids = st.session_state.setdefault("applied_render_job_ids", set())
+        for job in jobs:
+            col_status, col_action = st.columns([4, 1])
+            with col_status:
+                st.write(f"**{job['kind']}** `{job['id'][:8]}` - {job['status']} ({job['created_at']})")
+                if job["status"] in ("queued", "running"):
+                    st.progress(min(max(job["progress"], 0.0), 1.0), text=job["message"])
+                elif job["error"]:
+                    st.caption(job["error"][:300])
+            with col_action:
+                if job["status"] in ("queued", "running") and st.button("キャンセル", key=f"cancel_render_job_{job['id']}"):
+                    render_queue.cancel(job["id"])
+
+            # このセッションで投入したジョブの結果をcontextへ反映
+            if job["status"] == "succeeded" and job["id"] in st.session_state.get("render_job_ids", []) and job["id"] not in applied_job_ids:
+                applied_job_ids.add(job["id"])
+                result = render_queue.result(job["id"])
+                if isinstance(result, list):
+                    youtube_context.set_output_paths({os.path.splitext(os.path.basename(item.output_path))[0]: item.output_path for item in result if item.success})
+                elif result is not None:
+                    youtube_context.set_output_path(result.output_path)
+                st.rerun(scope="app")
+
+    render_job_panel()
+
 with tab4:
     st.header("ダウンロード")
 
@@ -701,13 +850,26 @@ with tab4:
                         use_container_width=True,
                     )
 
+            # 一括生成した動画
+            for title, path in youtube_context.output_video_paths.items():
+                if path == youtube_context.output_video_path or not os.path.exists(path):
+                    continue
+                with open(path, "rb") as file:
+                    st.download_button(
+                        label=f"🎬 {title}",
+                        data=file.read(),
+                        file_name=os.path.basename(path),
+                        mime="video/mp4",
+                        use_container_width=True,
+                    )
+
             st.divider()
 
             # 字幕データ
             if youtube_context.transcript_chunks:
                 import json
 
-                transcript_json = json.dumps(youtube_context.transcript_chunks, ensure_ascii=False, indent=2)
+                transcript_json = json.dumps(youtube_context.transcript_chunks.to_dicts(), ensure_ascii=False, indent=2)
                 st.download_button(
                     label="📝 字幕データ (元)",
                     data=transcript_json,
@@ -720,7 +882,7 @@ with tab4:
             if youtube_context.processed_transcript:
                 import json
 
-                processed_json = json.dumps(youtube_context.processed_transcript, ensure_ascii=False, indent=2)
+                processed_json = json.dumps(youtube_context.processed_transcript.to_dicts(), ensure_ascii=False, indent=2)
                 st.download_button(
                     label="📝 字幕データ (処理済み)",
                     data=processed_json,
@@ -790,5 +952,7 @@ with st.sidebar:
 
     # リセットボタン
     if st.button("🔄 すべてリセット"):
+        # 元動画ストアの動画への参照を解除（ファイルは他の編集者が使えるようにストアに残る）
+        st.session_state.youtube_context.release_source_media()
         st.session_state.youtube_context = YouTubeScenarioContext()
         st.rerun()
@@ -0,0 +1,56 @@
+"""
+Tests for the download profile to yt-dlp option mapping.
+"""
+
+import pytest
+
+from src.lib.youtube.download_profiles import DOWNLOAD_PROFILES, DownloadProfile, get_download_profile, parse_rate_limit
+
+
+@pytest.mark.parametrize(
+    "rate_limit, expected",
+    [("500", 500), ("500K", 500 * 1024), ("2M", 2 * 1024**2), ("1.5MB/s", int(1.5 * 1024**2)), ("1GiB", 1024**3), (" 2m ", 2 * 1024**2)],
+)
+def test_parse_rate_limit(rate_limit, expected):
+    assert parse_rate_limit(rate_limit) == expected
+
+
+@pytest.mark.parametrize("rate_limit", ["", "fast", "2T", "-1M", "2 M B"])
+def test_parse_rate_limit_rejects_invalid_values(rate_limit):
+    with pytest.raises(ValueError):
+        parse_rate_limit(rate_limit)
+
+
+def test_ydl_options_for_minimal_profile():
+    assert DownloadProfile(name="plain").ydl_options() == {
+        "concurrent_fragment_downloads": 1,
+        "continuedl": True,
+        "nopart": False,
+        "retries": 10,
+        "fragment_retries": 10,
+        "verbose": False,
+    }
+
+
+def test_ydl_options_map_chunk_size_and_rate_limit():
+    options = DOWNLOAD_PROFILES["throttled"].ydl_options()
+    assert options["concurrent_fragment_downloads"] == 2
+    assert options["http_chunk_size"] == 10 * 1024**2
+    assert options["ratelimit"] == 2 * 1024**2
+
+    assert "ratelimit" not in DOWNLOAD_PROFILES["fast"].ydl_options()
+    assert DOWNLOAD_PROFILES["default"].ydl_options()["verbose"] is True
+
+
+def test_get_download_profile_overrides_rate_limit_without_mutating_profile():
+    profile = get_download_profile("fast", rate_limit="500K")
+    assert profile.ydl_options()["ratelimit"] == 500 * 1024
+    assert profile.concurrent_fragments == DOWNLOAD_PROFILES["fast"].concurrent_fragments
+    assert DOWNLOAD_PROFILES["fast"].rate_limit is None
+
+
+def test_get_download_profile_rejects_unknown_name_and_bad_rate_limit():
+    with pytest.raises(ValueError):
+        get_download_profile("unknown")
+    with pytest.raises(ValueError):
+        get_download_profile("fast", rate_limit="fast")
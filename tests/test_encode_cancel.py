@@ -0,0 +1,108 @@
+"""
+Tests that cancelling a render stops the running ffmpeg processes.
+"""
+
+import os
+import sys
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("ffmpeg")
+
+from src.lib.youtube import ffmpeg_progress  # noqa: E402
+from src.lib.youtube.ffmpeg_progress import EncodeCancelled, ProgressTracker, run_ffmpeg  # noqa: E402
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Replace the compiled ffmpeg command with a script that reports progress forever and records its pid."""
+    pid_dir = tmp_path / "pids"
+    pid_dir.mkdir()
+    script = tmp_path / "ffmpeg"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        + textwrap.dedent(
+            f"""
+            import os, sys, time
+            open(os.path.join({str(pid_dir)!r}, str(os.getpid())), "w").close()
+            out_time = 0
+            while True:
+                out_time += 100000
+                sys.stdout.write(f"out_time_us={{out_time}}\\nprogress=continue\\n")
+                sys.stdout.flush()
+                time.sleep(0.02)
+            """
+        )
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr(ffmpeg_progress.ffmpeg, "compile", lambda stream_spec: [str(script)], raising=False)
+    return pid_dir
+
+
+def _started_pids(pid_dir):
+    return [int(name) for name in os.listdir(pid_dir)]
+
+
+def _is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_run_ffmpeg_kills_process_when_callback_raises(fake_ffmpeg):
+    calls = []
+
+    def on_progress(progress):
+        calls.append(progress)
+        if len(calls) == 3:
+            raise JobCancelled()
+
+    with pytest.raises(JobCancelled):
+        run_ffmpeg(None, on_progress)
+
+    pids = _started_pids(fake_ffmpeg)
+    assert len(pids) == 1
+    assert not _is_running(pids[0])
+
+
+def test_cancel_in_flush_stops_worker_encodes(fake_ffmpeg):
+    cancel_requested = False
+
+    def progress_callback(message, progress):
+        # レンダリングキューの progress_callback と同じく、キャンセル要求があれば例外で中断する
+        if cancel_requested:
+            raise JobCancelled()
+
+    tracker = ProgressTracker(progress_callback=progress_callback)
+    for i in range(2):
+        tracker.add_stage(f"segment_{i}", 1.0, duration=1000.0)
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = [executor.submit(run_ffmpeg, None, tracker.stage_callback(f"segment_{i}")) for i in range(2)]
+    try:
+        deadline = time.monotonic() + 10
+        while len(_started_pids(fake_ffmpeg)) < 2 and time.monotonic() < deadline:
+            tracker.flush()
+            time.sleep(0.05)
+        assert len(_started_pids(fake_ffmpeg)) == 2
+
+        cancel_requested = True
+        with pytest.raises(JobCancelled):
+            tracker.flush()
+        assert tracker.cancelled
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    for future in futures:
+        assert isinstance(future.exception(timeout=0), EncodeCancelled)
+    for pid in _started_pids(fake_ffmpeg):
+        assert not _is_running(pid)
@@ -0,0 +1,139 @@
+"""
+Tests for the concurrent metadata / transcript / media fetch pipeline.
+"""
+
+import threading
+
+import pytest
+
+pytest.importorskip("agents")  # src.setting
+
+from src.agent_sdk.schemas.youtube import VideoInfo, YouTubeDownloadResult  # noqa: E402
+from src.lib.youtube import fetch_pipeline  # noqa: E402
+
+VIDEO_URL = "https://youtu.be/abc123"
+
+# 停止しない場合でもテストが終わるように待機に上限を設ける
+WAIT_TIMEOUT = 5.0
+
+
+@pytest.fixture
+def stub_fetchers(monkeypatch):
+    """fetch_pipeline が呼び出す取得関数を差し替え、呼び出しを記録する"""
+    calls = {"processed": 0, "finished": []}
+    stubs = {}
+
+    def fetch_youtube_video(video_url, on_metadata=None, cancel_event=None, **kwargs):
+        try:
+            return stubs["media"](on_metadata, cancel_event)
+        finally:
+            calls["finished"].append("media")
+
+    def extract_youtube_transcript(video_id, languages=None):
+        try:
+            return stubs["transcript"]()
+        finally:
+            calls["finished"].append("transcript")
+
+    def get_processed_transcript(transcript_result):
+        calls["processed"] += 1
+        return []
+
+    monkeypatch.setattr(fetch_pipeline, "fetch_youtube_video", fetch_youtube_video)
+    monkeypatch.setattr(fetch_pipeline, "extract_youtube_transcript", extract_youtube_transcript)
+    monkeypatch.setattr(fetch_pipeline, "get_processed_transcript", get_processed_transcript)
+    return stubs, calls
+
+
+def test_all_stages_are_returned(stub_fetchers):
+    stubs, _ = stub_fetchers
+    video_info = VideoInfo(video_id="abc123", title="title")
+
+    def media(on_metadata, cancel_event):
+        on_metadata(video_info)
+        return YouTubeDownloadResult(success=True, video_path="/tmp/abc123.mp4", metadata=video_info)
+
+    stubs["media"] = media
+    stubs["transcript"] = lambda: {"success": True, "transcript": []}
+
+    result = fetch_pipeline.fetch_youtube_sources(VIDEO_URL)
+
+    assert result.success
+    assert set(result.stages) == {"metadata", "transcript", "media"}
+    assert result.stages["metadata"].result == video_info
+    assert result.stages["transcript"].result["processed_transcript"] == []
+    assert result.stages["media"].result.video_path == "/tmp/abc123.mp4"
+
+
+def test_media_stage_is_omitted_without_download(stub_fetchers):
+    stubs, _ = stub_fetchers
+
+    def media(on_metadata, cancel_event):
+        on_metadata(VideoInfo(video_id="abc123", title="title"))
+        return YouTubeDownloadResult(success=True)
+
+    stubs["media"] = media
+    stubs["transcript"] = lambda: {"success": True, "transcript": []}
+
+    stages = [stage.stage for stage in fetch_pipeline.iter_youtube_sources(VIDEO_URL, download_video=False)]
+    assert sorted(stages) == ["metadata", "transcript"]
+
+
+def test_metadata_failure_cancels_transcript(stub_fetchers):
+    stubs, calls = stub_fetchers
+    cancel_event = threading.Event()
+    transcript_started = threading.Event()
+
+    def media(on_metadata, cancel_event):
+        # 字幕の取得が始まってから動画情報の取得に失敗する
+        assert transcript_started.wait(WAIT_TIMEOUT)
+        return YouTubeDownloadResult(success=False, error="Video unavailable")
+
+    def transcript():
+        transcript_started.set()
+        # 動画情報の失敗でキャンセルされるまで字幕の取得が続く
+        assert cancel_event.wait(WAIT_TIMEOUT)
+        return {"success": True, "transcript": []}
+
+    stubs["media"] = media
+    stubs["transcript"] = transcript
+
+    results = {stage.stage: stage for stage in fetch_pipeline.iter_youtube_sources(VIDEO_URL, cancel_event=cancel_event)}
+
+    assert cancel_event.is_set()
+    assert not results["metadata"].success and results["metadata"].error == "Video unavailable"
+    assert not results["media"].success
+    assert not results["transcript"].success and results["transcript"].cancelled
+    assert results["transcript"].error == fetch_pipeline.CANCELLED_ERROR
+    # キャンセル後は字幕の整形を行わない
+    assert calls["processed"] == 0
+
+
+def test_closing_generator_cancels_and_joins_workers(stub_fetchers):
+    stubs, calls = stub_fetchers
+    cancel_event = threading.Event()
+
+    def media(on_metadata, cancel_event):
+        on_metadata(VideoInfo(video_id="abc123", title="title"))
+        # ダウンロード中: キャンセルされるまで終わらない
+        assert cancel_event.wait(WAIT_TIMEOUT)
+        return YouTubeDownloadResult(success=False, error=fetch_pipeline.CANCELLED_ERROR)
+
+    def transcript():
+        assert cancel_event.wait(WAIT_TIMEOUT)
+        return {"success": True, "transcript": []}
+
+    stubs["media"] = media
+    stubs["transcript"] = transcript
+
+    stages = fetch_pipeline.iter_youtube_sources(VIDEO_URL, cancel_event=cancel_event)
+    first = next(stages)
+    assert first.stage == "metadata" and first.success
+    assert not cancel_event.is_set()
+
+    stages.close()
+
+    # 閉じた時点でキャンセルされ、両方のワーカーの終了まで待っている
+    assert cancel_event.is_set()
+    assert sorted(calls["finished"]) == ["media", "transcript"]
+    assert calls["processed"] == 0
@@ -0,0 +1,167 @@
+"""
+Tests for the shared source media store.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("agents")  # src.setting
+
+from src.lib.youtube import media_store  # noqa: E402
+from src.lib.youtube.media_store import MANIFEST_NAME, STAGING_DIR_NAME, MediaStore  # noqa: E402
+
+
+def _download(store, video_id="abc123", format_selector="best", size=100, clip_range=None, content=b"\0"):
+    """staging() の作業ディレクトリにファイルを書き込んで commit する"""
+    with store.staging() as staging_dir:
+        video_path = os.path.join(staging_dir, "download.mp4")
+        with open(video_path, "wb") as f:
+            f.write(content * size)
+        return store.commit(video_id, format_selector, staging_dir, video_path=video_path, metadata={"title": video_id}, clip_range=clip_range)
+
+
+def _set_last_used(store, key, timestamp):
+    os.utime(os.path.join(store._entry_dir(key), MANIFEST_NAME), (timestamp, timestamp))
+
+
+def test_commit_and_get_round_trip(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    entry = _download(store)
+
+    assert entry.key == store.make_key("abc123", "best")
+    assert entry.video_path.startswith(store._entry_dir(entry.key))
+    assert entry.size == 100
+
+    loaded = store.get(entry.key)
+    assert loaded == entry
+    assert loaded.metadata == {"title": "abc123"}
+    assert store.lookup("abc123") == entry
+    assert store.get(store.make_key("abc123", "worst")) is None
+    assert store.stats() == {"hits": 2, "misses": 1}
+    # 作業ディレクトリは残らない
+    assert os.listdir(os.path.join(str(tmp_path), STAGING_DIR_NAME)) == []
+
+
+def test_clip_entries_are_separate_and_cover_their_range(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    full = _download(store)
+    clip = _download(store, clip_range=(10.0, 20.0))
+
+    assert clip.key != full.key
+    assert clip.covers(12.0, 18.0) and not clip.covers(5.0, 12.0)
+    assert store.find_covering("abc123", "best", 12.0, 18.0) == full
+    store.evict()
+    os.remove(full.video_path)
+    assert store.find_covering("abc123", "best", 12.0, 18.0).key == clip.key
+
+
+def test_second_commit_of_same_key_returns_existing_entry(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    first = _download(store, content=b"a")
+    second = _download(store, content=b"b")
+
+    assert second == first
+    with open(second.video_path, "rb") as f:
+        assert f.read(1) == b"a"
+
+
+def test_concurrent_commits_place_one_entry(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def download(index):
+        with store.staging() as staging_dir:
+            video_path = os.path.join(staging_dir, "download.mp4")
+            with open(video_path, "wb") as f:
+                f.write(bytes([index]) * 100)
+            barrier.wait()
+            results.append(store.commit("abc123", "best", staging_dir, video_path=video_path))
+
+    threads = [threading.Thread(target=download, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({entry.video_path for entry in results}) == 1
+    assert all(os.path.exists(entry.video_path) for entry in results)
+    assert len(store.list_entries("abc123")) == 1
+
+
+def test_add_audio_updates_manifest(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    entry = _download(store)
+    audio_path = tmp_path / "audio.m4a"
+    audio_path.write_bytes(b"\0" * 50)
+
+    updated = store.add_audio(entry, str(audio_path))
+
+    assert store.get(entry.key) == updated
+    assert updated.audio_path == os.path.join(store._entry_dir(entry.key), "audio.m4a")
+    assert updated.size == 150
+
+
+def test_evict_skips_acquired_entries(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=250)
+    oldest, middle, newest = (_download(store, video_id=video_id) for video_id in ("v1", "v2", "v3"))
+    for timestamp, entry in enumerate((oldest, middle, newest), start=1):
+        _set_last_used(store, entry.key, 1_000_000 + timestamp)
+
+    store.acquire(oldest.key, "session-a")
+    assert store.evict() == 1
+    assert sorted(entry.video_id for entry in store.list_entries()) == ["v1", "v3"]
+
+    store.release(oldest.key, "session-a")
+    store.max_bytes = 100
+    assert store.evict() == 1
+    assert [entry.video_id for entry in store.list_entries()] == ["v3"]
+
+
+def test_evict_removes_only_stale_staging_directories(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    staging_root = os.path.join(str(tmp_path), STAGING_DIR_NAME)
+    stale = os.path.join(staging_root, "stale")
+    fresh = os.path.join(staging_root, "fresh")
+    for path in (stale, fresh):
+        os.makedirs(path)
+    old = time.time() - media_store.STAGING_MAX_AGE - 60
+    os.utime(stale, (old, old))
+
+    store.evict()
+
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
+
+
+def test_failed_download_keeps_staging_only_when_requested(tmp_path):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    key = store.make_key("abc123", "best")
+    for keep_on_error in (False, True):
+        with pytest.raises(RuntimeError):
+            with store.staging(key, keep_on_error=keep_on_error) as staging_dir:
+                raise RuntimeError()
+        assert os.path.exists(staging_dir) == keep_on_error
+
+
+def test_references_expire_unless_refreshed(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(media_store.time, "monotonic", lambda: now[0])
+    store = MediaStore(str(tmp_path), max_bytes=0, reference_ttl=60)
+    entry = _download(store)
+
+    store.acquire(entry.key, "ended-session")
+    store.acquire(entry.key, "active-session")
+    now[0] += 50
+    store.acquire(entry.key, "active-session")
+    now[0] += 20
+    # 更新されなかった参照だけが失効する
+    assert store.reference_count(entry.key) == 1
+    assert store.evict() == 0
+
+    now[0] += 60
+    assert store.reference_count(entry.key) == 0
+    assert store.evict() == 1
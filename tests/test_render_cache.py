@@ -0,0 +1,51 @@
+"""
+Tests for the rendered segment cache.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("agents")  # src.setting
+
+from src.lib.youtube.render_cache import SegmentRenderCache  # noqa: E402
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return str(path)
+
+
+def test_put_keeps_working_file_and_get_links_into_job_dir(tmp_path):
+    cache = SegmentRenderCache(str(tmp_path / "cache"), max_bytes=1024)
+    segment = _write(tmp_path / "segment_000.mp4", 100)
+    key = cache.make_key("source", 0.0, 1.0, {"crf": 23})
+
+    assert cache.put(key, segment) is None
+    assert os.path.getsize(segment) == 100
+
+    job_dir = tmp_path / "job"
+    job_dir.mkdir()
+    dest = str(job_dir / "segment_000.mp4")
+    assert cache.get(key, dest) == dest
+    assert os.path.getsize(dest) == 100
+    assert cache.get(cache.make_key("source", 0.0, 2.0, {"crf": 23}), str(job_dir / "segment_001.mp4")) is None
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_evict_does_not_remove_segment_in_use_by_another_job(tmp_path):
+    cache = SegmentRenderCache(str(tmp_path / "cache"), max_bytes=150)
+    keys = [cache.make_key("source", float(i), float(i + 1), {}) for i in range(2)]
+    for i, key in enumerate(keys):
+        cache.put(key, _write(tmp_path / f"rendered_{i}.mp4", 100))
+    os.utime(cache._path_for(keys[0]), (1, 1))  # 最終利用が最も古いエントリ
+
+    in_use = cache.get(keys[0], str(tmp_path / "job_segment.mp4"))
+    # 他のジョブが同時にLRUの判定をした場合を模擬して、取得したエントリを古いままにする
+    os.utime(cache._path_for(keys[0]), (1, 1))
+    assert cache.evict() == 1
+
+    assert not os.path.exists(cache._path_for(keys[0]))
+    assert os.path.getsize(in_use) == 100
+    assert cache.get(keys[0], str(tmp_path / "later.mp4")) is None
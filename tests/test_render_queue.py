@@ -0,0 +1,80 @@
+"""
+Tests for the render job queue sharing one job table.
+"""
+
+import json
+import socket
+import uuid
+
+import pytest
+
+pytest.importorskip("agents")  # src.setting
+pytest.importorskip("sqlalchemy")
+
+from src.lib.dao import render_job as render_job_dao  # noqa: E402
+from src.lib.dao.helper import session as session_helper  # noqa: E402
+from src.lib.dao.helper.db_context import SQLiteDBContext  # noqa: E402
+from src.lib.models.base import Base  # noqa: E402
+from src.lib.models.render_job import RenderJob  # noqa: F401, E402
+from src.lib.youtube.render_queue import RenderQueue  # noqa: E402
+
+
+@pytest.fixture
+def job_table(tmp_path, monkeypatch):
+    context = SQLiteDBContext(db_name=str(tmp_path / "render_jobs.db"))
+    Base.metadata.create_all(context._write_engine)
+    monkeypatch.setattr(session_helper, "db_context", context)
+    return context
+
+
+def _dead_pid():
+    # 存在しないプロセスID（Linuxのpid_maxより大きい値）
+    return 2**22 + 1
+
+
+def _create_job(queue_id, status="queued"):
+    job_id = uuid.uuid4().hex
+    render_job_dao.create_render_job(job_id, "single", json.dumps({}), queue_id=queue_id)
+    if status == "running":
+        render_job_dao.start_render_job(job_id, 12345)
+    return job_id
+
+
+def test_new_queue_fails_only_jobs_of_finished_queues(job_table):
+    first = RenderQueue(max_workers=1)
+    try:
+        live_queued = _create_job(first.queue_id)
+        live_running = _create_job(first.queue_id, status="running")
+        dead_running = _create_job(f"{socket.gethostname()}:{_dead_pid()}:{uuid.uuid4().hex}", status="running")
+        other_host = _create_job(f"other-host.invalid:{_dead_pid()}:{uuid.uuid4().hex}")
+        legacy = _create_job(None)
+
+        second = RenderQueue(max_workers=1)
+        try:
+            statuses = {job_id: render_job_dao.get_render_job(job_id).status for job_id in (live_queued, live_running, dead_running, other_host, legacy)}
+            assert statuses == {live_queued: "queued", live_running: "running", dead_running: "failed", other_host: "queued", legacy: "failed"}
+        finally:
+            second.shutdown()
+    finally:
+        first.shutdown()
+
+    # 同じプロセスでも、終了したキューのジョブは次のキューの起動時に中断扱いにする
+    third = RenderQueue(max_workers=1)
+    try:
+        assert render_job_dao.get_render_job(live_queued).status == "failed"
+        assert render_job_dao.get_render_job(live_running).status == "failed"
+        assert render_job_dao.get_render_job(other_host).status == "queued"
+    finally:
+        third.shutdown()
+
+
+def test_list_jobs_omits_params_and_result(job_table):
+    queue = RenderQueue(max_workers=1)
+    try:
+        job_id = _create_job(queue.queue_id)
+        jobs = queue.list_jobs()
+        assert [job["id"] for job in jobs] == [job_id]
+        assert "params" not in jobs[0] and "result" not in jobs[0]
+        assert jobs[0]["queue_id"] == queue.queue_id
+    finally:
+        queue.shutdown()
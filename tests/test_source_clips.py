@@ -0,0 +1,123 @@
+"""
+Tests for cuts-first clip planning, source clip lookup and clip downloads.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("agents")  # src.setting
+
+from src.agent_sdk.schemas.youtube import SourceClip  # noqa: E402
+from src.lib.youtube import youtube_download  # noqa: E402
+from src.lib.youtube.media_store import MediaStore  # noqa: E402
+from src.lib.youtube.source_clips import SourceClipIndex, plan_clip_windows  # noqa: E402
+
+
+def _cut(start_time, end_time):
+    return {"start_time": start_time, "end_time": end_time}
+
+
+def test_plan_clip_windows_adds_padding_and_clamps_at_zero():
+    assert plan_clip_windows([_cut(1.0, 4.0), _cut(30.0, 35.0)], padding=2.0, merge_gap=5.0) == [(0.0, 6.0), (28.0, 37.0)]
+
+
+def test_plan_clip_windows_merges_overlapping_and_near_windows():
+    # 余白を加えると 8〜14 と 18〜24 の間は4秒 → merge_gap 以内なので結合する
+    cuts = [_cut(20.0, 22.0), _cut(10.0, 12.0), _cut(11.0, 11.5), _cut(60.0, 61.0)]
+    assert plan_clip_windows(cuts, padding=2.0, merge_gap=5.0) == [(8.0, 24.0), (58.0, 63.0)]
+    # 間が merge_gap より大きければ結合しない
+    assert plan_clip_windows(cuts, padding=2.0, merge_gap=3.0) == [(8.0, 14.0), (18.0, 24.0), (58.0, 63.0)]
+
+
+def test_plan_clip_windows_clamps_to_duration_and_skips_empty_cuts():
+    cuts = [_cut(95.0, 99.0), _cut(40.0, 40.0), _cut(50.0, 45.0), {"start_time": 10.0}]
+    assert plan_clip_windows(cuts, padding=2.0, duration=100.0) == [(93.0, 100.0)]
+    assert plan_clip_windows([], padding=2.0) == []
+
+
+def test_source_clip_index_find_and_locate():
+    index = SourceClipIndex.from_dicts(
+        [
+            {"path": "/clips/b.mp4", "start_time": 50.0, "end_time": 70.0},
+            SourceClip(path="/clips/a.mp4", start_time=8.0, end_time=24.0),
+            {"path": "/clips/full.mp4", "start_time": 0.0, "end_time": 100.0, "media_key": "full"},
+        ]
+    )
+
+    assert len(index) == 3
+    assert index.paths == ["/clips/full.mp4", "/clips/a.mp4", "/clips/b.mp4"]
+    # 開始時刻が同じなら長いクリップ、範囲を含むクリップのうち開始が最も早いものを返す
+    assert index.find(10.0, 12.0).path == "/clips/full.mp4"
+    assert SourceClipIndex(index.clips[1:]).find(10.0, 12.0).path == "/clips/a.mp4"
+    assert SourceClipIndex(index.clips[1:]).find(20.0, 30.0) is None
+
+    assert SourceClipIndex(index.clips[1:]).locate(55.0, 60.5) == ("/clips/b.mp4", 5.0, 10.5)
+    with pytest.raises(ValueError):
+        SourceClipIndex(index.clips[1:]).locate(30.0, 40.0)
+
+
+def test_source_clip_index_missing_segments():
+    index = SourceClipIndex([SourceClip(path="/clips/a.mp4", start_time=8.0, end_time=24.0)])
+    cuts = [_cut(10.0, 12.0), _cut(22.0, 26.0), _cut(40.0, 40.0), _cut(50.0, 55.0)]
+    assert index.missing_segments(cuts) == [_cut(22.0, 26.0), _cut(50.0, 55.0)]
+
+
+def _fake_run_ydl(downloads_for):
+    """範囲ごとのファイルを作業ディレクトリに作り、yt-dlp と同様に section_start 付きで返す _run_ydl"""
+
+    def run_ydl(video_url, video_id, cookies, output_path, format_selector, on_metadata, cancel_event, profile, download_ranges, precise_cuts):
+        downloads = []
+        for index, (section_start, section_end) in enumerate(downloads_for(download_ranges)):
+            filepath = os.path.join(str(output_path), f"{video_id}_{index}.mp4")
+            with open(filepath, "wb") as f:
+                f.write(b"\0" * 10)
+            download = {"filepath": filepath}
+            if section_start is not None:
+                download.update(section_start=section_start, section_end=section_end)
+            downloads.append(download)
+        return {"video_id": video_id, "title": "title", "duration": 300.0}, downloads, None
+
+    return run_ydl
+
+
+def test_download_youtube_clips_maps_sections_to_nearest_window(tmp_path, monkeypatch):
+    # 再エンコードせずに切り出すとキーフレームの分だけ開始が前にずれ、返る順序も要求した順序と限らない
+    def downloads_for(ranges):
+        return [(start_time - 0.7, end_time) for start_time, end_time in reversed(ranges)]
+
+    monkeypatch.setattr(youtube_download, "_run_ydl", _fake_run_ydl(downloads_for))
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+    cuts = [_cut(10.0, 12.0), _cut(100.0, 104.0), _cut(200.0, 201.0)]
+
+    result = youtube_download.download_youtube_clips("https://youtu.be/abc123", cuts, padding=2.0, media_store=store)
+
+    assert result.success, result.error
+    assert result.downloaded_clips == 3 and result.reused_clips == 0
+    assert [(clip.start_time, clip.end_time) for clip in result.clips] == [(8.0, 14.0), (98.0, 106.0), (198.0, 203.0)]
+    # 各範囲のファイルが対応する範囲のクリップとして保存されている
+    for clip in result.clips:
+        entry = store.get(clip.media_key)
+        assert (entry.clip_start, entry.clip_end) == (clip.start_time, clip.end_time)
+    assert SourceClipIndex(result.clips).missing_segments(cuts) == []
+
+    # 2回目はストアのクリップを再利用し、ダウンロードしない
+    monkeypatch.setattr(youtube_download, "_run_ydl", _fake_run_ydl(lambda ranges: pytest.fail(f"unexpected download: {ranges}")))
+    again = youtube_download.download_youtube_clips("https://youtu.be/abc123", cuts, padding=2.0, media_store=store)
+    assert again.success and again.downloaded_clips == 0 and again.reused_clips == 3
+
+
+def test_download_youtube_clips_without_section_info(tmp_path, monkeypatch):
+    store = MediaStore(str(tmp_path), max_bytes=10_000)
+
+    # 範囲の情報がなくても1範囲だけならその範囲に対応付ける
+    monkeypatch.setattr(youtube_download, "_run_ydl", _fake_run_ydl(lambda ranges: [(None, None)]))
+    result = youtube_download.download_youtube_clips("https://youtu.be/abc123", [_cut(10.0, 12.0)], padding=2.0, media_store=store)
+    assert result.success, result.error
+    assert [(clip.start_time, clip.end_time) for clip in result.clips] == [(8.0, 14.0)]
+
+    # 複数範囲で対応付けられないファイルは使わず、足りないカットを失敗として返す
+    monkeypatch.setattr(youtube_download, "_run_ydl", _fake_run_ydl(lambda ranges: [(None, None)] * len(ranges)))
+    result = youtube_download.download_youtube_clips("https://youtu.be/xyz789", [_cut(10.0, 12.0), _cut(100.0, 104.0)], padding=2.0, media_store=store)
+    assert not result.success
+    assert "2個のカット" in result.error
@@ -0,0 +1,78 @@
+"""
+Tests for aligning agent-formatted subtitles with transcript chunks.
+"""
+
+import pytest
+
+from src.lib.youtube.subtitle_alignment import align_scenario_subtitles
+from src.lib.youtube.transcript_index import TranscriptIntervalIndex
+
+CHUNKS = [
+    {"text": "えーと今日は", "start": 0.0, "duration": 2.0},
+    {"text": "晴れですね", "start": 2.0, "duration": 2.0},
+    {"text": "散歩に行きます", "start": 4.0, "duration": 2.0},
+]
+
+
+def test_subtitle_spanning_two_chunks_replaces_both_chunks():
+    subtitles = [
+        {"start_time": 0.0, "end_time": 3.0, "text": "今日は晴れですね"},  # IoU 2/3 と 1/3
+        {"start_time": 3.9, "end_time": 6.5, "text": "散歩に行きます。"},
+        {"start_time": 3.5, "end_time": 5.0, "text": "対応なし"},  # どのチャンクともIoUが0.5未満
+    ]
+    alignment = align_scenario_subtitles(TranscriptIntervalIndex(CHUNKS), subtitles)
+
+    assert alignment.corrections == {0: "今日は晴れですね", 2: "散歩に行きます。"}
+    # 2番目のチャンクは半分が1番目の字幕と重なるため、1番目の字幕の補正テキストに含める
+    assert alignment.replaced == {1: 0}
+    assert (alignment.total, alignment.matched) == (3, 2)
+    assert alignment.unmatched == [subtitles[2]]
+    assert alignment.match_rate == pytest.approx(2 / 3)
+
+
+def test_chunk_keeps_only_the_best_overlapping_subtitle():
+    subtitles = [{"start_time": 2.0, "end_time": 3.0, "text": "前半"}, {"start_time": 2.0, "end_time": 3.9, "text": "ほぼ全体"}]
+    alignment = align_scenario_subtitles(TranscriptIntervalIndex(CHUNKS), subtitles)
+
+    assert alignment.corrections == {1: "ほぼ全体"}
+    assert alignment.replaced == {}
+    assert alignment.unmatched == [subtitles[0]]
+    assert alignment.match_rate == 0.5
+
+
+def test_slightly_overlapping_chunk_keeps_its_text():
+    subtitles = [{"start_time": 0.0, "end_time": 2.5, "text": "今日は"}]
+    alignment = align_scenario_subtitles(TranscriptIntervalIndex(CHUNKS), subtitles)
+
+    assert alignment.corrections == {0: "今日は"}
+    assert alignment.replaced == {}
+
+
+def _subtitle_cues(tmp_path, cut_segments, subtitles):
+    pytest.importorskip("agents")  # src.setting
+    from src.lib.youtube.video_processing import create_subtitle_file
+
+    result = create_subtitle_file(CHUNKS, cut_segments, output_path=str(tmp_path / "out.vtt"), format="vtt", scenario_subtitles=subtitles)
+    assert result["success"]
+    with open(result["subtitle_path"], encoding="utf-8") as f:
+        blocks = f.read().strip().split("\n\n")[1:]
+    return result, [tuple(block.split("\n", 1)) for block in blocks]
+
+
+def test_correction_spanning_two_chunks_is_rendered_once(tmp_path):
+    subtitles = [{"start_time": 0.0, "end_time": 3.0, "text": "今日は晴れですね"}, {"start_time": 10.0, "end_time": 12.0, "text": "範囲外"}]
+    result, cues = _subtitle_cues(tmp_path, [{"start_time": 0.0, "end_time": 6.0}], subtitles)
+
+    assert result["correction_match_rate"] == 0.5
+    assert result["unmatched_corrections"] == 1
+    # 補正テキストは置き換えた2チャンク分の時間に1回だけ表示し、元の「晴れですね」は表示しない
+    assert cues == [("00:00:00.000 --> 00:00:04.000", "今日は晴れですね"), ("00:00:04.000 --> 00:00:06.000", "散歩に行きます")]
+    texts = " ".join(text for _, text in cues)
+    assert texts.count("晴れですね") == 1
+
+
+def test_correction_is_shown_when_cut_contains_only_a_replaced_chunk(tmp_path):
+    subtitles = [{"start_time": 0.0, "end_time": 3.0, "text": "今日は晴れですね"}]
+    _, cues = _subtitle_cues(tmp_path, [{"start_time": 2.0, "end_time": 6.0}], subtitles)
+
+    assert cues == [("00:00:00.000 --> 00:00:02.000", "今日は晴れですね"), ("00:00:02.000 --> 00:00:04.000", "散歩に行きます")]
@@ -0,0 +1,48 @@
+"""
+Tests for the streaming subtitle writers.
+"""
+
+import io
+
+import pytest
+
+from src.lib.youtube.subtitle_writers import create_subtitle_writer, format_ass_time, format_srt_time, format_vtt_time, write_subtitles
+
+
+@pytest.mark.parametrize(
+    "seconds, srt, vtt, ass",
+    [
+        (0.0, "00:00:00,000", "00:00:00.000", "0:00:00.00"),
+        (0.9995, "00:00:01,000", "00:00:01.000", "0:00:01.00"),
+        (1.9995, "00:00:02,000", "00:00:02.000", "0:00:02.00"),
+        (59.9995, "00:01:00,000", "00:01:00.000", "0:01:00.00"),
+        (3599.9995, "01:00:00,000", "01:00:00.000", "1:00:00.00"),
+        (2.0015, "00:00:02,002", "00:00:02.002", "0:00:02.00"),
+        (-0.5, "00:00:00,000", "00:00:00.000", "0:00:00.00"),
+    ],
+)
+def test_times_are_rounded_to_whole_milliseconds(seconds, srt, vtt, ass):
+    assert format_srt_time(seconds) == srt
+    assert format_vtt_time(seconds) == vtt
+    assert format_ass_time(seconds) == ass
+
+
+def test_write_subtitles_streams_each_cue_to_every_format():
+    buffers = {fmt: io.StringIO() for fmt in ("srt", "vtt", "ass")}
+    writers = [create_subtitle_writer(fmt, buffer) for fmt, buffer in buffers.items()]
+    cues = [
+        {"start": 0.9995, "end": 1.9995, "text": "一行目\n二行目"},
+        {"start": 2.0, "end": 2.0, "text": "長さのないキュー"},
+        {"start": 3.0, "end": 4.0, "text": "  "},
+    ]
+
+    assert write_subtitles(cues, writers) == 3
+    assert buffers["srt"].getvalue() == "1\n00:00:01,000 --> 00:00:02,000\n一行目\n二行目\n\n"
+    assert buffers["vtt"].getvalue().startswith("WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n一行目\n二行目\n\n")
+    assert buffers["ass"].getvalue().endswith("Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,一行目\\N二行目\n")
+    assert [writer.count for writer in writers] == [1, 2, 1]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        create_subtitle_writer("sub", io.StringIO())
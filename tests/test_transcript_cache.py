@@ -0,0 +1,81 @@
+"""
+Tests for the on-disk transcript cache.
+"""
+
+import pytest
+
+pytest.importorskip("agents")  # src.setting
+
+from src.lib.youtube import transcript_cache, transcript_extraction  # noqa: E402
+from src.lib.youtube.transcript_cache import TranscriptCache  # noqa: E402
+from src.lib.youtube.transcript_fetchers import TranscriptFetchResult  # noqa: E402
+
+CHUNKS = [{"text": "こんにちは。", "start": 0.0, "duration": 1.5}, {"text": "今日は晴れです。", "start": 1.5, "duration": 2.0}]
+
+
+def _result(**overrides):
+    values = {"video_id": "abc123", "language": "ja", "language_code": "ja", "is_generated": False, "transcript": CHUNKS}
+    values.update(overrides)
+    return TranscriptFetchResult(**values)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(transcript_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entry_expires_after_ttl(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path), ttl=60)
+    cache.put(_result())
+
+    clock[0] += 60
+    assert cache.get("abc123", ["ja"])["transcript"] == CHUNKS
+
+    clock[0] += 1
+    assert cache.get("abc123", ["ja"]) is None
+
+
+def test_get_prefers_manual_then_language_order(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path), ttl=60)
+    cache.put(_result(language="en", language_code="en"))
+    cache.put(_result(is_generated=True))
+    assert cache.get("abc123", ["ja", "en"])["is_generated"] is True
+    cache.put(_result())
+    assert cache.get("abc123", ["ja", "en"])["is_generated"] is False
+
+
+def test_processed_chunks_require_matching_signature(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path), ttl=60)
+    cache.put(_result())
+    cache.put_processed("abc123", "ja", False, "v1:sig", CHUNKS[:1])
+
+    assert cache.get_processed("abc123", "ja", False, "v1:sig") == CHUNKS[:1]
+    assert cache.get_processed("abc123", "ja", False, "v2:sig") is None
+
+    # 字幕を取得し直すと処理済み字幕は破棄される
+    cache.put(_result())
+    assert cache.get_processed("abc123", "ja", False, "v1:sig") is None
+
+
+def test_processing_version_bump_invalidates_processed_transcript(tmp_path, clock, monkeypatch):
+    cache = TranscriptCache(str(tmp_path), ttl=60)
+    cache.put(_result())
+    transcript_result = {"video_id": "abc123", "language": "ja", "is_generated": False, "transcript": CHUNKS}
+
+    calls = []
+
+    def segment_transcript(chunks, normalizer):
+        calls.append(1)
+        return [dict(chunk) for chunk in chunks]
+
+    monkeypatch.setattr(transcript_extraction, "segment_transcript", segment_transcript)
+
+    first = transcript_extraction.get_processed_transcript(transcript_result, dictionary_paths=[], cache=cache)
+    assert transcript_extraction.get_processed_transcript(transcript_result, dictionary_paths=[], cache=cache) == first
+    assert len(calls) == 1
+
+    monkeypatch.setattr(transcript_extraction, "TRANSCRIPT_PROCESSING_VERSION", transcript_extraction.TRANSCRIPT_PROCESSING_VERSION + 1)
+    transcript_extraction.get_processed_transcript(transcript_result, dictionary_paths=[], cache=cache)
+    assert len(calls) == 2
@@ -0,0 +1,25 @@
+"""
+Tests for the compact transcript representation.
+"""
+
+from src.lib.youtube.columnar_transcript import ColumnarTranscript
+from src.lib.youtube.transcript_compact import compact_transcript_lines, format_seconds
+
+
+def test_format_seconds_keeps_milliseconds():
+    assert format_seconds(0) == "0"
+    assert format_seconds(1.5) == "1.5"
+    assert format_seconds(12.345) == "12.345"
+    assert format_seconds(3.1) == "3.1"
+    assert format_seconds(59.9996) == "60"
+
+
+def test_compact_lines_omit_end_only_when_contiguous_to_the_millisecond():
+    transcript = ColumnarTranscript(
+        [
+            {"text": "a", "start": 0.0, "duration": 1.234},
+            {"text": "b", "start": 1.234, "duration": 1.0},
+            {"text": "c", "start": 2.24, "duration": 1.0},
+        ]
+    )
+    assert compact_transcript_lines(transcript, [0, 1, 2]) == ["0|a", "1.234-2.234|b", "2.24-3.24|c"]
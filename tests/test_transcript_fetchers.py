@@ -0,0 +1,78 @@
+"""
+Tests for transcript track selection and the list-once fetcher.
+"""
+
+import json
+
+import pytest
+
+from src.lib.youtube.transcript_fetchers import (
+    CountingTranscriptTransport,
+    LocalTranscriptTransport,
+    TranscriptFetcher,
+    TranscriptTrack,
+    TranscriptUnavailableError,
+    select_transcript_track,
+)
+
+
+def _track(language_code, is_generated=False):
+    return TranscriptTrack(language_code=language_code, is_generated=is_generated)
+
+
+def test_select_prefers_manual_tracks_in_language_order():
+    tracks = [_track("ja", is_generated=True), _track("en"), _track("ja")]
+    selected = select_transcript_track(tracks, ["ja", "en"])
+    assert (selected.language_code, selected.is_generated) == ("ja", False)
+
+
+def test_select_prefers_generated_track_in_earlier_language_over_manual_in_later_language():
+    tracks = [_track("ja", is_generated=True), _track("en")]
+    selected = select_transcript_track(tracks, ["ja", "en"])
+    assert (selected.language_code, selected.is_generated) == ("ja", True)
+
+
+def test_select_falls_back_to_generated_then_any_track():
+    assert select_transcript_track([_track("fr"), _track("en", is_generated=True)], ["en"]).language_code == "en"
+    assert select_transcript_track([_track("de", is_generated=True), _track("fr")], ["ja"]).language_code == "fr"
+    assert select_transcript_track([_track("de", is_generated=True)], ["ja"]).language_code == "de"
+    assert select_transcript_track([], ["ja"]) is None
+
+
+@pytest.fixture
+def transport(tmp_path):
+    data = {
+        "transcripts": [
+            {"language_code": "en", "is_generated": True, "chunks": [{"text": "hello", "start": 0.0, "duration": 1.0}]},
+            {"language_code": "ja", "is_generated": True, "chunks": [{"text": "自動", "start": 0.0, "duration": 1.0}]},
+            {"language_code": "ja", "language": "日本語", "chunks": [{"text": "手動", "start": 0.0, "duration": 1.0}]},
+        ]
+    }
+    (tmp_path / "abc123.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return CountingTranscriptTransport(LocalTranscriptTransport(str(tmp_path)))
+
+
+def test_fetch_lists_once_and_fetches_one_track(transport):
+    result = TranscriptFetcher(transport).fetch("abc123", ["ko", "ja", "en"])
+
+    assert (result.language, result.is_generated) == ("ja", False)
+    assert result.transcript == [{"text": "手動", "start": 0.0, "duration": 1.0}]
+    assert len(result.available_languages) == 3
+    assert (transport.list_requests, transport.fetch_requests) == (1, 1)
+
+
+def test_fetch_uses_first_listed_language_even_if_only_generated(transport):
+    result = TranscriptFetcher(transport).fetch("abc123", ["en", "ja"])
+    assert (result.language, result.is_generated) == ("en", True)
+
+
+def test_fetch_outside_preferred_languages_is_reported_as_auto(transport):
+    result = TranscriptFetcher(transport).fetch("abc123", ["ko"])
+    assert (result.language, result.language_code) == ("auto", "ja")
+    assert transport.requests == 2
+
+
+def test_fetch_missing_video_raises(transport):
+    with pytest.raises(TranscriptUnavailableError):
+        TranscriptFetcher(transport).fetch("missing", ["ja"])
+    assert (transport.list_requests, transport.fetch_requests) == (1, 0)
@@ -0,0 +1,63 @@
+"""
+Tests for the transcript interval index.
+"""
+
+import random
+
+import pytest
+
+from src.lib.youtube.columnar_transcript import ColumnarTranscript
+from src.lib.youtube.transcript_index import TranscriptIntervalIndex
+
+
+def _random_chunks(count, seed):
+    rng = random.Random(seed)
+    return [{"text": f"chunk {i}", "start": round(rng.uniform(0, 100), 3), "duration": round(rng.uniform(0.1, 8), 3)} for i in range(count)]
+
+
+@pytest.mark.parametrize("presorted", [True, False])
+def test_overlapping_matches_linear_scan(presorted):
+    chunks = _random_chunks(300, seed=1)
+    if presorted:
+        chunks.sort(key=lambda chunk: chunk["start"])
+    transcript = ColumnarTranscript(chunks)
+    index = TranscriptIntervalIndex(transcript)
+
+    expected_order = sorted(chunks, key=lambda chunk: chunk["start"])
+    assert list(index.starts) == [chunk["start"] for chunk in expected_order]
+    if presorted:
+        # 開始時刻順の字幕は並べ替えずにそのまま参照する
+        assert index.chunks is transcript
+
+    rng = random.Random(2)
+    for _ in range(50):
+        start_time = rng.uniform(-5, 105)
+        end_time = start_time + rng.uniform(0, 20)
+        expected = [chunk for chunk in expected_order if chunk["start"] < end_time and chunk["start"] + chunk["duration"] > start_time]
+        assert [dict(chunk) for chunk in index.overlapping(start_time, end_time)] == expected
+
+
+def test_equal_starts_keep_original_order():
+    chunks = [{"text": "b", "start": 2.0, "duration": 1.0}, {"text": "a1", "start": 1.0, "duration": 1.0}, {"text": "a2", "start": 1.0, "duration": 1.0}]
+    index = TranscriptIntervalIndex(chunks)
+    assert [chunk["text"] for chunk in index.chunks] == ["a1", "a2", "b"]
+
+
+def test_interleaved_append_and_read_keep_flushed_text():
+    transcript = ColumnarTranscript()
+    expected = []
+    for i in range(200):
+        chunk = {"text": "" if i % 7 == 0 else f"chunk {i}", "start": float(i), "duration": 1.0}
+        transcript.append(chunk)
+        expected.append(chunk)
+        # 追加のたびに参照しても、それまでに連結したテキストを作り直さない
+        assert transcript.text_at(i) == chunk["text"]
+        assert transcript[i // 2]["text"] == expected[i // 2]["text"]
+        if i == 1:
+            first_segments = list(transcript._segments)
+    assert first_segments and all(a is b for a, b in zip(first_segments, transcript._segments))
+
+    assert transcript.to_dicts() == expected
+    assert transcript.take([5, 3, 0]).to_dicts() == [expected[5], expected[3], expected[0]]
+    assert transcript.slice_time(10.5, 12.0) == ColumnarTranscript(expected[10:12])
+    assert transcript.nbytes() > 0